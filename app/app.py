@@ -8,7 +8,11 @@ Modern UI 2025 - Glassmorphism Design
 
 import streamlit as st
 from rag_system import RAGSystem, load_suggested_questions
+from model_provider import GenerationStats
 from audit_logger import get_audit_logger
+from whisper_manager import get_whisper_manager
+from index_status import STATUS_INDEXING, get_index_status_store
+from ingestion_profiles import default_profile, list_profiles
 import logging
 from pathlib import Path
 import hashlib
@@ -391,8 +395,28 @@ def init_rag_system():
     return RAGSystem()
 
 
-def index_files_now(file_paths, progress_callback=None):
-    """Natychmiastowe indeksowanie wskazanych plików."""
+def format_index_progress(record) -> str:
+    """Opis postępu indeksowania pliku (etap i wykonane jednostki)"""
+    if not record or record.get('status') != STATUS_INDEXING:
+        return ""
+    stage = record.get('stage') or "przetwarzanie"
+    done, total = record.get('done', 0), record.get('total', 0)
+    progress = f"{stage} {done}/{total}" if total else stage
+    text = f"indeksowanie: {progress}, {record.get('chunks', 0)} fragmentów w bazie"
+    if record.get('error'):
+        text += " (przerwane - zostanie wznowione)"
+    return text
+
+
+INGESTION_PROFILE_LABELS = {
+    "fast": "Szybki (mały Whisper, rzadkie klatki, bez OCR i opisu grafik w dokumentach)",
+    "balanced": "Zrównoważony (ustawienia z konfiguracji)",
+    "thorough": "Dokładny (large-v3, każda sekunda wideo, OCR i opisy wszystkich grafik)",
+}
+
+
+def index_files_now(file_paths, progress_callback=None, status_callback=None, profile=None):
+    """Natychmiastowe indeksowanie wskazanych plików (długie nagrania publikowane w trakcie)."""
     if not file_paths:
         return 0
     
@@ -404,24 +428,16 @@ def index_files_now(file_paths, progress_callback=None):
         stage = "done"
         error = None
         try:
-            collection = rag.vector_db.collection
-            existing = collection.get(where={"source_file": file_path.name})
-            if existing and existing.get('ids'):
-                stage = "skip"
-            else:
-                chunks = rag.doc_processor.process_file(file_path)
-                if not chunks:
-                    stage = "empty"
-                else:
-                    chunks_with_embeddings = rag.embedding_processor.create_embeddings(chunks)
-                    rag.vector_db.add_documents(chunks_with_embeddings)
-                    indexed_count += 1
-                    # weryfikacja czy dokument trafił do bazy
-                    verify = collection.get(where={"source_file": file_path.name}, include=['ids'])
-                    if not verify.get('ids'):
-                        logger.warning("Dokument %s nie został odnaleziony po dodaniu.", file_path.name)
-                    else:
-                        logger.info("Dodano %s (fragmentów: %d)", file_path.name, len(chunks))
+            on_progress = None
+            if status_callback:
+                on_progress = lambda record, path=file_path: status_callback(path, record)
+            result = rag.index_file(file_path, progress_callback=on_progress, profile=profile,
+                                    explicit_profile=profile is not None)
+            stage = result['stage']
+            error = result.get('error')
+            if stage == "done":
+                indexed_count += 1
+                logger.info("Dodano %s (fragmentów: %d)", file_path.name, result['chunks'])
         except Exception as exc:
             stage = "error"
             error = exc
@@ -430,11 +446,6 @@ def index_files_now(file_paths, progress_callback=None):
             if progress_callback:
                 progress_callback(idx, total, file_path, stage, error)
     
-    try:
-        rag.rebuild_bm25_index()
-    except Exception as exc:
-        logging.warning("Błąd podczas przebudowy BM25 po indeksowaniu: %s", exc)
-    
     st.cache_resource.clear()
     return indexed_count
 
@@ -533,7 +544,8 @@ def main():
     
     # Whisper model
     if 'whisper_model' not in st.session_state:
-        st.session_state.whisper_model = 'base'
+        # Pierwsze utworzenie singletonu - z sekcją "whisper" konfiguracji
+        st.session_state.whisper_model = get_whisper_manager(load_credentials().get('whisper', {})).model_name
     
     # Upload progress
     if 'upload_progress' not in st.session_state:
@@ -797,6 +809,36 @@ def main():
         except:
             st.markdown("**Model:** Gemma 3:12B")
         
+        # Połączenia HTTP z backendem LLM (pula keep-alive, ponowienia, circuit breaker)
+        try:
+            http_stats = init_rag_system().model_provider.connection_stats()
+            if http_stats.get('requests'):
+                reuse = http_stats['connection_reuse']
+                reuse_text = f"{reuse * 100:.0f}%" if reuse is not None else "N/A"
+                circuit_text = "otwarty" if http_stats['circuit'] != "closed" else "OK"
+                st.caption(
+                    f"LLM HTTP: {http_stats['requests']} żądań, ponowne użycie połączeń {reuse_text}, "
+                    f"ponowień {http_stats['retries']}, obwód {circuit_text}"
+                )
+            if 'waiting' in http_stats:
+                st.caption(f"LLM kolejka: {http_stats['active']}/{http_stats['max_concurrency']} aktywnych, "
+                           f"{http_stats['waiting']} oczekujących")
+            
+            # Opóźnienie pierwszego tokenu: zimny start (ładowanie modelu) vs model w pamięci
+            latency = init_rag_system().model_provider.latency_stats()
+            if latency:
+                parts = []
+                if latency['warmup']:
+                    parts.append("rozgrzewka " + ", ".join(
+                        f"{model} {seconds:.1f}s" for model, seconds in latency['warmup'].items()))
+                for bucket, label in (('cold', "zimny start"), ('warm', "ciepły")):
+                    if latency[f'{bucket}_requests']:
+                        parts.append(f"{label} {latency[f'{bucket}_ttft']:.2f}s ({latency[f'{bucket}_requests']}×)")
+                if parts:
+                    st.caption("LLM TTFT: " + " · ".join(parts))
+        except Exception:
+            pass
+        
         # Informacja o auto-refresh
         time_since_refresh = int(current_time - st.session_state.last_refresh)
         next_refresh = refresh_interval - time_since_refresh
@@ -911,10 +953,10 @@ def main():
             if not question:
                 st.warning("Proszę wprowadzić pytanie")
             else:
-                with st.spinner("Szukam odpowiedzi... (może potrwać 30-60 sekund)"):
-                    try:
-                        rag = init_rag_system()
-                        
+                try:
+                    rag = init_rag_system()
+                    
+                    with st.spinner("Szukam pasujących fragmentów..."):
                         # Wybierz strategię wyszukiwania na podstawie wyboru użytkownika
                         if search_mode == "Wektor":
                             # Tylko wyszukiwanie wektorowe
@@ -938,104 +980,109 @@ def main():
                                 sources = rag.hybrid_search.search(question, n_results, use_reranker=True)
                             else:
                                 sources = rag.vector_db.search(question, n_results)
-                        
-                        # Wygeneruj odpowiedź (użyj parametrów z ustawień)
-                        params = st.session_state.model_params
-                        answer = rag.query(
-                            question, 
-                            n_results=n_results,
-                            user_id=st.session_state.username,
-                            session_id=st.session_state.get('session_id', 'unknown'),
-                            temperature=params['temperature'],
-                            top_p=params['top_p'],
-                            top_k=params['top_k'],
-                            max_tokens=params['max_tokens']
-                        )
-                        
-                        # Zapisz w session state
-                        st.session_state['last_answer'] = answer
-                        st.session_state['last_sources'] = sources
-                        st.session_state['last_question'] = question
-                        
-                        # WAŻNE: Zapisz do historii
-                        if 'history' not in st.session_state:
-                            st.session_state.history = []
-                        st.session_state.history.append({
-                            'question': question,
-                            'answer': answer,
-                            'sources_count': len(sources),
-                            'search_mode': search_mode
-                        })
-                        
-                        # Wyświetl odpowiedź
-                        st.success(f"Odpowiedź wygenerowana (strategia: {search_mode})")
-                        st.markdown("### Odpowiedź:")
-                        st.markdown(answer)
-                        
-                        # Wyświetl źródła z możliwością podglądu
-                        st.markdown("---")
-                        st.markdown(f"### Źródła ({len(sources)} dokumentów):")
-                        
-                        for i, source in enumerate(sources):
-                            with st.expander(f"[{i+1}] {source.source_file} - Strona {source.page_number}"):
-                                # Wyświetl fragment tekstu
-                                st.markdown("**Fragment:**")
-                                st.text_area("", source.content, height=150, key=f"content_{i}", disabled=True)
+                
+                    # Odpowiedź wyświetlana token po tokenie (użyj parametrów z ustawień)
+                    params = st.session_state.model_params
+                    stats = GenerationStats()
+                    st.markdown("### Odpowiedź:")
+                    answer = st.write_stream(rag.query_stream(
+                        question, 
+                        n_results=n_results,
+                        user_id=st.session_state.username,
+                        session_id=st.session_state.get('session_id', 'unknown'),
+                        temperature=params['temperature'],
+                        top_p=params['top_p'],
+                        top_k=params['top_k'],
+                        max_tokens=params['max_tokens'],
+                        stats=stats
+                    ))
+                    
+                    # Zapisz w session state
+                    st.session_state['last_answer'] = answer
+                    st.session_state['last_sources'] = sources
+                    st.session_state['last_question'] = question
+                    
+                    # WAŻNE: Zapisz do historii
+                    if 'history' not in st.session_state:
+                        st.session_state.history = []
+                    st.session_state.history.append({
+                        'question': question,
+                        'answer': answer,
+                        'sources_count': len(sources),
+                        'search_mode': search_mode
+                    })
+                    
+                    st.success(f"Odpowiedź wygenerowana (strategia: {search_mode})")
+                    if stats.ttft is not None:
+                        st.caption(f"Pierwszy token po {stats.ttft:.2f} s · "
+                                   f"prompt {stats.prompt_tokens or stats.prompt_estimate} tokenów · "
+                                   f"{stats.output_tokens} tokenów · "
+                                   f"{stats.tokens_per_second:.1f} tokenów/s ({stats.model})")
+                    
+                    # Wyświetl źródła z możliwością podglądu
+                    st.markdown("---")
+                    st.markdown(f"### Źródła ({len(sources)} dokumentów):")
+                    
+                    for i, source in enumerate(sources):
+                        with st.expander(f"[{i+1}] {source.source_file} - Strona {source.page_number}"):
+                            # Wyświetl fragment tekstu
+                            st.markdown("**Fragment:**")
+                            st.text_area("", source.content, height=150, key=f"content_{i}", disabled=True)
+                            
+                            # Sprawdź czy to obraz czy PDF
+                            file_path = Path("data") / source.source_file
+                            
+                            if file_path.exists():
+                                file_ext = file_path.suffix.lower()
                                 
-                                # Sprawdź czy to obraz czy PDF
-                                file_path = Path("data") / source.source_file
+                                # OBRAZY
+                                if file_ext in ['.jpg', '.jpeg', '.png', '.bmp']:
+                                    st.markdown("**Podgląd obrazu:**")
+                                    st.image(str(file_path), use_container_width=True)
                                 
-                                if file_path.exists():
-                                    file_ext = file_path.suffix.lower()
+                                # PDF
+                                elif file_ext == '.pdf':
+                                    st.markdown(f"**Plik PDF - Strona {source.page_number}**")
                                     
-                                    # OBRAZY
-                                    if file_ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-                                        st.markdown("**Podgląd obrazu:**")
-                                        st.image(str(file_path), use_container_width=True)
+                                    # Przycisk do pobrania
+                                    with open(file_path, 'rb') as f:
+                                        pdf_bytes = f.read()
+                                        st.download_button(
+                                            label="Pobierz pełny PDF",
+                                            data=pdf_bytes,
+                                            file_name=source.source_file,
+                                            mime="application/pdf",
+                                            key=f"download_{i}"
+                                        )
                                     
-                                    # PDF
-                                    elif file_ext == '.pdf':
-                                        st.markdown(f"**Plik PDF - Strona {source.page_number}**")
-                                        
-                                        # Przycisk do pobrania
-                                        with open(file_path, 'rb') as f:
-                                            pdf_bytes = f.read()
-                                            st.download_button(
-                                                label="Pobierz pełny PDF",
-                                                data=pdf_bytes,
-                                                file_name=source.source_file,
-                                                mime="application/pdf",
-                                                key=f"download_{i}"
-                                            )
+                                    # Wyświetl konkretną stronę
+                                    try:
+                                        import fitz  # PyMuPDF
+                                        doc = fitz.open(str(file_path))
+                                        page_num = source.page_number - 1
                                         
-                                        # Wyświetl konkretną stronę
-                                        try:
-                                            import fitz  # PyMuPDF
-                                            doc = fitz.open(str(file_path))
-                                            page_num = source.page_number - 1
+                                        if 0 <= page_num < len(doc):
+                                            page = doc[page_num]
+                                            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+                                            img_bytes = pix.tobytes("png")
                                             
-                                            if 0 <= page_num < len(doc):
-                                                page = doc[page_num]
-                                                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                                                img_bytes = pix.tobytes("png")
-                                                
-                                                st.markdown(f"**Podgląd strony {source.page_number}:**")
-                                                st.image(img_bytes, use_container_width=True)
-                                            else:
-                                                st.warning(f"Strona {source.page_number} nie istnieje w dokumencie")
-                                            
-                                            doc.close()
-                                        except ImportError:
-                                            st.info("Zainstaluj PyMuPDF aby zobaczyć podgląd strony: pip install PyMuPDF")
-                                        except Exception as e:
-                                            st.error(f"Błąd podczas ładowania strony PDF: {e}")
-                                else:
-                                    st.warning(f"Plik nie istnieje: {file_path}")
-                        
-                    except Exception as e:
-                        st.error(f"Błąd: {e}")
-                        logger.error(f"Błąd podczas przetwarzania pytania: {e}", exc_info=True)
-        
+                                            st.markdown(f"**Podgląd strony {source.page_number}:**")
+                                            st.image(img_bytes, use_container_width=True)
+                                        else:
+                                            st.warning(f"Strona {source.page_number} nie istnieje w dokumencie")
+                                        
+                                        doc.close()
+                                    except ImportError:
+                                        st.info("Zainstaluj PyMuPDF aby zobaczyć podgląd strony: pip install PyMuPDF")
+                                    except Exception as e:
+                                        st.error(f"Błąd podczas ładowania strony PDF: {e}")
+                            else:
+                                st.warning(f"Plik nie istnieje: {file_path}")
+                    
+                except Exception as e:
+                    st.error(f"Błąd: {e}")
+                    logger.error(f"Błąd podczas przetwarzania pytania: {e}", exc_info=True)
+    
         # Historia
         st.markdown("---")
         st.subheader("Historia zapytań")
@@ -1072,6 +1119,19 @@ def main():
         
         # Upload nowych plików
         st.subheader("Dodaj nowe dokumenty")
+        
+        # Profil indeksowania: szybko zaindeksuj zaległe pliki, później uzupełnij profilem dokładnym
+        app_config = load_credentials()
+        profiles = list_profiles(app_config)
+        if st.session_state.get('ingestion_profile') not in profiles:
+            st.session_state.ingestion_profile = default_profile(app_config)
+        st.selectbox(
+            "Profil indeksowania",
+            options=profiles,
+            key="ingestion_profile",
+            format_func=lambda name: INGESTION_PROFILE_LABELS.get(name, name),
+            help="Plik zaindeksowany innym profilem jest indeksowany ponownie (np. reindeksacja profilem dokładnym)"
+        )
         uploaded_files = st.file_uploader(
             "Przeciągnij pliki tutaj lub kliknij aby wybrać",
             accept_multiple_files=True,
@@ -1177,13 +1237,19 @@ def main():
                         elif stage == "error":
                             status_placeholder.error(f"Błąd podczas indeksowania {name}: {error}")
                     
+                    def _status(file_path, record):
+                        progress_text = format_index_progress(record)
+                        if progress_text:
+                            status_placeholder.info(f"{file_path.name} - {progress_text}")
+                    
                     st.session_state.processing_status = (
                         "Tworzenie bazy dla nowych plików... "
                         "Postęp możesz śledzić w logach lub poniższym statusie."
                     )
                     st.session_state.processing_status_shown = ""
                     
-                    indexed_now = index_files_now(saved_paths, _progress)
+                    indexed_now = index_files_now(saved_paths, _progress, _status,
+                                                  profile=st.session_state.ingestion_profile)
                     
                     progress_bar.empty()
                     status_placeholder.empty()
@@ -1232,21 +1298,24 @@ def main():
                                     progress_bar.progress(progress)
                                     status_text.text(f"Indeksowanie: {file_path.name} ({idx + 1}/{len(files_to_process)})")
                                     
-                                    # Sprawdź czy plik już jest w bazie
-                                    collection = rag.vector_db.collection
-                                    existing = collection.get(where={"source_file": file_path.name})
+                                    # Pliki w pełni zaindeksowane są pomijane, przerwane - wznawiane
+                                    result = rag.index_file(
+                                        file_path,
+                                        progress_callback=lambda record, name=file_path.name: status_text.text(
+                                            f"Indeksowanie: {name} - {format_index_progress(record) or 'zapis'}"
+                                        ),
+                                        profile=st.session_state.ingestion_profile,
+                                        explicit_profile=True
+                                    )
                                     
-                                    if existing and len(existing['ids']) > 0:
+                                    if result['stage'] == "skip":
                                         status_text.text(f"Pomijam (już w bazie): {file_path.name}")
                                         time.sleep(0.5)
                                         continue
-                                    
-                                    # Przetwórz plik
-                                    chunks = rag.doc_processor.process_file(file_path)
-                                    if chunks:
-                                        chunks_with_embeddings = rag.embedding_processor.create_embeddings(chunks)
-                                        rag.vector_db.add_documents(chunks_with_embeddings)
+                                    if result['stage'] == "done":
                                         success_count += 1
+                                    elif result['stage'] == "error":
+                                        st.error(f"Błąd przy {file_path.name}: {result['error']}")
                                         
                                 except Exception as e:
                                     st.error(f"Błąd przy {file_path.name}: {e}")
@@ -1257,11 +1326,6 @@ def main():
                             if success_count > 0:
                                 st.success(f"✅ Zaindeksowano {success_count} nowych plików")
                                 st.session_state.processing_status = "Reindeksacja zakończona."
-                                # Przebuduj BM25 index
-                                try:
-                                    rag.rebuild_bm25_index()
-                                except:
-                                    pass
                                 st.cache_resource.clear()
                                 time.sleep(2)
                                 st.rerun()
@@ -1299,6 +1363,8 @@ def main():
                     files_in_db[file_name] = 0
                 files_in_db[file_name] += 1
             
+            index_status = get_index_status_store().all()
+            
             if files_in_db:
                 st.write(f"**Znaleziono {len(files_in_db)} dokumentów w bazie:**")
                 
@@ -1324,7 +1390,7 @@ def main():
                         st.markdown(f"**{file_name}**")
                     
                     with col3:
-                        st.caption(f"{chunk_count} fragmentów")
+                        st.caption(format_index_progress(index_status.get(file_name)) or f"{chunk_count} fragmentów")
                 
                 # Przycisk usuwania zaznaczonych
                 if st.session_state.files_to_delete:
@@ -1352,6 +1418,7 @@ def main():
                                     if ids_to_delete:
                                         collection.delete(ids=ids_to_delete)
                                         logger.info(f"Usunięto {len(ids_to_delete)} fragmentów z bazy dla {file_name}")
+                                    get_index_status_store().remove(file_name)
                                     
                                     deleted_count += 1
                                     
@@ -1565,10 +1632,10 @@ def main():
         
         whisper_models = {
             'tiny': 'Tiny (75 MB) - najszybszy, najmniej dokładny',
-            'base': 'Base (145 MB) - dobry balans (domyślny)',
+            'base': 'Base (145 MB) - dobry balans',
             'small': 'Small (470 MB) - bardziej dokładny',
             'medium': 'Medium (1.5 GB) - bardzo dokładny',
-            'large-v3': 'Large v3 (3 GB) - najdokładniejszy'
+            'large-v3': 'Large v3 (3 GB) - najdokładniejszy (domyślny)'
         }
         
         available_models = []
@@ -1592,6 +1659,7 @@ def main():
         
         if st.button("Zapisz model Whisper"):
             st.session_state.whisper_model = selected_whisper
+            get_whisper_manager().set_model_name(selected_whisper)
             st.success(f"Model Whisper ustawiony na: {selected_whisper}")
             st.info("Nowy model będzie użyty dla kolejnych plików audio/wideo")
         
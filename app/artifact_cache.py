@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Artifact Cache - trwały cache kosztownych wyników ingestii.
+
+Przechowuje na dysku:
+- Opisy obrazów z modelu wizyjnego (Gemma 3)
+- Tekst OCR (Tesseract)
+- Transkrypcje Whisper
+
+Klucz = (hash danych wejściowych, nazwa modelu, wersja promptu/parametrów),
+więc zmiana modelu lub promptu automatycznie unieważnia stare wpisy.
+Rozmiar cache jest ograniczony - najdawniej używane wpisy są usuwane (LRU po mtime).
+Jedna instancja na katalog w procesie (get_artifact_cache), rozmiar liczony
+leniwie przy pierwszym zapisie.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARTIFACT_CACHE_DIR = BASE_DIR / "cache" / "artifacts"
+DEFAULT_MAX_SIZE_MB = 2048
+EVICTION_TARGET_RATIO = 0.9  # Po przekroczeniu limitu czyścimy do 90% rozmiaru
+
+
+def hash_bytes(data: bytes) -> str:
+    """Zwraca SHA-256 danych"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path: Path, block_size: int = 1024 * 1024) -> str:
+    """
+    Zwraca SHA-256 pliku czytanego blokami (stała pamięć dla dużych nagrań).
+
+    Args:
+        file_path: Ścieżka do pliku
+        block_size: Rozmiar bloku odczytu
+
+    Returns:
+        Hash hex
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def params_version(params: Dict[str, Any]) -> str:
+    """
+    Zwraca wersję parametrów (prompt, język, opcje modelu) jako krótki hash.
+
+    Args:
+        params: Słownik parametrów wpływających na wynik
+
+    Returns:
+        16-znakowy identyfikator wersji
+    """
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache wyników na lokalnym dysku.
+
+    Każdy wpis to osobny plik JSON: <cache_dir>/<rodzaj>/<klucz[:2]>/<klucz>.json
+    """
+
+    def __init__(self, cache_dir: Path = ARTIFACT_CACHE_DIR, max_size_mb: int = DEFAULT_MAX_SIZE_MB,
+                 enabled: bool = True):
+        """
+        Inicjalizuje cache.
+
+        Args:
+            cache_dir: Katalog cache
+            max_size_mb: Maksymalny rozmiar cache w MB
+            enabled: False wyłącza cache (get zawsze zwraca None)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evicted': 0}
+
+        # Rozmiar na dysku liczony przy pierwszym zapisie (pełny przegląd katalogu jest kosztowny)
+        self._size_bytes: Optional[int] = None
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"ArtifactCache: {self.cache_dir} (limit {max_size_mb} MB)")
+        else:
+            self._size_bytes = 0
+            logger.info("ArtifactCache wyłączony w konfiguracji")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ArtifactCache':
+        """Tworzy cache na podstawie sekcji "artifact_cache" konfiguracji"""
+        return cls(
+            cache_dir=Path(config.get('dir', ARTIFACT_CACHE_DIR)),
+            max_size_mb=config.get('max_size_mb', DEFAULT_MAX_SIZE_MB),
+            enabled=config.get('enabled', True)
+        )
+
+    @staticmethod
+    def make_key(kind: str, input_hash: str, model: str, version: str) -> str:
+        """Tworzy klucz wpisu z (rodzaj, hash wejścia, model, wersja)"""
+        return hashlib.sha256(f"{kind}||{input_hash}||{model}||{version}".encode('utf-8')).hexdigest()
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.cache_dir / kind / key[:2] / f"{key}.json"
+
+    def get(self, kind: str, input_hash: str, model: str, version: str) -> Optional[Any]:
+        """
+        Pobiera wynik z cache.
+
+        Args:
+            kind: Rodzaj artefaktu ('vision', 'ocr', 'transcription', ...)
+            input_hash: Hash danych wejściowych
+            model: Nazwa modelu
+            version: Wersja promptu/parametrów (patrz params_version)
+
+        Returns:
+            Zapisana wartość lub None
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(kind, self.make_key(kind, input_hash, model, version))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Uszkodzony wpis cache {path.name}: {e}")
+            self.stats['misses'] += 1
+            return None
+
+        # Aktualizacja czasu użycia (LRU)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self.stats['hits'] += 1
+        logger.debug(f"ArtifactCache hit: {kind} ({input_hash[:12]}, {model})")
+        return entry.get('value')
+
+    def set(self, kind: str, input_hash: str, model: str, version: str, value: Any):
+        """
+        Zapisuje wynik do cache.
+
+        Args:
+            kind: Rodzaj artefaktu
+            input_hash: Hash danych wejściowych
+            model: Nazwa modelu
+            version: Wersja promptu/parametrów
+            value: Wartość serializowalna do JSON
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(kind, self.make_key(kind, input_hash, model, version))
+        entry = {
+            'kind': kind,
+            'input_hash': input_hash,
+            'model': model,
+            'version': version,
+            'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'value': value
+        }
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Zapis atomowy - równoległe procesy nie zobaczą niepełnego pliku
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+            with self._lock:
+                if self._size_bytes is None:
+                    self._size_bytes = self._scan_size()
+                    logger.info(f"ArtifactCache: {self._size_bytes / 1e6:.1f}/"
+                                f"{self.max_size_bytes / 1024 / 1024:.0f} MB na dysku")
+                else:
+                    self._size_bytes += path.stat().st_size
+                self.stats['writes'] += 1
+                over_limit = self._size_bytes > self.max_size_bytes
+
+            if over_limit:
+                self._evict()
+        except Exception as e:
+            logger.warning(f"Błąd zapisu do ArtifactCache ({kind}): {e}")
+
+    def _scan_size(self) -> int:
+        """Liczy rzeczywisty rozmiar cache na dysku"""
+        return sum(p.stat().st_size for p in self.cache_dir.rglob('*.json') if p.is_file())
+
+    def _evict(self):
+        """Usuwa najdawniej używane wpisy aż rozmiar spadnie poniżej progu"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.rglob('*.json'):
+                try:
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    continue
+
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_size_bytes * EVICTION_TARGET_RATIO)
+            removed = 0
+
+            for _, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                    removed += 1
+                except OSError:
+                    continue
+
+            self._size_bytes = total
+            self.stats['evicted'] += removed
+
+        if removed:
+            logger.info(f"ArtifactCache: usunięto {removed} najstarszych wpisów ({total / 1e6:.1f} MB po czyszczeniu)")
+
+    def clear(self):
+        """Usuwa wszystkie wpisy z cache"""
+        with self._lock:
+            for path in self.cache_dir.rglob('*.json'):
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+            self._size_bytes = 0
+        logger.info("ArtifactCache wyczyszczony")
+
+
+_caches: Dict[str, ArtifactCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_artifact_cache(config: Optional[Dict[str, Any]] = None) -> ArtifactCache:
+    """
+    Zwraca współdzielony ArtifactCache dla katalogu z konfiguracji.
+
+    Procesory dokumentów tworzone przy każdej przebudowie RAGSystem (i dla
+    każdego profilu indeksowania) korzystają z jednej instancji - licznik
+    rozmiaru i statystyki nie są liczone od nowa.
+
+    Args:
+        config: Sekcja "artifact_cache" konfiguracji
+    """
+    config = config or {}
+    key = str(Path(config.get('dir', ARTIFACT_CACHE_DIR)).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = ArtifactCache.from_config(config)
+        return cache
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async Model Provider - asynchroniczni dostawcy modeli LLM dla wielu użytkowników.
+
+Obsługuje:
+- Providery OpenAI i Ollama na httpx.AsyncClient (pula połączeń keep-alive,
+  ponawianie nawiązania połączenia, circuit breaker z model_provider)
+- Wspólną pętlę asyncio w wątku tła - sesje Streamlit nie blokują wątków
+  serwera na czas generowania, czekają tylko na kolejne tokeny
+- Globalny limit równoległych generowań z kolejką sprawiedliwą per użytkownik
+  (round-robin, limit aktywnych żądań jednego użytkownika)
+- Anulowanie generowania, gdy klient przestaje odbierać strumień
+  (zamknięcie połączenia przerywa generowanie po stronie serwera)
+- Synchroniczny adapter ModelProvider dla istniejących wywołań
+
+Włączane kluczem "async" sekcji "model_http" konfiguracji (wymaga httpx).
+"""
+
+import asyncio
+import logging
+import queue
+import random
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from model_provider import (
+    DEFAULT_BACKOFF_SECONDS, DEFAULT_FAILURE_THRESHOLD, DEFAULT_KEEP_ALIVE, DEFAULT_MAX_BACKOFF_SECONDS,
+    DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE, DEFAULT_RESET_SECONDS, RETRY_STATUS_CODES,
+    CircuitBreaker, CircuitOpenError, GenerationStats, LatencyTracker, ModelProvider, claim_warm_up,
+    get_latency_tracker, release_warm_up,
+    ollama_generate_payload, ollama_warmup_payload, openai_chat_payload,
+    parse_ollama_stream_line, parse_openai_stream_line
+)
+
+logger = logging.getLogger(__name__)
+
+# Sekcja "model_http" konfiguracji
+DEFAULT_MAX_CONCURRENCY = 4         # Równoległych generowań na cały proces
+DEFAULT_PER_USER_CONCURRENCY = 1    # Aktywnych generowań jednego użytkownika
+ANONYMOUS_USER = "anonymous"
+
+
+class FairLimiter:
+    """
+    Globalny limit równoległych żądań ze sprawiedliwą kolejką.
+
+    Każdy użytkownik ma własną kolejkę FIFO, a wolne miejsca przydzielane są
+    użytkownikom po kolei (round-robin) - jeden użytkownik wysyłający wiele
+    pytań nie blokuje pozostałych. Obiekt używany jest wyłącznie z pętli
+    asyncio, więc nie potrzebuje blokad.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 per_user: int = DEFAULT_PER_USER_CONCURRENCY):
+        """
+        Inicjalizuje limit.
+
+        Args:
+            max_concurrency: Maksymalna liczba aktywnych żądań
+            per_user: Maksymalna liczba aktywnych żądań jednego użytkownika
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_user = max(1, per_user)
+        self._active_total = 0
+        self._active: Dict[str, int] = defaultdict(int)
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self.cancelled = 0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._queues.values())
+
+    @property
+    def active(self) -> int:
+        return self._active_total
+
+    def _dispatch(self):
+        """Przydziela wolne miejsca oczekującym (po jednym na użytkownika w kolejce)"""
+        while self._active_total < self.max_concurrency:
+            user = next((name for name in self._queues if self._active[name] < self.per_user), None)
+            if user is None:
+                return
+            waiters = self._queues.pop(user)
+            waiter = waiters.popleft()
+            if waiters:
+                # Użytkownik trafia na koniec kolejki - round-robin
+                self._queues[user] = waiters
+            if waiter.done():
+                continue
+            self._active_total += 1
+            self._active[user] += 1
+            waiter.set_result(None)
+
+    def _release(self, user: str):
+        self._active_total -= 1
+        self._active[user] -= 1
+        if not self._active[user]:
+            del self._active[user]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user: Optional[str] = None):
+        """
+        Zajmuje miejsce na czas bloku (czeka w kolejce użytkownika).
+
+        Anulowanie w trakcie oczekiwania usuwa żądanie z kolejki.
+        """
+        user = user or ANONYMOUS_USER
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user, deque()).append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            if waiter.done() and not waiter.cancelled():
+                # Miejsce przydzielone tuż przed anulowaniem
+                self._release(user)
+            else:
+                waiters = self._queues.get(user)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._queues[user]
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(user)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_concurrency': self.max_concurrency,
+            'per_user': self.per_user,
+            'cancelled': self.cancelled,
+        }
+
+
+class AsyncRuntime:
+    """Pętla asyncio w wątku tła, współdzielona przez wszystkie sesje"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="model-async", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """Uruchamia korutynę w pętli (zwraca concurrent.futures.Future)"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """Uruchamia korutynę i czeka na wynik (przerwanie oczekiwania anuluje korutynę)"""
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+
+_runtime: Optional[AsyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_async_runtime() -> AsyncRuntime:
+    """Zwraca globalną pętlę asyncio providerów (tworzy przy pierwszym użyciu)"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+        return _runtime
+
+
+_limiter: Optional[FairLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_fair_limiter(config: Optional[Dict[str, Any]] = None) -> FairLimiter:
+    """
+    Zwraca globalny limit równoległych generowań.
+
+    Limit musi obejmować cały proces - RAGSystem (i jego provider) jest
+    przebudowywany przez Streamlit, a nowy limiter nie widziałby generowań
+    trwających w poprzednim. Zmienione ustawienia stosowane są w miejscu.
+
+    Args:
+        config: Sekcja "model_http" konfiguracji
+    """
+    global _limiter
+    config = config or {}
+    max_concurrency = config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+    per_user = config.get('per_user_concurrency', DEFAULT_PER_USER_CONCURRENCY)
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = FairLimiter(max_concurrency, per_user)
+        elif (_limiter.max_concurrency, _limiter.per_user) != (max(1, max_concurrency), max(1, per_user)):
+            limiter = _limiter
+
+            def update():
+                limiter.max_concurrency = max(1, max_concurrency)
+                limiter.per_user = max(1, per_user)
+                limiter._dispatch()
+
+            # Stan limitera zmieniany jest wyłącznie w pętli asyncio
+            get_async_runtime().loop.call_soon_threadsafe(update)
+        return _limiter
+
+
+_clients: Dict[str, Any] = {}
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_client(base_url: str, pool_size: int = DEFAULT_POOL_SIZE):
+    """
+    Zwraca klienta httpx.AsyncClient dla adresu (jeden na proces).
+
+    Pula połączeń keep-alive przetrwa przebudowę providera. Klient używany
+    jest tylko we wspólnej pętli get_async_runtime().
+    """
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            import httpx
+            client = _clients[base_url] = httpx.AsyncClient(
+                base_url=base_url,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        return client
+
+
+def get_async_breaker(name: str, base_url: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                      reset_seconds: float = DEFAULT_RESET_SECONDS) -> CircuitBreaker:
+    """Zwraca circuit breaker backendu (jeden na proces - stan obwodu przetrwa przebudowę providera)"""
+    with _clients_lock:
+        breaker = _breakers.get((name, base_url))
+        if breaker is None:
+            breaker = _breakers[(name, base_url)] = CircuitBreaker(name, failure_threshold, reset_seconds)
+        return breaker
+
+
+class AsyncModelProvider(ABC):
+    """
+    Bazowy asynchroniczny provider HTTP.
+
+    Klient httpx i circuit breaker są wspólne dla wszystkich providerów
+    tego samego adresu w procesie (get_async_client, get_async_breaker).
+    """
+
+    name = "llm"
+    latency: Optional[LatencyTracker] = None
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS
+    ):
+        import httpx  # noqa: F401 - brak httpx wykrywany przy tworzeniu providera
+
+        self.base_url = base_url
+        self.pool_size = max(1, pool_size)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.breaker = get_async_breaker(self.name, base_url, failure_threshold, reset_seconds)
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> 'AsyncModelProvider':
+        """Tworzy provider na podstawie sekcji "model_http" (podsekcja providera nadpisuje wspólne klucze)"""
+        settings = {**config, **(config.get(cls.name) or {})}
+        return cls(
+            pool_size=settings.get('pool_size', DEFAULT_POOL_SIZE),
+            max_retries=settings.get('max_retries', DEFAULT_MAX_RETRIES),
+            backoff_seconds=settings.get('backoff_seconds', DEFAULT_BACKOFF_SECONDS),
+            max_backoff_seconds=settings.get('max_backoff_seconds', DEFAULT_MAX_BACKOFF_SECONDS),
+            failure_threshold=settings.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+            reset_seconds=settings.get('reset_seconds', DEFAULT_RESET_SECONDS),
+            **kwargs
+        )
+
+    @property
+    def client(self):
+        return get_async_client(self.base_url, self.pool_size)
+
+    def _headers(self) -> Dict[str, str]:
+        return {}
+
+    async def _send(self, method: str, path: str, stream: bool = False, retry: bool = True,
+                    timeout: float = 120, **kwargs):
+        """
+        Wysyła żądanie (ponawiane są kody RETRY_STATUS_CODES i błędy nawiązania
+        połączenia - ReadTimeout po wysłaniu POST nie jest ponawiany, backend mógł
+        już rozpocząć generowanie).
+
+        Przy stream=True odpowiedź trzeba zamknąć (aclose) po odczycie treści.
+        """
+        import httpx
+
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                self.stats['rejected'] += 1
+                raise
+
+            self.stats['requests'] += 1
+            request = self.client.build_request(method, path, headers=self._headers(), timeout=timeout, **kwargs)
+            try:
+                response = await self.client.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                self.breaker.record_failure()
+                self.stats['failures'] += 1
+                if attempt + 1 >= attempts:
+                    raise
+                logger.warning(f"[Async] {self.name}: błąd połączenia (próba {attempt + 1}/{attempts}): {e}")
+                self.stats['retries'] += 1
+                await self._backoff(attempt)
+                continue
+            except asyncio.CancelledError:
+                # Klient przerwał odbiór - to nie błąd backendu, ale próba półotwartego obwodu musi się zakończyć
+                self.breaker.release_probe()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                self.stats['failures'] += 1
+                raise
+
+            if response.status_code in RETRY_STATUS_CODES:
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    # 429: backend żyje, ale dławi ruch - próba półotwartego obwodu kończy się bez rozstrzygnięcia
+                    self.breaker.release_probe()
+                self.stats['failures'] += 1
+                if attempt + 1 < attempts:
+                    logger.warning(f"[Async] {self.name}: HTTP {response.status_code} (próba {attempt + 1}/{attempts})")
+                    await response.aclose()
+                    self.stats['retries'] += 1
+                    await self._backoff(attempt)
+                    continue
+                return response
+
+            self.breaker.record_success()
+            return response
+
+    async def _backoff(self, attempt: int):
+        await asyncio.sleep(random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * (2 ** attempt))))
+
+    @abstractmethod
+    async def generate(self, prompt: str, context: str = "", **kwargs) -> str:
+        pass
+
+    @abstractmethod
+    def generate_stream(self, prompt: str, context: str = "", stats: Optional[GenerationStats] = None,
+                        **kwargs) -> AsyncIterator[str]:
+        pass
+
+    @abstractmethod
+    async def list_models(self) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def is_available(self) -> bool:
+        pass
+
+    @abstractmethod
+    def get_model_name(self) -> str:
+        pass
+
+    async def warm_up(self, models: List[Tuple[str, Optional[int]]]):
+        """Ładuje modele na serwerze (domyślnie nic)"""
+        pass
+
+    @abstractmethod
+    def set_model(self, model: str):
+        pass
+
+    def connection_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({
+            'provider': self.name,
+            'pool_size': self.pool_size,
+            'connection_reuse': None,
+            'circuit': self.breaker.state,
+            'circuit_opened': self.breaker.opened,
+        })
+        return stats
+
+
+class AsyncOpenAIProvider(AsyncModelProvider):
+    """Asynchroniczny provider OpenAI API (chat/completions, SSE)"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str, base_url: str = "https://api.openai.com/v1", **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+        self._model = model
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+
+    async def generate(self, prompt: str, context: str = "", **kwargs) -> str:
+        response = await self._send("POST", "/chat/completions",
+                                    json=openai_chat_payload(self._model, prompt, context, **kwargs),
+                                    timeout=kwargs.get('timeout', 120))
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+        return response.json()['choices'][0]['message']['content']
+
+    async def generate_stream(self, prompt: str, context: str = "", stats: Optional[GenerationStats] = None,
+                              **kwargs) -> AsyncIterator[str]:
+        stats = stats if stats is not None else GenerationStats()
+        stats.model = self._model
+        stats.streamed = True
+        data = openai_chat_payload(self._model, prompt, context, **kwargs)
+        data['stream'] = True
+        data['stream_options'] = {'include_usage': True}
+
+        response = await self._send("POST", "/chat/completions", stream=True, json=data,
+                                    timeout=kwargs.get('timeout', 120))
+        try:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+
+            usage = {}
+            async for line in response.aiter_lines():
+                token, event_usage, done = parse_openai_stream_line(line)
+                if done:
+                    break
+                usage = event_usage or usage
+                if token:
+                    stats.mark_token()
+                    yield token
+        finally:
+            await response.aclose()
+
+        stats.finish(output_tokens=usage.get('completion_tokens'), prompt_tokens=usage.get('prompt_tokens'))
+        logger.info(f"[Async] OpenAI stream: {stats.output_tokens} tokenów, TTFT {stats.ttft or 0:.2f}s, "
+                    f"{stats.tokens_per_second:.1f} tok/s")
+
+    async def list_models(self) -> List[Dict[str, Any]]:
+        response = await self._send("GET", "/models", timeout=10)
+        if response.status_code != 200:
+            logger.error(f"Błąd pobierania modeli OpenAI: {response.status_code}")
+            return []
+        return [m for m in response.json().get('data', []) if 'gpt' in m['id'].lower()]
+
+    async def is_available(self) -> bool:
+        try:
+            response = await self._send("GET", "/models", retry=False, timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def get_model_name(self) -> str:
+        return self._model
+
+    def set_model(self, model: str):
+        self._model = model
+        logger.info(f"Zmieniono model OpenAI na: {model}")
+
+
+class AsyncOllamaProvider(AsyncModelProvider):
+    """Asynchroniczny provider lokalnego Ollama (/api/generate, NDJSON)"""
+
+    name = "ollama"
+
+    def __init__(self, model: str = "gemma3:12b", base_url: str = "http://127.0.0.1:11434",
+                 keep_alive: Optional[Union[str, int]] = DEFAULT_KEEP_ALIVE, num_ctx: Optional[int] = None,
+                 **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.model = model
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.latency = get_latency_tracker()
+
+    def _payload(self, prompt: str, context: str, stream: bool, **kwargs) -> Dict[str, Any]:
+        return ollama_generate_payload(self.model, prompt, context, stream,
+                                       keep_alive=self.keep_alive, num_ctx=self.num_ctx, **kwargs)
+
+    async def warm_up(self, models: List[Tuple[str, Optional[int]]]):
+        for model, num_ctx in models:
+            start = asyncio.get_running_loop().time()
+            try:
+                response = await self._send("POST", "/api/generate", retry=False, timeout=600,
+                                            json=ollama_warmup_payload(model, self.keep_alive, num_ctx))
+                if response.status_code != 200:
+                    logger.warning(f"Rozgrzewanie modelu {model} nieudane: HTTP {response.status_code}")
+                    release_warm_up(self.base_url, model, num_ctx)
+                    continue
+                seconds = asyncio.get_running_loop().time() - start
+                self.latency.record_warmup(model, seconds)
+                logger.info(f"[Async] Model {model} rozgrzany w {seconds:.1f}s")
+            except Exception as e:
+                logger.warning(f"Rozgrzewanie modelu {model} nieudane: {e}")
+                release_warm_up(self.base_url, model, num_ctx)
+
+    async def generate(self, prompt: str, context: str = "", **kwargs) -> str:
+        response = await self._send("POST", "/api/generate",
+                                    json=self._payload(prompt, context, False, **kwargs),
+                                    timeout=kwargs.get('timeout', 300))
+        if response.status_code != 200:
+            raise Exception(f"Ollama API error: {response.status_code}")
+        return response.json().get('response', '').strip()
+
+    async def generate_stream(self, prompt: str, context: str = "", stats: Optional[GenerationStats] = None,
+                              **kwargs) -> AsyncIterator[str]:
+        stats = stats if stats is not None else GenerationStats()
+        stats.model = self.model
+        stats.streamed = True
+
+        response = await self._send("POST", "/api/generate", stream=True,
+                                    json=self._payload(prompt, context, True, **kwargs),
+                                    timeout=kwargs.get('timeout', 300))
+        try:
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.status_code}")
+
+            async for line in response.aiter_lines():
+                token, final, done = parse_ollama_stream_line(line)
+                if token:
+                    stats.mark_token()
+                    yield token
+                if done:
+                    stats.load_seconds = final.get('load_duration', 0) / 1e9
+                    stats.finish(output_tokens=final.get('eval_count'),
+                                 prompt_tokens=final.get('prompt_eval_count'))
+                    break
+        finally:
+            # Zamknięcie połączenia w trakcie strumienia przerywa generowanie w Ollama
+            await response.aclose()
+
+        stats.finish()
+        self.latency.record(stats)
+        logger.info(f"[Async] Ollama stream: {stats.output_tokens} tokenów, TTFT {stats.ttft or 0:.2f}s "
+                    f"(ładowanie modelu {stats.load_seconds:.1f}s), {stats.tokens_per_second:.1f} tok/s")
+
+    async def list_models(self) -> List[Dict[str, Any]]:
+        response = await self._send("GET", "/api/tags", timeout=5)
+        if response.status_code != 200:
+            logger.error(f"Błąd pobierania modeli Ollama: {response.status_code}")
+            return []
+        return response.json().get('models', [])
+
+    async def is_available(self) -> bool:
+        try:
+            response = await self._send("GET", "/api/tags", retry=False, timeout=2)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def get_model_name(self) -> str:
+        return self.model
+
+    def set_model(self, model: str):
+        self.model = model
+        logger.info(f"Zmieniono model Ollama na: {model}")
+
+
+class SyncModelProvider(ModelProvider):
+    """
+    Synchroniczny adapter providera asynchronicznego.
+
+    Żądania wykonywane są we wspólnej pętli asyncio, a wywołujący wątek
+    tylko odbiera wynik lub kolejne tokeny. Parametr user_id (kwargs)
+    wskazuje kolejkę użytkownika w limicie równoległości. Przerwanie
+    odbioru strumienia (zamknięcie generatora) anuluje generowanie.
+    """
+
+    def __init__(self, provider: AsyncModelProvider, limiter: Optional[FairLimiter] = None,
+                 runtime: Optional[AsyncRuntime] = None):
+        self.provider = provider
+        self.limiter = limiter or get_fair_limiter()
+        self.runtime = runtime or get_async_runtime()
+
+    @classmethod
+    def from_config(cls, provider: AsyncModelProvider, config: Dict[str, Any]) -> 'SyncModelProvider':
+        """Tworzy adapter ze wspólnym limitem procesu (sekcja "model_http" konfiguracji)"""
+        return cls(provider, get_fair_limiter(config))
+
+    def generate(self, prompt: str, context: str = "", **kwargs) -> str:
+        user_id = kwargs.pop('user_id', None)
+
+        async def run():
+            async with self.limiter.slot(user_id):
+                return await self.provider.generate(prompt, context, **kwargs)
+
+        return self.runtime.run(run())
+
+    def generate_stream(self, prompt: str, context: str = "", stats: Optional[GenerationStats] = None,
+                        **kwargs) -> Iterator[str]:
+        user_id = kwargs.pop('user_id', None)
+        tokens: queue.Queue = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async with self.limiter.slot(user_id):
+                    async for token in self.provider.generate_stream(prompt, context, stats=stats, **kwargs):
+                        tokens.put(token)
+            except BaseException as e:
+                tokens.put(e)
+                raise
+            tokens.put(finished)
+
+        future = self.runtime.submit(pump())
+        try:
+            while True:
+                item = tokens.get()
+                if item is finished:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                logger.info(f"[Async] Klient przerwał odbiór odpowiedzi ({user_id or ANONYMOUS_USER}) - "
+                            f"anuluję generowanie")
+                future.cancel()
+
+    def list_models(self) -> List[Dict[str, Any]]:
+        try:
+            return self.runtime.run(self.provider.list_models())
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania listy modeli: {e}")
+            return []
+
+    def is_available(self) -> bool:
+        return self.runtime.run(self.provider.is_available())
+
+    def get_model_name(self) -> str:
+        return self.provider.get_model_name()
+
+    def set_model(self, model: str):
+        self.provider.set_model(model)
+
+    def connection_stats(self) -> Dict[str, Any]:
+        stats = self.provider.connection_stats()
+        stats.update(self.limiter.stats())
+        return stats
+
+    def warm_up(self, extra_models: Optional[List[Tuple[str, Optional[int]]]] = None):
+        """Ładuje modele w pętli asyncio (bez czekania na wynik, każdy model raz na proces)"""
+        models = [(self.provider.get_model_name(), getattr(self.provider, 'num_ctx', None))]
+        models += [(name, num_ctx) for name, num_ctx in extra_models or [] if name != models[0][0]]
+        models = claim_warm_up(self.provider.base_url, models)
+        if models:
+            self.runtime.submit(self.provider.warm_up(models))
+
+    def latency_stats(self) -> Dict[str, Any]:
+        return self.provider.latency.as_dict() if self.provider.latency is not None else {}
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Audio Transcription - transkrypcja długich nagrań w oknach mowy.
+
+Obsługuje:
+- Detekcję aktywności głosowej (VAD) na energii ramek - cisza jest pomijana
+- Łączenie obszarów mowy w okna o ograniczonej długości z zakładką
+- Równoległą transkrypcję okien współdzielonym modelem Whisper
+- Zszywanie wyników w miejscu zakładki z bezwzględnymi znacznikami czasu
+- Oddawanie kolejnych okien zaraz po transkrypcji (publikacja w trakcie, wznawianie)
+"""
+
+import logging
+import subprocess
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000             # Whisper pracuje na 16 kHz mono
+
+# VAD (energia ramek)
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = 12.0         # Próg ponad poziom szumu tła
+VAD_MIN_LEVEL_DB = -55.0        # Bezwzględny próg dolny (cyfrowa cisza)
+VAD_MIN_SPEECH = 0.3            # Krótsze obszary mowy to zwykle trzaski (s)
+VAD_MIN_SILENCE = 0.6           # Krótsze przerwy nie dzielą mowy (s)
+VAD_PADDING = 0.2               # Margines dookoła obszaru mowy (s)
+
+# Okna transkrypcji
+DEFAULT_WINDOW_SECONDS = 120.0
+DEFAULT_OVERLAP_SECONDS = 2.0
+DEFAULT_MIN_PARALLEL_SECONDS = 180.0   # Krótsze nagrania - jedno wywołanie Whisper
+
+# Dekodowanie (ffmpeg → potok stdout, bez plików tymczasowych)
+DECODE_TIMEOUT = 600            # Maksymalny czas dekodowania (s)
+
+Region = Tuple[float, float]
+
+
+class AudioDecodeError(RuntimeError):
+    """ffmpeg nie zdekodował ścieżki dźwiękowej (brak ffmpeg, brak audio, uszkodzony plik)"""
+
+
+def load_audio(file_path: Union[str, Path], sr: int = SAMPLE_RATE, timeout: float = DECODE_TIMEOUT) -> np.ndarray:
+    """
+    Dekoduje plik audio/wideo do 16 kHz mono float32 jednym przebiegiem ffmpeg.
+
+    PCM s16le czytany jest z potoku stdout prosto do bufora numpy -
+    bez pliku WAV na dysku. Zwrócona tablica jest współdzielona przez
+    transkrypcję i rozpoznawanie mówców (dekodowanie raz na plik).
+
+    Args:
+        file_path: Ścieżka do pliku audio lub wideo
+        sr: Docelowa częstotliwość próbkowania
+        timeout: Maksymalny czas dekodowania (s)
+
+    Returns:
+        Próbki mono float32 w zakresie [-1, 1]
+
+    Raises:
+        AudioDecodeError: ffmpeg niedostępny, plik bez ścieżki audio lub błąd dekodowania
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-hide_banner', '-nostats', '-loglevel', 'error',
+        '-threads', '0',
+        '-i', str(file_path),
+        '-vn', '-sn', '-dn',            # Tylko ścieżka dźwiękowa
+        '-f', 's16le', '-acodec', 'pcm_s16le',
+        '-ac', '1', '-ar', str(sr),
+        '-'
+    ]
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg nie jest zainstalowany") from e
+
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        process.kill()
+        process.communicate()
+        raise AudioDecodeError(f"Przekroczono czas dekodowania ({timeout:.0f}s)") from e
+
+    if process.returncode != 0 or not stdout:
+        message = stderr.decode('utf-8', errors='ignore').strip().splitlines()
+        raise AudioDecodeError(message[-1] if message else f"ffmpeg zakończył się kodem {process.returncode}")
+
+    # Widok na bajty z potoku (bez kopii) i jedna konwersja do float32
+    samples = np.frombuffer(stdout, dtype=np.int16, count=len(stdout) // 2)
+    audio = samples.astype(np.float32)
+    audio *= 1.0 / 32768.0
+    logger.debug(f"Zdekodowano {len(audio) / sr:.1f}s audio ({len(stdout) / 1e6:.1f} MB PCM)")
+    return audio
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sr: int = SAMPLE_RATE,
+    threshold_db: float = VAD_THRESHOLD_DB,
+    min_speech: float = VAD_MIN_SPEECH,
+    min_silence: float = VAD_MIN_SILENCE,
+    padding: float = VAD_PADDING
+) -> List[Region]:
+    """
+    Wyznacza obszary mowy na podstawie energii ramek.
+
+    Poziom szumu tła to 10. percentyl energii ramek - próg mowy leży
+    threshold_db powyżej niego (nie niżej niż VAD_MIN_LEVEL_DB).
+
+    Args:
+        audio: Próbki mono float32
+        sr: Częstotliwość próbkowania
+        threshold_db: Margines progu ponad szum tła (dB)
+        min_speech: Minimalna długość obszaru mowy (s)
+        min_silence: Minimalna przerwa rozdzielająca obszary (s)
+        padding: Margines dodawany z obu stron obszaru (s)
+
+    Returns:
+        Lista (początek, koniec) w sekundach
+    """
+    frame = int(sr * VAD_FRAME_MS / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy_db = 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-12)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + threshold_db, VAD_MIN_LEVEL_DB)
+    voiced = energy_db > threshold
+
+    # Granice ciągów ramek z mową
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    frame_seconds = frame / sr
+    duration = len(audio) / sr
+    regions: List[Region] = []
+    for start, end in zip(starts * frame_seconds, ends * frame_seconds):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+
+    return [
+        (max(0.0, start - padding), min(duration, end + padding))
+        for start, end in regions if end - start >= min_speech
+    ]
+
+
+def plan_windows(regions: List[Region], window_seconds: float, overlap_seconds: float) -> List[Region]:
+    """
+    Łączy obszary mowy w okna transkrypcji.
+
+    Sąsiednie obszary trafiają do jednego okna, dopóki mieści się ono
+    w window_seconds. Dłuższe obszary dzielone są na okna z zakładką.
+
+    Args:
+        regions: Obszary mowy (posortowane)
+        window_seconds: Maksymalna długość okna
+        overlap_seconds: Zakładka przy dzieleniu długiego obszaru
+
+    Returns:
+        Lista okien (początek, koniec) w sekundach
+    """
+    windows: List[Region] = []
+    step = max(1.0, window_seconds - overlap_seconds)
+
+    for start, end in regions:
+        if windows and end - windows[-1][0] <= window_seconds:
+            windows[-1] = (windows[-1][0], end)
+            continue
+
+        position = start
+        while end - position > window_seconds:
+            windows.append((position, position + window_seconds))
+            position += step
+        windows.append((position, end))
+
+    return windows
+
+
+def stitch_window(windows: List[Region], idx: int, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Przenosi segmenty jednego okna na wspólną oś czasu.
+
+    Granica między oknami leży w środku ich zakładki (lub przerwy) - segment
+    należy do okna, w którym leży jego środek, więc zdania z zakładki nie
+    są duplikowane. Wynik zależy tylko od planu okien, więc okno można
+    zszyć zaraz po jego transkrypcji.
+
+    Args:
+        windows: Plan okien (początek, koniec)
+        idx: Indeks okna w planie
+        segments: Segmenty okna z czasami względem jego początku
+
+    Returns:
+        Segmenty okna z bezwzględnymi znacznikami czasu
+    """
+    window_start, window_end = windows[idx]
+    lower = -np.inf
+    upper = np.inf
+    if idx > 0:
+        lower = (windows[idx - 1][1] + window_start) / 2
+    if idx + 1 < len(windows):
+        upper = (window_end + windows[idx + 1][0]) / 2
+
+    stitched = []
+    for seg in segments:
+        start = window_start + seg.get('start', 0.0)
+        end = min(window_start + seg.get('end', 0.0), window_end)
+        middle = (start + end) / 2
+        if lower <= middle < upper and seg.get('text', '').strip():
+            stitched.append({'start': start, 'end': end, 'text': seg.get('text', '')})
+    return stitched
+
+
+def stitch_segments(window_results: List[Tuple[Region, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Skleja segmenty z kolejnych okien w jedną oś czasu (patrz stitch_window).
+
+    Args:
+        window_results: Lista ((początek, koniec) okna, segmenty z czasami względem okna)
+
+    Returns:
+        Segmenty z bezwzględnymi znacznikami czasu
+    """
+    windows = [window for window, _ in window_results]
+    stitched = []
+    for idx, (_, segments) in enumerate(window_results):
+        stitched.extend(stitch_window(windows, idx, segments))
+    return stitched
+
+
+class ChunkedTranscriber:
+    """
+    Transkrypcja długich nagrań: VAD → okna mowy → Whisper (repliki modelu) → zszycie.
+
+    Krótkie nagrania transkrybowane są jednym wywołaniem (bez VAD), więc
+    wynik dla nich jest identyczny z dotychczasowym.
+    """
+
+    def __init__(
+        self,
+        whisper_manager,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+        min_parallel_seconds: float = DEFAULT_MIN_PARALLEL_SECONDS,
+        vad_threshold_db: float = VAD_THRESHOLD_DB
+    ):
+        """
+        Inicjalizuje transkrypcję okienkową.
+
+        Args:
+            whisper_manager: WhisperModelManager (współdzielony model)
+            window_seconds: Maksymalna długość okna transkrypcji
+            overlap_seconds: Zakładka między oknami długiego obszaru mowy
+            min_parallel_seconds: Od tej długości nagranie dzielone jest na okna
+            vad_threshold_db: Próg VAD ponad szum tła
+        """
+        self.whisper = whisper_manager
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.min_parallel_seconds = min_parallel_seconds
+        self.vad_threshold_db = vad_threshold_db
+
+    @classmethod
+    def from_config(cls, whisper_manager, config: Dict[str, Any]) -> 'ChunkedTranscriber':
+        """Tworzy transkrypcję na podstawie sekcji "whisper" konfiguracji"""
+        return cls(
+            whisper_manager,
+            window_seconds=config.get('window_seconds', DEFAULT_WINDOW_SECONDS),
+            overlap_seconds=config.get('overlap_seconds', DEFAULT_OVERLAP_SECONDS),
+            min_parallel_seconds=config.get('min_parallel_seconds', DEFAULT_MIN_PARALLEL_SECONDS),
+            vad_threshold_db=config.get('vad_threshold_db', VAD_THRESHOLD_DB)
+        )
+
+    def params(self) -> Dict[str, Any]:
+        """Parametry podziału wpływające na wynik (część wersji cache transkrypcji)"""
+        return {
+            'window_seconds': self.window_seconds,
+            'overlap_seconds': self.overlap_seconds,
+            'min_parallel_seconds': self.min_parallel_seconds,
+            'vad_threshold_db': self.vad_threshold_db
+        }
+
+    def plan(self, audio: np.ndarray) -> List[Region]:
+        """
+        Wyznacza okna transkrypcji nagrania.
+
+        Krótkie nagranie to jedno okno obejmujące całość (bez VAD).
+
+        Args:
+            audio: Próbki 16 kHz mono float32
+
+        Returns:
+            Lista okien (początek, koniec) w sekundach
+        """
+        duration = len(audio) / SAMPLE_RATE
+        if duration < self.min_parallel_seconds:
+            return [(0.0, duration)]
+
+        regions = detect_speech(audio, threshold_db=self.vad_threshold_db)
+        speech_seconds = sum(end - start for start, end in regions)
+        windows = plan_windows(regions, self.window_seconds, self.overlap_seconds)
+        logger.info(f"[VAD] Mowa: {speech_seconds:.0f}s z {duration:.0f}s nagrania, "
+                    f"{len(windows)} okien transkrypcji")
+        return windows
+
+    def iter_windows(
+        self,
+        audio: np.ndarray,
+        windows: List[Region],
+        cached: Optional[Callable[[int], Optional[Dict[str, Any]]]] = None,
+        model_name: Optional[str] = None,
+        **options
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Transkrybuje okna w puli wątków i oddaje wyniki w kolejności okien.
+
+        Każde okno dekoduje osobna replika modelu z menedżera - równolegle
+        idzie najwyżej max_concurrent okien (domyślnie 1, czyli szeregowo).
+
+        Okno jest oddawane, gdy tylko ono i wszystkie wcześniejsze są gotowe -
+        wywołujący może publikować transkrypcję w trakcie przetwarzania.
+
+        Args:
+            audio: Próbki 16 kHz mono float32
+            windows: Plan okien (patrz plan)
+            cached: Zwraca zapisany wynik okna o danym indeksie (None = transkrybuj)
+            model_name: Rozmiar modelu Whisper (None = model menedżera)
+            **options: Opcje whisper.transcribe
+
+        Yields:
+            (indeks okna, {'language', 'segments'} z czasami względem początku okna)
+        """
+        def transcribe_window(window: Region) -> Dict[str, Any]:
+            start, end = window
+            samples = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+            result = self.whisper.transcribe(samples, model_name=model_name, **options)
+            return {
+                'language': result.get('language'),
+                'segments': [
+                    {'start': seg.get('start', 0.0), 'end': seg.get('end', 0.0), 'text': seg.get('text', '')}
+                    for seg in result.get('segments', [])
+                ]
+            }
+
+        with ThreadPoolExecutor(max_workers=self.whisper.max_concurrent, thread_name_prefix="whisper") as executor:
+            pending = {}
+            for idx, window in enumerate(windows):
+                result = cached(idx) if cached else None
+                pending[idx] = result if result is not None else executor.submit(transcribe_window, window)
+
+            try:
+                for idx in range(len(windows)):
+                    result = pending.pop(idx)
+                    yield idx, (result.result() if isinstance(result, Future) else result)
+            finally:
+                # Przerwana iteracja (błąd publikacji) - nie czekamy na kolejne okna
+                for result in pending.values():
+                    if isinstance(result, Future):
+                        result.cancel()
+
+    def transcribe(self, audio: np.ndarray, model_name: Optional[str] = None, **options) -> Dict[str, Any]:
+        """
+        Transkrybuje nagranie.
+
+        Args:
+            audio: Próbki 16 kHz mono float32
+            model_name: Rozmiar modelu Whisper (None = model menedżera)
+            **options: Opcje whisper.transcribe
+
+        Returns:
+            {'text', 'language', 'segments': [{'start', 'end', 'text'}]}
+        """
+        duration = len(audio) / SAMPLE_RATE
+        if duration < self.min_parallel_seconds:
+            return self.whisper.transcribe(audio, model_name=model_name, **options)
+
+        windows = self.plan(audio)
+        results = [result for _, result in self.iter_windows(audio, windows, model_name=model_name, **options)]
+        return merge_window_results(windows, results, options.get('language'))
+
+
+def merge_window_results(windows: List[Region], results: List[Dict[str, Any]],
+                         language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Składa wyniki okien w wynik w formacie whisper.transcribe.
+
+    Args:
+        windows: Plan okien
+        results: Wyniki okien ({'language', 'segments'}) w kolejności planu
+        language: Język wymuszony w opcjach (gdy brak wyników)
+
+    Returns:
+        {'text', 'language', 'segments': [{'start', 'end', 'text'}]}
+    """
+    segments = stitch_segments([(window, result.get('segments', [])) for window, result in zip(windows, results)])
+    languages = Counter(result.get('language') for result in results if result.get('language'))
+
+    return {
+        'text': " ".join(seg['text'].strip() for seg in segments),
+        'language': languages.most_common(1)[0][0] if languages else (language or 'unknown'),
+        'segments': segments
+    }
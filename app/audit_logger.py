@@ -70,7 +70,8 @@ class AuditLogger:
         model: str,
         time_ms: float,
         ip_address: str = None,
-        hash_query: bool = False
+        hash_query: bool = False,
+        generation: Dict[str, Any] = None
     ):
         """
         Loguje zapytanie użytkownika i odpowiedź systemu.
@@ -85,6 +86,7 @@ class AuditLogger:
             time_ms: Czas generowania odpowiedzi (ms)
             ip_address: IP użytkownika (opcjonalnie)
             hash_query: Czy hashować query dla privacy
+            generation: Metryki generowania (TTFT, tokeny/s - GenerationStats.as_dict)
         """
         log_entry = {
             'timestamp': datetime.now().isoformat(),
@@ -110,6 +112,8 @@ class AuditLogger:
             'time_ms': time_ms,
             'ip_address': ip_address,
         }
+        if generation:
+            log_entry['generation'] = generation
         
         self._write_log(log_entry)
     
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Context Builder - składanie kontekstu promptu RAG w budżecie tokenów.
+
+Obsługuje:
+- Liczenie tokenów współdzielonym tokenizerem (text_chunker) ze współczynnikiem
+  kalibracji do tokenizera modelu docelowego, korygowanym liczbą tokenów
+  promptu zwracaną przez serwer (Ollama prompt_eval_count, OpenAI usage) -
+  współczynnik jest wspólny dla procesu i pomija prompty z cache prefiksu
+- Usuwanie duplikatów i fragmentów nakładających się w obrębie pliku
+  (ta sama treść, fragment zawarty w innym, zakładka chunkera na granicy)
+- Pakowanie fragmentów w kolejności rankingu w konfigurowalny budżet -
+  ostatni fragment jest przycinany, jeśli zostało na niego dość miejsca
+- Raport dla logów: tokeny kontekstu, fragmenty pominięte i przycięte
+- Okno kontekstu modelu lokalnego (num_ctx Ollama) wyliczane z budżetu
+"""
+
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from text_chunker import TokenCounter, get_token_counter
+
+logger = logging.getLogger(__name__)
+
+# Sekcja "context" konfiguracji
+DEFAULT_CONTEXT_TOKENS = 3000       # Budżet fragmentów (bez instrukcji systemowych i pytania)
+DEFAULT_MIN_FRAGMENT_TOKENS = 64    # Mniejsza resztka budżetu nie jest wypełniana przyciętym fragmentem
+DEFAULT_OVERLAP_THRESHOLD = 0.8     # Udział wspólnych n-gramów słów, od którego fragment jest duplikatem
+DEFAULT_MIN_OVERLAP_WORDS = 8       # Minimalna zakładka na granicy fragmentów (słowa) do wycięcia
+DEFAULT_TOKEN_RATIO = 1.0           # Tokeny modelu docelowego / tokeny tokenizera e5
+DEFAULT_RESPONSE_TOKENS = 2048      # Rezerwa okna kontekstu na odpowiedź modelu
+
+PROMPT_OVERHEAD_TOKENS = 512        # Instrukcje systemowe, pytanie i szablon czatu
+CONTEXT_WINDOW_STEP = 1024
+
+SHINGLE_SIZE = 5
+MAX_OVERLAP_WORDS = 200             # Zakładka chunkera to 32 tokeny - dłuższej nie szukamy
+CALIBRATION_WEIGHT = 0.3            # Waga nowej obserwacji w średniej kroczącej współczynnika
+TOKEN_RATIO_RANGE = (0.5, 3.0)
+# Ollama nie liczy w prompt_eval_count prefiksu z cache KV - obserwacja dużo poniżej
+# szacunku to prompt częściowo z cache, nie inny tokenizer
+MIN_UNCACHED_RATIO = 0.7
+
+_WORD = re.compile(r'\S+')
+
+
+@dataclass
+class ContextFragment:
+    """Fragment kandydujący do kontekstu (w kolejności rankingu)"""
+    header: str
+    content: str
+    source_file: str = ""
+    page_number: int = 0
+    id: str = ""
+
+
+@dataclass
+class PackedContext:
+    """Wynik pakowania kontekstu"""
+    fragments: List[ContextFragment] = field(default_factory=list)
+    text: str = ""
+    tokens: int = 0
+    budget: int = 0
+    candidates: int = 0
+    duplicates: int = 0
+    trimmed_overlaps: int = 0
+    over_budget: int = 0
+    truncated: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Raport do logów (audit log)"""
+        return {
+            'context_tokens': self.tokens,
+            'budget': self.budget,
+            'fragments': len(self.fragments),
+            'candidates': self.candidates,
+            'duplicates': self.duplicates,
+            'trimmed_overlaps': self.trimmed_overlaps,
+            'over_budget': self.over_budget,
+            'truncated': self.truncated,
+        }
+
+
+class TokenRatio:
+    """
+    Współczynnik tokenów modelu docelowego / tokenów tokenizera e5.
+
+    Średnia krocząca obserwacji z serwera, jedna na proces (get_token_ratio) -
+    kalibracja przetrwa przebudowę RAGSystem przez Streamlit.
+    """
+
+    def __init__(self, value: float = DEFAULT_TOKEN_RATIO):
+        self.value = value
+        self.observations = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def observe(self, raw_tokens: int, actual_tokens: int) -> bool:
+        """
+        Uwzględnia liczbę tokenów promptu zgłoszoną przez serwer.
+
+        Args:
+            raw_tokens: Tokeny promptu policzone tokenizerem e5
+            actual_tokens: Tokeny promptu zgłoszone przez serwer modelu
+
+        Returns:
+            False, jeśli obserwacja została pominięta (prompt z cache prefiksu)
+        """
+        if raw_tokens <= 0 or actual_tokens <= 0:
+            return False
+        observed = actual_tokens / raw_tokens
+        with self._lock:
+            if observed < MIN_UNCACHED_RATIO:
+                self.skipped += 1
+                return False
+            observed = min(observed, TOKEN_RATIO_RANGE[1])
+            self.value += CALIBRATION_WEIGHT * (observed - self.value)
+            self.value = min(max(self.value, TOKEN_RATIO_RANGE[0]), TOKEN_RATIO_RANGE[1])
+            self.observations += 1
+        return True
+
+
+_token_ratio: Optional[TokenRatio] = None
+_token_ratio_lock = threading.Lock()
+
+
+def get_token_ratio(initial: float = DEFAULT_TOKEN_RATIO) -> TokenRatio:
+    """Zwraca współczynnik tokenów procesu (initial stosowany tylko przy tworzeniu)"""
+    global _token_ratio
+    with _token_ratio_lock:
+        if _token_ratio is None:
+            _token_ratio = TokenRatio(initial)
+        return _token_ratio
+
+
+def context_window(config: Dict[str, Any]) -> int:
+    """
+    Zwraca okno kontekstu (num_ctx) dla modeli Ollama.
+
+    Jawne "ollama.num_ctx" ma pierwszeństwo, w przeciwnym razie okno to
+    budżet kontekstu z sekcji "context" + instrukcje i pytanie + rezerwa
+    na odpowiedź, zaokrąglone w górę do CONTEXT_WINDOW_STEP. Wartość jest
+    stała przez cały czas działania - zmiana num_ctx przeładowuje model.
+
+    Args:
+        config: Konfiguracja aplikacji
+
+    Returns:
+        Liczba tokenów okna kontekstu
+    """
+    explicit = (config.get('ollama') or {}).get('num_ctx')
+    if explicit:
+        return int(explicit)
+    context_config = config.get('context') or {}
+    budget = context_config.get('max_tokens', DEFAULT_CONTEXT_TOKENS) * max(
+        1.0, context_config.get('token_ratio', DEFAULT_TOKEN_RATIO))
+    total = budget + PROMPT_OVERHEAD_TOKENS + context_config.get('response_tokens', DEFAULT_RESPONSE_TOKENS)
+    return int(math.ceil(total / CONTEXT_WINDOW_STEP) * CONTEXT_WINDOW_STEP)
+
+
+def _normalized_words(text: str) -> List[str]:
+    return [word.lower() for word in _WORD.findall(text)]
+
+
+def _shingles(words: List[str]) -> set:
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _boundary_overlap(left: List[str], right: List[str], min_words: int) -> int:
+    """Zwraca długość najdłuższego końca left równego początkowi right (0 = brak, nigdy całość)"""
+    longest = min(len(left) - 1, len(right) - 1, MAX_OVERLAP_WORDS)
+    for size in range(longest, min_words - 1, -1):
+        if left[-size:] == right[:size]:
+            return size
+    return 0
+
+
+class ContextBuilder:
+    """
+    Składa kontekst promptu z fragmentów wyszukiwania.
+
+    Fragmenty przetwarzane są w kolejności rankingu: duplikaty są pomijane,
+    zakładka z wcześniej wybranym fragmentem tego samego pliku wycinana,
+    a reszta dokładana, dopóki mieści się w budżecie tokenów.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+        min_fragment_tokens: int = DEFAULT_MIN_FRAGMENT_TOKENS,
+        overlap_threshold: float = DEFAULT_OVERLAP_THRESHOLD,
+        min_overlap_words: int = DEFAULT_MIN_OVERLAP_WORDS,
+        token_ratio: Optional[TokenRatio] = None,
+        calibrate: bool = True,
+        counter: Optional[TokenCounter] = None
+    ):
+        """
+        Inicjalizuje builder.
+
+        Args:
+            max_tokens: Budżet tokenów fragmentów (z nagłówkami źródeł)
+            min_fragment_tokens: Minimalna długość przyciętego fragmentu
+            overlap_threshold: Udział wspólnych n-gramów słów uznawany za duplikat
+            min_overlap_words: Minimalna zakładka na granicy fragmentów do wycięcia
+            token_ratio: Współczynnik tokenów modelu docelowego (domyślnie wspólny dla procesu)
+            calibrate: Czy korygować współczynnik liczbą tokenów zwróconą przez serwer
+            counter: Licznik tokenów (domyślnie współdzielony tokenizer e5)
+        """
+        self.max_tokens = max(256, max_tokens)
+        self.min_fragment_tokens = max(16, min_fragment_tokens)
+        self.overlap_threshold = overlap_threshold
+        self.min_overlap_words = max(3, min_overlap_words)
+        self.ratio = token_ratio or get_token_ratio()
+        self.calibrate_enabled = calibrate
+        self._counter = counter
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ContextBuilder':
+        """Tworzy builder na podstawie sekcji "context" konfiguracji"""
+        return cls(
+            max_tokens=config.get('max_tokens', DEFAULT_CONTEXT_TOKENS),
+            min_fragment_tokens=config.get('min_fragment_tokens', DEFAULT_MIN_FRAGMENT_TOKENS),
+            overlap_threshold=config.get('overlap_threshold', DEFAULT_OVERLAP_THRESHOLD),
+            min_overlap_words=config.get('min_overlap_words', DEFAULT_MIN_OVERLAP_WORDS),
+            token_ratio=get_token_ratio(config.get('token_ratio', DEFAULT_TOKEN_RATIO)),
+            calibrate=config.get('calibrate', True)
+        )
+
+    @property
+    def token_ratio(self) -> float:
+        return self.ratio.value
+
+    @property
+    def counter(self) -> TokenCounter:
+        if self._counter is None:
+            self._counter = get_token_counter()
+        return self._counter
+
+    def scale(self, raw_tokens: int) -> int:
+        """Przelicza tokeny tokenizera e5 na szacunek dla modelu docelowego"""
+        return int(round(raw_tokens * self.token_ratio))
+
+    def count(self, text: str, calibrated: bool = True) -> int:
+        """Zwraca liczbę tokenów tekstu (domyślnie w skali modelu docelowego)"""
+        raw = self.counter.count(text)
+        return self.scale(raw) if calibrated else raw
+
+    def calibrate(self, raw_tokens: int, actual_tokens: int):
+        """
+        Koryguje współczynnik na podstawie liczby tokenów promptu z serwera.
+
+        Args:
+            raw_tokens: Tokeny promptu policzone tokenizerem e5 (count(..., calibrated=False))
+            actual_tokens: Tokeny promptu zgłoszone przez serwer modelu
+        """
+        if not self.calibrate_enabled:
+            return
+        if self.ratio.observe(raw_tokens, actual_tokens):
+            logger.debug(f"Kalibracja tokenów: {actual_tokens}/{raw_tokens} -> współczynnik {self.token_ratio:.3f}")
+        else:
+            logger.debug(f"Kalibracja tokenów pominięta: {actual_tokens}/{raw_tokens} (prefiks z cache serwera)")
+
+    def _truncate(self, fragment: ContextFragment, available: int) -> Optional[ContextFragment]:
+        """Przycina treść fragmentu (na granicy słowa) do available tokenów z nagłówkiem"""
+        header_tokens = self.count(self._format(0, ContextFragment(fragment.header, " […]")))
+        content = fragment.content
+        for _ in range(4):
+            content_tokens = self.count(content)
+            if header_tokens + content_tokens <= available:
+                break
+            target = available - header_tokens
+            if target < self.min_fragment_tokens:
+                return None
+            cut = int(len(content) * target / max(content_tokens, 1) * 0.95)
+            content = content[:cut].rsplit(' ', 1)[0]
+        else:
+            return None
+        return ContextFragment(fragment.header, content.rstrip() + " […]", fragment.source_file,
+                               fragment.page_number, fragment.id)
+
+    def pack(self, fragments: List[ContextFragment]) -> PackedContext:
+        """
+        Pakuje fragmenty (w kolejności rankingu) w budżet tokenów.
+
+        Args:
+            fragments: Kandydaci od najlepiej dopasowanego
+
+        Returns:
+            PackedContext z wybranymi fragmentami (numerowanymi od 1 w tekście)
+        """
+        packed = PackedContext(budget=self.max_tokens, candidates=len(fragments))
+        selected_words: List[tuple] = []    # (plik, słowa, n-gramy) wybranych fragmentów
+        seen_ids = set()
+        remaining = self.max_tokens
+        parts = []
+
+        for fragment in fragments:
+            if fragment.id and fragment.id in seen_ids:
+                packed.duplicates += 1
+                continue
+
+            words = _normalized_words(fragment.content)
+            if not words:
+                continue
+            shingles = _shingles(words)
+            content = fragment.content
+            duplicate = False
+
+            for source_file, other_words, other_shingles in selected_words:
+                if source_file != fragment.source_file:
+                    continue
+                if len(shingles & other_shingles) >= self.overlap_threshold * len(shingles):
+                    duplicate = True
+                    break
+
+                # Zakładka chunkera: koniec wybranego fragmentu = początek kandydata (lub odwrotnie)
+                matches = list(_WORD.finditer(content))
+                overlap = _boundary_overlap(other_words, words, self.min_overlap_words)
+                if overlap:
+                    content = content[matches[overlap].start():]
+                    words = words[overlap:]
+                    packed.trimmed_overlaps += 1
+                    continue
+                overlap = _boundary_overlap(words, other_words, self.min_overlap_words)
+                if overlap:
+                    content = content[:matches[len(words) - overlap - 1].end()]
+                    words = words[:-overlap]
+                    packed.trimmed_overlaps += 1
+
+            if duplicate:
+                packed.duplicates += 1
+                continue
+
+            candidate = ContextFragment(fragment.header, content, fragment.source_file,
+                                        fragment.page_number, fragment.id)
+            tokens = self.count(self._format(len(packed.fragments) + 1, candidate))
+            if tokens > remaining:
+                candidate = self._truncate(candidate, remaining)
+                if candidate is None:
+                    packed.over_budget += 1
+                    continue
+                tokens = self.count(self._format(len(packed.fragments) + 1, candidate))
+                if tokens > remaining:
+                    packed.over_budget += 1
+                    continue
+                packed.truncated += 1
+
+            packed.fragments.append(candidate)
+            parts.append(self._format(len(packed.fragments), candidate))
+            selected_words.append((fragment.source_file, words, _shingles(words)))
+            if fragment.id:
+                seen_ids.add(fragment.id)
+            remaining -= tokens
+            packed.tokens += tokens
+
+        packed.text = "\n\n".join(parts)
+        if packed.duplicates or packed.over_budget or packed.trimmed_overlaps:
+            logger.info(f"Kontekst: {len(packed.fragments)}/{packed.candidates} fragmentów, "
+                        f"{packed.tokens}/{packed.budget} tokenów (duplikaty: {packed.duplicates}, "
+                        f"wycięte zakładki: {packed.trimmed_overlaps}, poza budżetem: {packed.over_budget})")
+        return packed
+
+    @staticmethod
+    def _format(number: int, fragment: ContextFragment) -> str:
+        return f"[{number}] {fragment.header}\nFragment: {fragment.content}"
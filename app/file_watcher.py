@@ -2,14 +2,19 @@
 # -*- coding: utf-8 -*-
 """
 Watchdog - automatyczne monitorowanie folderu data/ i indeksowanie nowych plików
+
+Profil indeksowania (fast / balanced / thorough) wybierany jest per podfolder
+(sekcja "ingestion.folders" konfiguracji) lub dla całego folderu (--profile).
 """
 
+import sys
 import time
 import logging
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from rag_system import DocumentProcessor, EmbeddingProcessor, VectorDatabase, RAGSystem, add_questions_for_file
+from rag_system import RAGSystem, add_questions_for_file
+from ingestion_profiles import profile_for_path
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,11 +29,11 @@ logger = logging.getLogger(__name__)
 class DocumentWatcher(FileSystemEventHandler):
     """Handler dla nowych plików w folderze data/"""
     
-    def __init__(self):
-        self.doc_processor = DocumentProcessor()
-        self.embedding_processor = EmbeddingProcessor()
-        self.vector_db = VectorDatabase()
+    def __init__(self, root: str = "data", profile: str = None):
+        # Jeden system RAG (procesor, embeddingi, baza, BM25) - bez dublowania modeli
         self.rag_system = RAGSystem()
+        self.root = Path(root)
+        self.profile = profile  # Profil indeksowania folderu (None = domyślny z konfiguracji)
         self.processing = False
         self.file_queue = []  # Kolejka plików do przetworzenia
         logger.info("✅ DocumentWatcher zainicjalizowany")
@@ -65,48 +70,39 @@ class DocumentWatcher(FileSystemEventHandler):
             logger.info(f"📥 Przetwarzam z kolejki ({len(self.file_queue)} pozostało): {file_path.name}")
             self.process_new_file(file_path)
     
+    @staticmethod
+    def _log_progress(record):
+        """Loguje postęp indeksowania długiego nagrania"""
+        if record.get('stage'):
+            logger.info(f"⏳ {record.get('stage')}: {record.get('done', 0)}/{record.get('total', 0)} "
+                        f"({record.get('chunks', 0)} fragmentów w bazie)")
+    
     def process_new_file(self, file_path: Path):
         """Przetwarza i indeksuje nowy plik"""
         self.processing = True
         
         try:
-            logger.info(f"📄 Rozpoczynanie przetwarzania: {file_path.name}")
+            profile = profile_for_path(self.rag_system.config, file_path, self.root, self.profile)
+            logger.info(f"📄 Rozpoczynanie przetwarzania: {file_path.name} (profil: {profile or 'domyślny'})")
             start_time = time.time()
             
-            # Sprawdź czy plik już został dodany do bazy
-            existing = self.vector_db.collection.get(where={"source_file": file_path.name})
-            if existing and existing.get('ids'):
+            # Indeksowanie z publikacją w trakcie (długie nagrania) i wznawianiem przerwanych plików
+            result = self.rag_system.index_file(file_path, progress_callback=self._log_progress, profile=profile)
+            
+            if result['stage'] == "skip":
                 logger.info(f"⏭️ Plik {file_path.name} już istnieje w bazie – pomijam automatyczne indeksowanie")
                 return
-            
-            # Przetwórz plik
-            chunks = self.doc_processor.process_file(file_path)
-            
-            if not chunks:
+            if result['stage'] == "empty":
                 logger.warning(f"⚠️ Brak fragmentów z pliku: {file_path.name}")
                 return
-            
-            logger.info(f"📝 Znaleziono {len(chunks)} fragmentów")
-            
-            # Utwórz embeddingi
-            logger.info("🔄 Tworzenie embeddingów...")
-            chunks_with_embeddings = self.embedding_processor.create_embeddings(chunks)
-            
-            # Dodaj do bazy
-            logger.info("💾 Dodawanie do bazy wektorowej...")
-            self.vector_db.add_documents(chunks_with_embeddings)
+            if result['stage'] == "error":
+                logger.error(f"❌ Indeksowanie {file_path.name} przerwane ({result['chunks']} fragmentów w bazie, "
+                             f"zostanie wznowione): {result['error']}")
+                return
             
             processing_time = time.time() - start_time
             logger.info(f"✅ Zakończono indeksowanie {file_path.name} w {processing_time:.2f} sekund")
-            logger.info(f"   Dodano {len(chunks)} fragmentów do bazy")
-            
-            # Przebuduj BM25 index (dla hybrydowego wyszukiwania)
-            logger.info("🔨 Przebudowywanie BM25 index...")
-            try:
-                self.rag_system.rebuild_bm25_index()
-                logger.info("✅ BM25 index przebudowany")
-            except Exception as e:
-                logger.warning(f"⚠️ Błąd podczas przebudowy BM25 index: {e}")
+            logger.info(f"   Dodano {result['chunks']} fragmentów do bazy")
             
             # Generuj pytania dla nowego pliku
             logger.info("🤔 Generowanie przykładowych pytań...")
@@ -125,12 +121,19 @@ class DocumentWatcher(FileSystemEventHandler):
                 logger.info(f"📋 Kolejka: {len(self.file_queue)} plików czeka na przetworzenie")
                 self.process_queue()
 
-def start_watcher(directory: str = "data"):
-    """Uruchamia watchdog monitorujący folder"""
+def start_watcher(directory: str = "data", profile: str = None):
+    """
+    Uruchamia watchdog monitorujący folder.
+    
+    Args:
+        directory: Monitorowany folder
+        profile: Profil indeksowania folderu (podfoldery z "ingestion.folders" mają własne)
+    """
     logger.info("="*70)
     logger.info("🔍 WATCHDOG - Automatyczne indeksowanie nowych plików")
     logger.info("="*70)
     logger.info(f"📁 Monitorowany folder: {directory}")
+    logger.info(f"⚙️ Profil indeksowania: {profile or 'domyślny z konfiguracji'}")
     logger.info(f"📊 Obsługiwane formaty: PDF, DOCX, XLSX, JPG, PNG, BMP, MP3, WAV, FLAC, OGG, MP4, AVI, MOV, MKV, WEBM")
     logger.info("="*70)
     
@@ -140,7 +143,7 @@ def start_watcher(directory: str = "data"):
         return
     
     # NOWE: Sprawdź czy są już pliki w folderze i zaindeksuj je
-    event_handler = DocumentWatcher()
+    event_handler = DocumentWatcher(directory, profile)
     
     logger.info("🔍 Sprawdzam istniejące pliki w folderze...")
     existing_files = []
@@ -189,6 +192,13 @@ def start_watcher(directory: str = "data"):
     logger.info("✅ Watchdog zatrzymany")
 
 if __name__ == "__main__":
-    start_watcher()
+    # Użycie: python file_watcher.py [folder] [--profile fast|balanced|thorough]
+    args = sys.argv[1:]
+    watch_profile = None
+    if "--profile" in args:
+        profile_idx = args.index("--profile")
+        watch_profile = args[profile_idx + 1] if profile_idx + 1 < len(args) else None
+        del args[profile_idx:profile_idx + 2]
+    start_watcher(args[0] if args else "data", watch_profile)
 
 
@@ -97,6 +97,42 @@ class BM25Index:
         # Zapisz do cache
         self._save_cache()
     
+    def upsert_documents(self, documents: List[Dict[str, Any]], save: bool = True):
+        """
+        Dodaje lub podmienia dokumenty w istniejącym indeksie.
+        
+        Dokument o istniejącym id zastępuje poprzednią treść (publikacja
+        przyrostowa długich nagrań), bez pobierania całej bazy z ChromaDB.
+        Przyrostowa jest tylko tokenizacja - BM25Okapi liczy częstości i IDF
+        od nowa dla całego korpusu, a cache zapisywany jest w całości, więc
+        koszt wywołania rośnie liniowo z rozmiarem bazy (wywołujący grupują
+        aktualizacje, patrz INDEX_BM25_REFRESH_SECONDS w rag_system).
+        
+        Args:
+            documents: Lista dokumentów z polami 'id' i 'content'
+            save: Czy zapisać index do cache
+        """
+        if not documents:
+            return
+        
+        positions = {doc_id: idx for idx, doc_id in enumerate(self.doc_ids)}
+        for doc in documents:
+            tokens = doc['content'].lower().split()
+            idx = positions.get(doc['id'])
+            if idx is None:
+                positions[doc['id']] = len(self.doc_ids)
+                self.doc_ids.append(doc['id'])
+                self.tokenized_corpus.append(tokens)
+            else:
+                self.tokenized_corpus[idx] = tokens
+        
+        # Statystyki IDF zależą od całego korpusu - pełne przeliczenie (O(rozmiar korpusu)) z gotowych tokenów
+        self.bm25_index = BM25Okapi(self.tokenized_corpus)
+        logger.info(f"BM25 index zaktualizowany: +{len(documents)} dokumentów (łącznie {len(self.doc_ids)})")
+        
+        if save:
+            self._save_cache()
+    
     def search(self, query: str, top_k: int = 20) -> List[Tuple[str, float]]:
         """
         Wyszukuje dokumenty używając BM25.
@@ -385,6 +421,28 @@ class HybridSearch:
         except Exception as e:
             logger.error(f"Błąd podczas budowania BM25 index: {e}")
     
+    def upsert_bm25(self, documents: List[Dict[str, Any]], save: bool = True):
+        """
+        Aktualizuje BM25 index o nowe/zmienione dokumenty.
+        
+        Gdy index nie był jeszcze zbudowany, budowany jest od zera z bazy
+        wektorowej (dokumenty są już w niej zapisane).
+        
+        Args:
+            documents: Lista dokumentów z polami 'id' i 'content'
+            save: Czy zapisać index do cache
+        """
+        if not self.use_bm25 or self.bm25_index is None:
+            return
+        
+        try:
+            if self.bm25_index.bm25_index is None:
+                self.build_bm25_index()
+            else:
+                self.bm25_index.upsert_documents(documents, save=save)
+        except Exception as e:
+            logger.error(f"Błąd podczas aktualizacji BM25 index: {e}")
+    
     def search_bm25_only(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
         """
         Wyszukiwanie tylko przez BM25 (tekstowe).
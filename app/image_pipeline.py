@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Pipeline - przygotowanie obrazów do modelu wizyjnego w pamięci.
+
+Obsługuje:
+- Ścieżkę bytes → znormalizowany obraz → payload base64 (bez plików tymczasowych)
+- Deduplikację po hashu treści (w obrębie dokumentu i między dokumentami)
+- Pomijanie obrazów zbyt małych lub prawie jednolitych (niska entropia)
+  przed jakimkolwiek wywołaniem modelu wizyjnego
+- Zmniejszanie do efektywnej rozdzielczości modelu i kodowanie JPEG
+  z limitem rozmiaru payloadu
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Domyślne progi (nadpisywane sekcją "images" w auth_config.json)
+MIN_IMAGE_BYTES = 256        # Mniejsze dane to zwykle ikony / artefakty PDF
+MIN_IMAGE_SIDE = 32          # Minimalny krótszy bok obrazu (px)
+MIN_IMAGE_ENTROPY = 0.5      # Entropia skali szarości (bity) - jednolite tła/separatory
+MAX_CACHED_DESCRIPTIONS = 10000
+
+# Kodowanie dla modelu wizyjnego (Gemma 3 widzi obraz jako 896x896 - większe są zmniejszane w modelu)
+MAX_IMAGE_SIDE = 896         # Dłuższy bok po przeskalowaniu (px)
+JPEG_QUALITY = 85
+MIN_JPEG_QUALITY = 50
+MAX_PAYLOAD_BYTES = 512 * 1024
+
+
+@dataclass
+class PreparedImage:
+    """Obraz gotowy do wysłania do modelu wizyjnego"""
+    content_hash: str   # SHA-256 oryginalnych danych
+    encoded: str        # Payload base64
+    width: int
+    height: int
+
+
+class ImagePipeline:
+    """
+    Przygotowuje obrazy do opisu i pamięta opisy już przetworzonych obrazów.
+
+    Identyczne obrazy (np. logo powtarzane na każdej stronie PDF) są
+    opisywane tylko raz - kolejne wystąpienia dostają opis z pamięci.
+    """
+
+    def __init__(
+        self,
+        min_bytes: int = MIN_IMAGE_BYTES,
+        min_side: int = MIN_IMAGE_SIDE,
+        min_entropy: float = MIN_IMAGE_ENTROPY,
+        max_cached: int = MAX_CACHED_DESCRIPTIONS,
+        max_side: int = MAX_IMAGE_SIDE,
+        jpeg_quality: int = JPEG_QUALITY,
+        max_payload_bytes: int = MAX_PAYLOAD_BYTES
+    ):
+        """
+        Inicjalizuje pipeline obrazów.
+
+        Args:
+            min_bytes: Minimalny rozmiar danych obrazu
+            min_side: Minimalny krótszy bok obrazu w pikselach
+            min_entropy: Minimalna entropia obrazu w skali szarości
+            max_cached: Maksymalna liczba opisów trzymanych w pamięci
+            max_side: Dłuższy bok obrazu wysyłanego do modelu (px)
+            jpeg_quality: Jakość JPEG payloadu
+            max_payload_bytes: Maksymalny rozmiar zakodowanego obrazu (przed base64)
+        """
+        self.min_bytes = min_bytes
+        self.min_side = min_side
+        self.min_entropy = min_entropy
+        self.max_cached = max_cached
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.max_payload_bytes = max_payload_bytes
+
+        self._descriptions: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'prepared': 0, 'skipped': 0, 'duplicates': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+        logger.info(f"ImagePipeline: min_side={min_side}px, min_entropy={min_entropy}, min_bytes={min_bytes}, "
+                    f"max_side={max_side}px, max_payload={max_payload_bytes // 1024} KB")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ImagePipeline':
+        """Tworzy pipeline na podstawie sekcji "images" konfiguracji"""
+        return cls(
+            min_bytes=config.get('min_bytes', MIN_IMAGE_BYTES),
+            min_side=config.get('min_side', MIN_IMAGE_SIDE),
+            min_entropy=config.get('min_entropy', MIN_IMAGE_ENTROPY),
+            max_cached=config.get('max_cached_descriptions', MAX_CACHED_DESCRIPTIONS),
+            max_side=config.get('max_side', MAX_IMAGE_SIDE),
+            jpeg_quality=config.get('jpeg_quality', JPEG_QUALITY),
+            max_payload_bytes=config.get('max_payload_kb', MAX_PAYLOAD_BYTES // 1024) * 1024
+        )
+
+    def encoding_params(self) -> Dict[str, Any]:
+        """Parametry wpływające na obraz widziany przez model (część wersji cache opisów)"""
+        return {'max_side': self.max_side, 'jpeg_quality': self.jpeg_quality,
+                'max_payload_bytes': self.max_payload_bytes}
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        """Zwraca hash treści obrazu (klucz deduplikacji)"""
+        return hashlib.sha256(data).hexdigest()
+
+    def prepare(self, data: bytes) -> Optional[PreparedImage]:
+        """
+        Dekoduje i normalizuje obraz w pamięci.
+
+        Args:
+            data: Surowe dane obrazu (PNG, JPEG, BMP, ...)
+
+        Returns:
+            PreparedImage lub None jeśli obraz należy pominąć
+        """
+        if not data or len(data) < self.min_bytes:
+            self.stats['skipped'] += 1
+            logger.debug(f"Pominięto obraz: za mało danych ({len(data) if data else 0} B)")
+            return None
+
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except Exception as e:
+            self.stats['skipped'] += 1
+            logger.debug(f"Pominięto obraz: nie można zdekodować ({e})")
+            return None
+
+        width, height = image.size
+        if min(width, height) < self.min_side:
+            self.stats['skipped'] += 1
+            logger.debug(f"Pominięto obraz: za mały ({width}x{height})")
+            return None
+
+        # Prawie jednolite obrazy (tła, linie, separatory) nie niosą treści
+        entropy = image.convert('L').entropy()
+        if entropy < self.min_entropy:
+            self.stats['skipped'] += 1
+            logger.debug(f"Pominięto obraz: niska entropia ({entropy:.2f})")
+            return None
+
+        payload = self._encode(image, data)
+        self.stats['prepared'] += 1
+
+        return PreparedImage(
+            content_hash=self.content_hash(data),
+            encoded=base64.b64encode(payload).decode('utf-8'),
+            width=width,
+            height=height
+        )
+
+    def _encode(self, image: Image.Image, data: bytes) -> bytes:
+        """
+        Zmniejsza obraz do rozdzielczości modelu i koduje jako JPEG w pamięci.
+
+        Małe pliki JPEG mieszczące się w limitach są wysyłane bez zmian
+        (bez ponownej kompresji). Jeśli payload nadal przekracza limit,
+        obniżana jest jakość, a potem rozdzielczość.
+        """
+        if (image.format == 'JPEG' and max(image.size) <= self.max_side
+                and len(data) <= self.max_payload_bytes):
+            self._count_bytes(len(data), len(data))
+            return data
+
+        image = self._to_rgb(image)
+        if max(image.size) > self.max_side:
+            image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+
+        quality = self.jpeg_quality
+        payload = self._jpeg_bytes(image, quality)
+        while len(payload) > self.max_payload_bytes:
+            if quality > MIN_JPEG_QUALITY:
+                quality = max(MIN_JPEG_QUALITY, quality - 10)
+            elif min(image.size) > self.min_side * 2:
+                image = image.resize((int(image.width * 0.75), int(image.height * 0.75)), Image.LANCZOS)
+            else:
+                break
+            payload = self._jpeg_bytes(image, quality)
+
+        self._count_bytes(len(data), len(payload))
+        return payload
+
+    @staticmethod
+    def _to_rgb(image: Image.Image) -> Image.Image:
+        """Konwertuje do RGB (przezroczystość spłaszczona na białe tło)"""
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            return background
+        if image.mode != 'RGB':
+            return image.convert('RGB')
+        return image
+
+    @staticmethod
+    def _jpeg_bytes(image: Image.Image, quality: int) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality, optimize=True)
+        return buffer.getvalue()
+
+    def _count_bytes(self, bytes_in: int, bytes_out: int):
+        self.stats['bytes_in'] += bytes_in
+        self.stats['bytes_out'] += bytes_out
+
+    def get_description(self, content_hash: str) -> Optional[str]:
+        """Zwraca zapamiętany opis obrazu o danym hashu (jeśli istnieje)"""
+        with self._lock:
+            description = self._descriptions.get(content_hash)
+            if description is not None:
+                self._descriptions.move_to_end(content_hash)
+                self.stats['duplicates'] += 1
+            return description
+
+    def remember(self, content_hash: str, description: str):
+        """Zapamiętuje opis obrazu (LRU ograniczone do max_cached wpisów)"""
+        if not description:
+            return
+        with self._lock:
+            self._descriptions[content_hash] = description
+            self._descriptions.move_to_end(content_hash)
+            while len(self._descriptions) > self.max_cached:
+                self._descriptions.popitem(last=False)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index Status - trwały stan indeksowania plików.
+
+Obsługuje:
+- Postęp indeksowania długich nagrań (etap, wykonane/łącznie, opublikowane fragmenty)
+- Rozpoznanie pliku przerwanego w trakcie (status "indexing") - kolejne
+  indeksowanie wznawia go zamiast pomijać jako "już w bazie"
+- Wykrycie podmiany pliku o tej samej nazwie (inny hash zawartości)
+- Profil indeksowania pliku - plik zaindeksowany szybkim profilem można
+  później uzupełnić dokładniejszym
+
+Stan zapisywany jest w jednym pliku JSON obok bazy wektorowej, współdzielonym
+przez watcher, UI i CLI (zapis atomowy, odczyt-modyfikacja-zapis pod blokadą
+pliku *.lock, żeby procesy nie gubiły nawzajem swoich zmian).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ingestion_profiles import DEFAULT_PROFILE, profile_covers
+
+try:
+    import fcntl
+except ImportError:  # Windows - tylko blokada w obrębie procesu
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+INDEX_STATUS_FILE = BASE_DIR / "vector_db" / "index_status.json"
+
+STATUS_INDEXING = "indexing"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+
+
+class IndexStatusStore:
+    """
+    Stan indeksowania per plik źródłowy (klucz = nazwa pliku, jak source_file w bazie).
+
+    Każdy odczyt wczytuje plik z dysku - watcher i UI działają w osobnych
+    procesach i widzą nawzajem swój postęp.
+    """
+
+    def __init__(self, path: Path = INDEX_STATUS_FILE):
+        """
+        Inicjalizuje magazyn stanu.
+
+        Args:
+            path: Plik JSON ze stanem indeksowania
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Blokada odczytu-modyfikacji-zapisu: między wątkami i między procesami"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Uszkodzony plik stanu indeksowania {self.path.name}: {e}")
+            return {}
+
+    def _save(self, data: Dict[str, Dict[str, Any]]):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Błąd zapisu stanu indeksowania: {e}")
+
+    def _modify(self, source_file: str, **fields) -> Dict[str, Any]:
+        with self._locked():
+            data = self._load()
+            record = data.setdefault(source_file, {})
+            record.update(fields)
+            record['updated'] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._save(data)
+            return dict(record)
+
+    def get(self, source_file: str) -> Optional[Dict[str, Any]]:
+        """Zwraca stan pliku lub None"""
+        record = self._load().get(source_file)
+        return dict(record) if record else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Zwraca stan wszystkich plików"""
+        return self._load()
+
+    def begin(self, source_file: str, file_hash: str, profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rozpoczyna (lub wznawia) indeksowanie pliku.
+
+        Postęp przerwanego indeksowania tej samej zawartości jest zachowywany.
+
+        Args:
+            source_file: Nazwa pliku
+            file_hash: SHA-256 zawartości
+            profile: Profil indeksowania
+
+        Returns:
+            Stan pliku (pole 'resumed' = True przy wznowieniu)
+        """
+        previous = self.get(source_file)
+        resumed = bool(previous and previous.get('status') == STATUS_INDEXING
+                       and previous.get('file_hash') == file_hash)
+        if resumed:
+            logger.info(f"[INDEX] Wznawianie indeksowania {source_file} "
+                        f"(etap: {previous.get('stage')}, {previous.get('done', 0)}/{previous.get('total', 0)})")
+            return self._modify(source_file, resumed=True, error=None, profile=profile)
+
+        return self._modify(
+            source_file,
+            status=STATUS_INDEXING,
+            file_hash=file_hash,
+            stage=None,
+            done=0,
+            total=0,
+            chunks=0,
+            resumed=False,
+            error=None,
+            profile=profile,
+            started=time.strftime("%Y-%m-%d %H:%M:%S")
+        )
+
+    def adopt(self, source_file: str, file_hash: str, chunks: int) -> Dict[str, Any]:
+        """
+        Zapisuje stan pliku zaindeksowanego przed wprowadzeniem stanu indeksowania.
+
+        Fragmenty w bazie uznawane są za zgodne z bieżącą zawartością (profil
+        domyślny) - kolejna zmiana zawartości zostanie wykryta po hashu.
+        """
+        logger.info(f"[INDEX] {source_file}: zapis stanu pliku zaindeksowanego wcześniej ({chunks} fragmentów)")
+        return self._modify(
+            source_file,
+            status=STATUS_DONE,
+            file_hash=file_hash,
+            stage=None,
+            chunks=chunks,
+            resumed=False,
+            error=None,
+            profile=None
+        )
+
+    def progress(self, source_file: str, stage: str, done: int, total: int,
+                 chunks: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Zapisuje postęp etapu (np. okna transkrypcji, sekundy wideo).
+
+        Args:
+            source_file: Nazwa pliku
+            stage: Nazwa etapu
+            done: Liczba zakończonych (opublikowanych) jednostek
+            total: Liczba wszystkich jednostek etapu
+            chunks: Liczba fragmentów opublikowanych w bazie
+        """
+        fields = {'stage': stage, 'done': done, 'total': total}
+        if chunks is not None:
+            fields['chunks'] = chunks
+        return self._modify(source_file, **fields)
+
+    def complete(self, source_file: str, chunks: int) -> Dict[str, Any]:
+        """Oznacza plik jako w pełni zaindeksowany"""
+        return self._modify(source_file, status=STATUS_DONE, stage=None, chunks=chunks, error=None)
+
+    def fail(self, source_file: str, error: str) -> Dict[str, Any]:
+        """
+        Zapisuje błąd indeksowania.
+
+        Status "indexing" jest zachowywany - opublikowane fragmenty zostają
+        w bazie, a kolejne indeksowanie wznowi plik.
+        """
+        return self._modify(source_file, error=error)
+
+    def is_complete(self, source_file: str, file_hash: Optional[str] = None,
+                    profile: Optional[str] = None, exact_profile: bool = False) -> bool:
+        """
+        Czy plik (o podanej zawartości) jest w pełni zaindeksowany.
+
+        Args:
+            source_file: Nazwa pliku
+            file_hash: SHA-256 zawartości (None = dowolna)
+            profile: Wymagany profil (None = dowolny)
+            exact_profile: True - wymagany dokładnie ten profil (jawny wybór),
+                False - wystarcza profil co najmniej tak dokładny (profile_covers)
+        """
+        record = self.get(source_file)
+        if not record or record.get('status') != STATUS_DONE:
+            return False
+        if file_hash is not None and record.get('file_hash') != file_hash:
+            return False
+        if profile is None:
+            return True
+        # Stan sprzed profili indeksowania - plik zaindeksowany ustawieniami domyślnymi
+        indexed = record.get('profile') or DEFAULT_PROFILE
+        return indexed == profile if exact_profile else profile_covers(indexed, profile)
+
+    def remove(self, source_file: str):
+        """Usuwa stan pliku (np. po usunięciu pliku z bazy)"""
+        with self._locked():
+            data = self._load()
+            if data.pop(source_file, None) is not None:
+                self._save(data)
+
+
+_index_status_store = None
+_index_status_lock = threading.Lock()
+
+
+def get_index_status_store() -> IndexStatusStore:
+    """Zwraca singleton IndexStatusStore"""
+    global _index_status_store
+    with _index_status_lock:
+        if _index_status_store is None:
+            _index_status_store = IndexStatusStore()
+    return _index_status_store
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingestion Profiles - nazwane profile szybkości indeksowania.
+
+Obsługuje:
+- Profile fast / balanced / thorough nadpisujące kosztowne ustawienia
+  procesorów: model Whisper, próbkowanie klatek wideo, OCR, opis grafik
+  osadzonych w dokumentach, minimalny rozmiar obrazu i rozmiar fragmentów
+- Własne profile i nadpisania w sekcji "ingestion" konfiguracji
+- Profil domyślny oraz profile przypisane do podfolderów obserwowanego katalogu
+
+Zaległe pliki można najpierw szybko zaindeksować profilem "fast", a potem
+uzupełnić profilem "thorough" - stan indeksowania pamięta użyty profil.
+Automatyczne przebiegi (watcher) indeksują ponownie tylko profilem
+dokładniejszym od zapisanego, nigdy nie obniżają jakości indeksu.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FAST = "fast"
+PROFILE_BALANCED = "balanced"
+PROFILE_THOROUGH = "thorough"
+DEFAULT_PROFILE = PROFILE_BALANCED
+
+# Nadpisania sekcji konfiguracji (sekcja -> klucze), łączone z auth_config.json.
+# "balanced" zachowuje ustawienia z konfiguracji (model Whisper wybrany w UI).
+INGESTION_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    PROFILE_FAST: {
+        'whisper': {'model': "small"},
+        'video': {'sample_interval': 5, 'scene_threshold': 16, 'max_frames': 120},
+        'ocr': {'enabled': False},
+        'vision': {'embedded_images': False},
+        'images': {'min_side': 128, 'min_bytes': 4096},
+        'chunking': {'max_tokens': 384},
+        'consolidation': {'audio_window_seconds': 120, 'video_window_seconds': 60},
+    },
+    PROFILE_BALANCED: {},
+    PROFILE_THOROUGH: {
+        'whisper': {'model': "large-v3"},
+        'video': {'sample_interval': 1, 'scene_threshold': 6, 'max_frames': 1200},
+        'ocr': {'enabled': True},
+        'vision': {'embedded_images': True},
+        'images': {'min_side': 32, 'min_bytes': 256},
+        'chunking': {'max_tokens': 192},
+    },
+}
+
+
+# Kolejność wbudowanych profili od najszybszego do najdokładniejszego
+PROFILE_RANKS = {PROFILE_FAST: 0, PROFILE_BALANCED: 1, PROFILE_THOROUGH: 2}
+
+
+def _ingestion_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    return config.get('ingestion', {}) or {}
+
+
+def list_profiles(config: Dict[str, Any]) -> List[str]:
+    """Zwraca nazwy dostępnych profili (wbudowane + zdefiniowane w konfiguracji)"""
+    names = list(INGESTION_PROFILES)
+    names += [name for name in _ingestion_config(config).get('profiles', {}) if name not in names]
+    return names
+
+
+def default_profile(config: Dict[str, Any]) -> str:
+    """Zwraca profil domyślny (klucz "default_profile" sekcji "ingestion")"""
+    return _ingestion_config(config).get('default_profile', DEFAULT_PROFILE)
+
+
+def resolve_profile(config: Dict[str, Any], profile: Optional[str] = None) -> str:
+    """
+    Zwraca nazwę profilu do użycia.
+
+    Args:
+        config: Konfiguracja aplikacji
+        profile: Wybrany profil (None = domyślny)
+
+    Returns:
+        Nazwa istniejącego profilu (nieznany profil zastępowany domyślnym)
+    """
+    name = profile or default_profile(config)
+    available = list_profiles(config)
+    if name not in available:
+        logger.warning(f"Nieznany profil indeksowania '{name}' - używam '{DEFAULT_PROFILE}' "
+                       f"(dostępne: {', '.join(available)})")
+        name = DEFAULT_PROFILE
+    return name
+
+
+def profile_covers(indexed: str, requested: str) -> bool:
+    """
+    Czy indeks zbudowany profilem indexed wystarcza dla profilu requested.
+
+    Wbudowane profile porównywane są dokładnością (thorough wystarcza dla
+    fast), profil własny wystarcza tylko sam dla siebie - i nie jest
+    zastępowany automatycznie profilem wbudowanym.
+    """
+    if indexed == requested:
+        return True
+    if indexed in PROFILE_RANKS and requested in PROFILE_RANKS:
+        return PROFILE_RANKS[indexed] >= PROFILE_RANKS[requested]
+    return indexed not in PROFILE_RANKS
+
+
+def get_profile(config: Dict[str, Any], profile: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Zwraca nadpisania sekcji konfiguracji dla profilu.
+
+    Sekcja "ingestion.profiles" konfiguracji może zmieniać profile wbudowane
+    (łączenie per sekcja) lub definiować nowe.
+    """
+    overrides = {section: dict(values) for section, values in INGESTION_PROFILES.get(profile, {}).items()}
+    for section, values in _ingestion_config(config).get('profiles', {}).get(profile, {}).items():
+        overrides.setdefault(section, {}).update(values)
+    return overrides
+
+
+def apply_profile(config: Dict[str, Any], overrides: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Łączy konfigurację z nadpisaniami profilu (bez modyfikacji oryginału).
+
+    Args:
+        config: Konfiguracja aplikacji
+        overrides: Nadpisania sekcji (patrz get_profile)
+
+    Returns:
+        Nowa konfiguracja z nadpisanymi kluczami sekcji
+    """
+    merged = dict(config)
+    for section, values in overrides.items():
+        merged[section] = {**(config.get(section) or {}), **values}
+    return merged
+
+
+def profile_for_path(config: Dict[str, Any], file_path: Union[str, Path], root: Union[str, Path],
+                     default: Optional[str] = None) -> Optional[str]:
+    """
+    Zwraca profil przypisany do folderu pliku w obserwowanym katalogu.
+
+    Przypisania pochodzą z "ingestion.folders" ({podfolder względem root: profil}),
+    wygrywa najgłębszy pasujący podfolder.
+
+    Args:
+        config: Konfiguracja aplikacji
+        file_path: Ścieżka do pliku
+        root: Obserwowany katalog
+        default: Profil dla plików spoza przypisanych folderów
+
+    Returns:
+        Nazwa profilu (lub default)
+    """
+    folders = _ingestion_config(config).get('folders', {})
+    try:
+        relative = Path(file_path).resolve().relative_to(Path(root).resolve())
+    except ValueError:
+        return default
+
+    best, best_depth = default, -1
+    for folder, profile in folders.items():
+        folder_parts = Path(folder).parts
+        if relative.parts[:len(folder_parts)] == folder_parts and len(folder_parts) > best_depth:
+            best, best_depth = profile, len(folder_parts)
+    return best
@@ -6,19 +6,581 @@ Model Provider - abstrakcja dla różnych dostawców modeli LLM.
 Obsługuje:
 - OpenAI API (GPT-4, GPT-3.5, etc.) - dynamiczne pobieranie listy modeli
 - Ollama (lokalne modele jak Gemma 3:12B)
+- Strumieniowanie odpowiedzi (Ollama NDJSON, OpenAI SSE) z pomiarem
+  czasu do pierwszego tokenu (TTFT) i tokenów/s
+- Sesję HTTP per provider: pula połączeń keep-alive, ponawianie z losowym
+  (jitter) backoffem i circuit breaker odrzucający żądania, gdy backend leży
+- Ollama: rozgrzewanie modeli w tle przy starcie, keep_alive, stały num_ctx
+  oraz pomiar opóźnień zimnego (ładowanie modelu) i ciepłego startu
 
 Pattern: Factory + Strategy
 """
 
 import logging
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union, Any
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 import json
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class GenerationStats:
+    """
+    Metryki jednego żądania generowania.
+    
+    Wypełniane przez generate_stream: moment pierwszego tokenu, liczba
+    tokenów odpowiedzi (z serwera, a bez tej informacji - liczba fragmentów
+    strumienia) i czas zakończenia. prompt_estimate to szacunek tokenów
+    promptu z ContextBuilder (prompt_tokens - liczba zgłoszona przez serwer).
+    """
+    model: str = ""
+    started: float = field(default_factory=time.perf_counter)
+    first_token: Optional[float] = None
+    finished: Optional[float] = None
+    output_tokens: int = 0
+    prompt_tokens: int = 0
+    prompt_estimate: int = 0
+    load_seconds: float = 0.0
+    streamed: bool = False
+    
+    def mark_token(self):
+        """Rejestruje fragment odpowiedzi ze strumienia"""
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.output_tokens += 1
+    
+    def finish(self, output_tokens: Optional[int] = None, prompt_tokens: Optional[int] = None):
+        """Kończy pomiar (liczby tokenów z serwera zastępują liczbę fragmentów)"""
+        if self.finished is None:
+            self.finished = time.perf_counter()
+        if output_tokens:
+            self.output_tokens = output_tokens
+        if prompt_tokens:
+            self.prompt_tokens = prompt_tokens
+    
+    @property
+    def ttft(self) -> Optional[float]:
+        """Czas do pierwszego tokenu (s)"""
+        return None if self.first_token is None else self.first_token - self.started
+    
+    @property
+    def total_seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+    
+    @property
+    def tokens_per_second(self) -> float:
+        """Tempo generowania liczone od pierwszego tokenu (bez czasu przetwarzania promptu)"""
+        decode_seconds = self.total_seconds - (self.ttft or 0.0)
+        return self.output_tokens / decode_seconds if decode_seconds > 0 else 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Metryki do logów (audit log)"""
+        return {
+            'model': self.model,
+            'streamed': self.streamed,
+            'ttft_ms': round(self.ttft * 1000, 1) if self.ttft is not None else None,
+            'total_ms': round(self.total_seconds * 1000, 1),
+            'prompt_tokens': self.prompt_tokens,
+            'prompt_estimate': self.prompt_estimate,
+            'load_ms': round(self.load_seconds * 1000, 1),
+            'output_tokens': self.output_tokens,
+            'tokens_per_second': round(self.tokens_per_second, 2),
+        }
+
+
+# Sesja HTTP providerów (sekcja "model_http" konfiguracji, opcjonalnie podsekcje "openai" / "ollama")
+DEFAULT_POOL_SIZE = 4               # Połączeń keep-alive na provider (równoległe zapytania użytkowników)
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_SECONDS = 0.5
+DEFAULT_MAX_BACKOFF_SECONDS = 8.0
+DEFAULT_FAILURE_THRESHOLD = 5       # Kolejnych błędów, po których obwód jest otwierany (0 = bez circuit breakera)
+DEFAULT_RESET_SECONDS = 30.0        # Czas odrzucania żądań przed próbą ponownego połączenia
+
+# Kody HTTP, przy których ponawiamy żądanie
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Metody, które można ponowić po błędzie w trakcie żądania (pozostałe - tylko gdy połączenie nie powstało)
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Backend uznany za niedostępny - żądanie odrzucone bez łączenia"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker backendu modelu.
+    
+    Po failure_threshold kolejnych błędach (połączenie, timeout, HTTP 5xx)
+    obwód jest otwierany i żądania są odrzucane od razu przez reset_seconds.
+    Potem przepuszczane jest jedno żądanie próbne - sukces zamyka obwód,
+    błąd otwiera go ponownie.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = max(0, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def before_request(self):
+        """Sprawdza, czy żądanie może zostać wysłane (CircuitOpenError jeśli nie)"""
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            if self.state == CIRCUIT_OPEN:
+                remaining = self.reset_seconds - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(f"{self.name} niedostępny - kolejna próba za {remaining:.0f}s")
+                self.state = CIRCUIT_HALF_OPEN
+            if self.state == CIRCUIT_HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(f"{self.name} niedostępny - trwa próba ponownego połączenia")
+                self._probing = True
+    
+    def record_success(self):
+        with self._lock:
+            if self.state != CIRCUIT_CLOSED:
+                logger.info(f"[HTTP] {self.name}: backend znów dostępny - zamykam obwód")
+            self.state = CIRCUIT_CLOSED
+            self.failures = 0
+            self._probing = False
+    
+    def release_probe(self):
+        """Kończy próbę bez rozstrzygnięcia (żądanie anulowane) - kolejne żądanie może spróbować ponownie"""
+        with self._lock:
+            self._probing = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if not self.failure_threshold or self.state == CIRCUIT_OPEN:
+                return
+            if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+                logger.warning(f"[HTTP] {self.name}: {self.failures} błędów z rzędu - "
+                               f"odrzucam żądania przez {self.reset_seconds:.0f}s")
+                self.state = CIRCUIT_OPEN
+                self.opened += 1
+                self._opened_at = time.monotonic()
+
+
+def is_connect_error(error: Exception) -> bool:
+    """
+    Czy żądanie na pewno nie dotarło do serwera (błąd nawiązania połączenia).
+
+    ReadTimeout lub zerwane połączenie po wysłaniu POST oznacza, że backend
+    mógł już rozpocząć generowanie - ponowienie zdublowałoby kosztowną pracę.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class ProviderSession:
+    """
+    Sesja HTTP jednego providera modelu.
+    
+    Połączenia (TCP, TLS) są utrzymywane w puli i używane ponownie przez
+    kolejne żądania. Błędy przejściowe są ponawiane z losowym opóźnieniem
+    (full jitter), a circuit breaker chroni przed czekaniem na timeouty,
+    gdy backend nie działa.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS
+    ):
+        """
+        Inicjalizuje sesję.
+        
+        Args:
+            name: Nazwa providera (logi, metryki)
+            pool_size: Maksymalna liczba połączeń keep-alive
+            max_retries: Liczba ponowień przy błędach przejściowych
+            backoff_seconds: Bazowe opóźnienie ponowienia (podwajane co próbę, losowane z [0, opóźnienie])
+            max_backoff_seconds: Górny limit opóźnienia
+            failure_threshold: Kolejne błędy otwierające obwód (0 = bez circuit breakera)
+            reset_seconds: Czas odrzucania żądań po otwarciu obwodu
+        """
+        self.name = name
+        self.pool_size = max(1, pool_size)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+        
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+    
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any]) -> 'ProviderSession':
+        """Tworzy sesję na podstawie sekcji "model_http" (podsekcja providera nadpisuje wspólne klucze)"""
+        settings = {**config, **(config.get(name) or {})}
+        return cls(
+            name,
+            pool_size=settings.get('pool_size', DEFAULT_POOL_SIZE),
+            max_retries=settings.get('max_retries', DEFAULT_MAX_RETRIES),
+            backoff_seconds=settings.get('backoff_seconds', DEFAULT_BACKOFF_SECONDS),
+            max_backoff_seconds=settings.get('max_backoff_seconds', DEFAULT_MAX_BACKOFF_SECONDS),
+            failure_threshold=settings.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+            reset_seconds=settings.get('reset_seconds', DEFAULT_RESET_SECONDS)
+        )
+    
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None):
+        """Czeka przed ponowieniem (full jitter; Retry-After serwera jako minimum)"""
+        delay = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_backoff_seconds))
+            except ValueError:
+                pass
+        time.sleep(delay)
+    
+    def request(self, method: str, url: str, retry: bool = True, **kwargs) -> requests.Response:
+        """
+        Wysyła żądanie przez pulę połączeń.
+        
+        Ponawiane są kody RETRY_STATUS_CODES i błędy nawiązania połączenia,
+        a dla metod idempotentnych (GET) także timeouty odczytu i zerwane
+        połączenia - po wyczerpaniu prób zwracana jest ostatnia odpowiedź lub
+        rzucany ostatni wyjątek. Przy odpowiedziach strumieniowych (stream=True)
+        ponawiane jest tylko nawiązanie połączenia, nie odczyt treści.
+        
+        Args:
+            method: Metoda HTTP
+            url: Adres
+            retry: False = jedna próba (np. szybkie sprawdzenie dostępności)
+            **kwargs: Parametry requests (json, headers, timeout, stream, ...)
+        
+        Returns:
+            Odpowiedź HTTP
+        
+        Raises:
+            CircuitOpenError: Backend uznany za niedostępny
+        """
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                self._count('rejected')
+                raise
+            
+            self._count('requests')
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.breaker.record_failure()
+                self._count('failures')
+                if attempt + 1 >= attempts or (method.upper() not in IDEMPOTENT_METHODS
+                                                and not is_connect_error(e)):
+                    raise
+                logger.warning(f"[HTTP] {self.name}: błąd połączenia (próba {attempt + 1}/{attempts}): {e}")
+                self._count('retries')
+                self._backoff(attempt)
+                continue
+            except Exception:
+                # Każdy inny błąd też kończy próbę - inaczej półotwarty obwód czekałby na nią bez końca
+                self.breaker.record_failure()
+                self._count('failures')
+                raise
+            
+            if response.status_code in RETRY_STATUS_CODES:
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    # 429: backend żyje, ale dławi ruch - próba półotwartego obwodu kończy się bez rozstrzygnięcia
+                    self.breaker.release_probe()
+                self._count('failures')
+                if attempt + 1 < attempts:
+                    logger.warning(f"[HTTP] {self.name}: HTTP {response.status_code} (próba {attempt + 1}/{attempts})")
+                    retry_after = response.headers.get('Retry-After')
+                    response.close()
+                    self._count('retries')
+                    self._backoff(attempt, retry_after)
+                    continue
+                return response
+            
+            self.breaker.record_success()
+            return response
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+    
+    def connection_stats(self) -> Dict[str, Any]:
+        """
+        Metryki sesji: żądania, ponowienia, odrzucenia przez circuit breaker
+        i ponowne użycie połączeń (nowe połączenia urllib3 vs wysłane żądania).
+        """
+        opened = http_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            opened += getattr(pool, 'num_connections', 0)
+            http_requests += getattr(pool, 'num_requests', 0)
+        
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats.update({
+            'provider': self.name,
+            'pool_size': self.pool_size,
+            'connections_opened': opened,
+            'http_requests': http_requests,
+            'connection_reuse': round(1 - opened / http_requests, 3) if http_requests else None,
+            'circuit': self.breaker.state,
+            'circuit_opened': self.breaker.opened,
+        })
+        return stats
+    
+    def close(self):
+        self.session.close()
+
+
+_provider_sessions: Dict[Tuple[str, str], ProviderSession] = {}
+_provider_sessions_lock = threading.Lock()
+
+
+def get_provider_session(name: str, config: Dict[str, Any]) -> ProviderSession:
+    """
+    Zwraca sesję providera wspólną dla całego procesu.
+
+    RAGSystem jest przebudowywany przez Streamlit (cache_resource) - pula
+    połączeń i stan circuit breakera muszą przetrwać przebudowę. Osobna sesja
+    powstaje tylko dla innych ustawień sekcji "model_http".
+
+    Args:
+        name: Nazwa providera ("openai" / "ollama")
+        config: Sekcja "model_http" konfiguracji
+
+    Returns:
+        Instancja ProviderSession
+    """
+    key = (name, json.dumps({**config, **(config.get(name) or {})}, sort_keys=True, default=str))
+    with _provider_sessions_lock:
+        session = _provider_sessions.get(key)
+        if session is None:
+            session = _provider_sessions[key] = ProviderSession.from_config(name, config)
+    return session
+
+
+def openai_chat_payload(model: str, prompt: str, context: str, **kwargs) -> Dict[str, Any]:
+    """Treść żądania chat/completions (wspólna dla generate i generate_stream)"""
+    # Przygotuj messages
+    messages = [
+        {"role": "system", "content": prompt}
+    ]
+    
+    if context:
+        messages.append({"role": "user", "content": context})
+    
+    # Parametry
+    data = {
+        "model": model,
+        "messages": messages,
+        "temperature": kwargs.get('temperature', 0.1),
+        "max_tokens": kwargs.get('max_tokens', 1000),
+    }
+    
+    # Dodatkowe parametry jeśli podane
+    if 'top_p' in kwargs:
+        data['top_p'] = kwargs['top_p']
+    return data
+
+
+def ollama_generate_payload(model: str, prompt: str, context: str, stream: bool,
+                            keep_alive: Optional[Union[str, int]] = None, num_ctx: Optional[int] = None,
+                            **kwargs) -> Dict[str, Any]:
+    """Treść żądania /api/generate (wspólna dla generate i generate_stream)"""
+    # Połącz prompt i context
+    full_prompt = prompt
+    if context:
+        full_prompt = f"{prompt}\n\n{context}"
+    
+    data = {
+        "model": model,
+        "prompt": full_prompt,
+        "stream": stream,
+        "options": {
+            "temperature": kwargs.get('temperature', 0.1),
+            "num_predict": kwargs.get('max_tokens', 1000),
+            "top_k": kwargs.get('top_k', 30),
+            "top_p": kwargs.get('top_p', 0.85),
+        }
+    }
+    if keep_alive is not None:
+        data['keep_alive'] = keep_alive
+    if num_ctx:
+        data['options']['num_ctx'] = num_ctx
+    return data
+
+
+def ollama_warmup_payload(model: str, keep_alive: Optional[Union[str, int]] = None,
+                          num_ctx: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Treść żądania ładującego model bez generowania (pusty prompt).
+    
+    num_ctx musi być taki sam jak w późniejszych zapytaniach - inna wartość
+    wymusza ponowne załadowanie modelu.
+    """
+    data = {"model": model, "prompt": "", "stream": False}
+    if keep_alive is not None:
+        data['keep_alive'] = keep_alive
+    if num_ctx:
+        data['options'] = {'num_ctx': num_ctx}
+    return data
+
+
+# Ollama (sekcja "ollama" konfiguracji)
+DEFAULT_KEEP_ALIVE = "30m"          # Czas utrzymania modelu w pamięci po ostatnim żądaniu (-1 = bez limitu)
+COLD_LOAD_SECONDS = 0.5             # load_duration, od którego żądanie uznajemy za zimny start
+
+
+class LatencyTracker:
+    """
+    Opóźnienia generowania z podziałem na zimny i ciepły start.
+    
+    Zimny start to żądanie, w którym serwer ładował model (load_duration
+    Ollama powyżej COLD_LOAD_SECONDS). Zapamiętywany jest też czas
+    rozgrzewania każdego modelu.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.warmup: Dict[str, float] = {}
+        self._buckets = {'cold': [0, 0.0], 'warm': [0, 0.0]}     # liczba żądań, suma TTFT
+    
+    def record_warmup(self, model: str, seconds: float):
+        with self._lock:
+            self.warmup[model] = seconds
+    
+    def record(self, stats: GenerationStats):
+        if stats.ttft is None:
+            return
+        bucket = 'cold' if stats.load_seconds >= COLD_LOAD_SECONDS else 'warm'
+        with self._lock:
+            self._buckets[bucket][0] += 1
+            self._buckets[bucket][1] += stats.ttft
+    
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {'warmup': dict(self.warmup)}
+            for bucket, (count, total) in self._buckets.items():
+                result[f'{bucket}_requests'] = count
+                result[f'{bucket}_ttft'] = total / count if count else None
+        return result
+
+
+_latency_tracker: Optional[LatencyTracker] = None
+_warmed_up: set = set()
+_latency_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Zwraca tracker opóźnień procesu (statystyki przetrwają przebudowę providera)"""
+    global _latency_tracker
+    with _latency_lock:
+        if _latency_tracker is None:
+            _latency_tracker = LatencyTracker()
+        return _latency_tracker
+
+
+def claim_warm_up(base_url: str, models: List[Tuple[str, Optional[int]]]) -> List[Tuple[str, Optional[int]]]:
+    """
+    Zwraca modele, które nie były jeszcze rozgrzewane w tym procesie, i oznacza je.
+
+    RAGSystem jest przebudowywany przez Streamlit co kilka sekund - bez tego
+    każda przebudowa wysyłałaby do serwera kolejne żądania rozgrzewające.
+    """
+    with _latency_lock:
+        pending = [(model, num_ctx) for model, num_ctx in models if (base_url, model, num_ctx) not in _warmed_up]
+        _warmed_up.update((base_url, model, num_ctx) for model, num_ctx in pending)
+    return pending
+
+
+def release_warm_up(base_url: str, model: str, num_ctx: Optional[int]):
+    """Cofa oznaczenie nieudanego rozgrzewania - kolejna przebudowa spróbuje ponownie"""
+    with _latency_lock:
+        _warmed_up.discard((base_url, model, num_ctx))
+
+
+def parse_openai_stream_line(line: Union[str, bytes]) -> Tuple[str, Optional[Dict[str, Any]], bool]:
+    """
+    Parsuje linię strumienia Server-Sent Events OpenAI ("data: {...}").
+    
+    Returns:
+        (tekst, zużycie tokenów lub None, koniec strumienia)
+    """
+    line = line.decode('utf-8') if isinstance(line, bytes) else line
+    if not line.startswith('data:'):
+        return "", None, False
+    payload = line[len('data:'):].strip()
+    if payload == '[DONE]':
+        return "", None, True
+    event = json.loads(payload)
+    text = "".join((choice.get('delta') or {}).get('content') or "" for choice in event.get('choices', []))
+    return text, event.get('usage'), False
+
+
+def parse_ollama_stream_line(line: Union[str, bytes]) -> Tuple[str, Optional[Dict[str, Any]], bool]:
+    """
+    Parsuje linię strumienia NDJSON Ollama.
+    
+    Returns:
+        (tekst, ostatni obiekt z licznikami tokenów lub None, koniec strumienia)
+    """
+    if not line:
+        return "", None, False
+    chunk = json.loads(line)
+    if chunk.get('error'):
+        raise Exception(f"Ollama API error: {chunk['error']}")
+    done = bool(chunk.get('done'))
+    return chunk.get('response', ''), chunk if done else None, done
+
+
 class ModelProvider(ABC):
     """Abstrakcyjna klasa bazowa dla dostawców modeli"""
     
@@ -37,11 +599,49 @@ class ModelProvider(ABC):
         """
         pass
     
+    def generate_stream(self, prompt: str, context: str = "", stats: Optional[GenerationStats] = None,
+                        **kwargs) -> Iterator[str]:
+        """
+        Generuje odpowiedź strumieniowo - oddaje kolejne fragmenty tekstu.
+        
+        Domyślnie (provider bez strumieniowania) oddaje całą odpowiedź naraz.
+        
+        Args:
+            prompt: System prompt
+            context: Kontekst użytkownika (pytanie + dokumenty)
+            stats: Metryki żądania do wypełnienia (TTFT, tokeny/s)
+            **kwargs: Parametry jak w generate
+        
+        Yields:
+            Kolejne fragmenty odpowiedzi
+        """
+        stats = stats if stats is not None else GenerationStats()
+        stats.model = self.get_model_name()
+        answer = self.generate(prompt, context, **kwargs)
+        if answer:
+            stats.mark_token()
+            yield answer
+        stats.finish()
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Sprawdza czy provider jest dostępny"""
         pass
     
+    def connection_stats(self) -> Dict[str, Any]:
+        """Metryki połączeń HTTP providera (pula keep-alive, ponowienia, circuit breaker)"""
+        http = getattr(self, 'http', None)
+        return http.connection_stats() if http is not None else {}
+    
+    def warm_up(self, extra_models: Optional[List[Tuple[str, Optional[int]]]] = None):
+        """Ładuje modele na serwerze w tle (domyślnie nic - modele w chmurze są zawsze gotowe)"""
+        pass
+    
+    def latency_stats(self) -> Dict[str, Any]:
+        """Opóźnienia zimnego i ciepłego startu (puste dla providerów bez ładowania modeli)"""
+        latency = getattr(self, 'latency', None)
+        return latency.as_dict() if latency is not None else {}
+    
     @abstractmethod
     def get_model_name(self) -> str:
         """Zwraca nazwę używanego modelu"""
@@ -60,18 +660,20 @@ class OpenAIProvider(ModelProvider):
     Obsługuje dynamiczne pobieranie listy modeli i wybór modelu.
     """
     
-    def __init__(self, api_key: str, model: str = None):
+    def __init__(self, api_key: str, model: str = None, http: Optional[ProviderSession] = None):
         """
         Inicjalizuje OpenAI provider.
         
         Args:
             api_key: Klucz API OpenAI
             model: Nazwa modelu (opcjonalne - jeśli None, użyje pierwszego dostępnego)
+            http: Sesja HTTP (domyślnie z ustawieniami domyślnymi)
         """
         self.api_key = api_key
         self.base_url = "https://api.openai.com/v1"
         self._model = model
         self._available_models = None
+        self.http = http or ProviderSession("openai")
         
         logger.info("Inicjalizacja OpenAI Provider")
         
@@ -107,14 +709,9 @@ class OpenAIProvider(ModelProvider):
             return self._available_models
         
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/models",
-                headers=headers,
+                headers=self._headers(),
                 timeout=10
             )
             
@@ -142,6 +739,15 @@ class OpenAIProvider(ModelProvider):
             logger.error(f"Błąd podczas pobierania listy modeli OpenAI: {e}")
             return []
     
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+    
+    def _chat_payload(self, prompt: str, context: str, **kwargs) -> Dict[str, Any]:
+        return openai_chat_payload(self._model, prompt, context, **kwargs)
+    
     def generate(self, prompt: str, context: str = "", **kwargs) -> str:
         """
         Generuje odpowiedź używając OpenAI API.
@@ -152,35 +758,10 @@ class OpenAIProvider(ModelProvider):
             **kwargs: temperature, max_tokens, etc.
         """
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Przygotuj messages
-            messages = [
-                {"role": "system", "content": prompt}
-            ]
-            
-            if context:
-                messages.append({"role": "user", "content": context})
-            
-            # Parametry
-            data = {
-                "model": self._model,
-                "messages": messages,
-                "temperature": kwargs.get('temperature', 0.1),
-                "max_tokens": kwargs.get('max_tokens', 1000),
-            }
-            
-            # Dodatkowe parametry jeśli podane
-            if 'top_p' in kwargs:
-                data['top_p'] = kwargs['top_p']
-            
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=data,
+                headers=self._headers(),
+                json=self._chat_payload(prompt, context, **kwargs),
                 timeout=kwargs.get('timeout', 120)
             )
             
@@ -203,16 +784,59 @@ class OpenAIProvider(ModelProvider):
             logger.error(f"Błąd podczas generowania odpowiedzi OpenAI: {e}")
             raise
     
+    def generate_stream(self, prompt: str, context: str = "", stats: Optional[GenerationStats] = None,
+                        **kwargs) -> Iterator[str]:
+        """
+        Generuje odpowiedź strumieniowo (Server-Sent Events, "data: {...}").
+        
+        Ostatnie zdarzenie przed "[DONE]" zawiera zużycie tokenów (include_usage).
+        """
+        stats = stats if stats is not None else GenerationStats()
+        stats.model = self._model
+        stats.streamed = True
+        data = self._chat_payload(prompt, context, **kwargs)
+        data['stream'] = True
+        data['stream_options'] = {'include_usage': True}
+        
+        try:
+            with self.http.post(
+                f"{self.base_url}/chat/completions",
+                headers=self._headers(),
+                json=data,
+                stream=True,
+                timeout=kwargs.get('timeout', 120)
+            ) as response:
+                if response.status_code != 200:
+                    error_msg = f"OpenAI API error: {response.status_code} - {response.text}"
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+                
+                usage = {}
+                for line in response.iter_lines():
+                    token, event_usage, done = parse_openai_stream_line(line)
+                    if done:
+                        break
+                    usage = event_usage or usage
+                    if token:
+                        stats.mark_token()
+                        yield token
+            
+            stats.finish(output_tokens=usage.get('completion_tokens'), prompt_tokens=usage.get('prompt_tokens'))
+            logger.info(f"OpenAI stream: {stats.output_tokens} tokenów, TTFT {stats.ttft or 0:.2f}s, "
+                        f"{stats.tokens_per_second:.1f} tok/s")
+                
+        except Exception as e:
+            logger.error(f"Błąd podczas strumieniowania odpowiedzi OpenAI: {e}")
+            raise
+    
     def is_available(self) -> bool:
         """Sprawdza czy OpenAI API jest dostępne"""
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/models",
-                headers=headers,
-                timeout=5
+                headers=self._headers(),
+                timeout=5,
+                retry=False
             )
             return response.status_code == 200
         except:
@@ -235,22 +859,32 @@ class OllamaProvider(ModelProvider):
     Obsługuje modele lokalne jak Gemma 3:12B.
     """
     
-    def __init__(self, model: str = "gemma3:12b", base_url: str = "http://127.0.0.1:11434"):
+    def __init__(self, model: str = "gemma3:12b", base_url: str = "http://127.0.0.1:11434",
+                 http: Optional[ProviderSession] = None, keep_alive: Optional[Union[str, int]] = DEFAULT_KEEP_ALIVE,
+                 num_ctx: Optional[int] = None):
         """
         Inicjalizuje Ollama provider.
         
         Args:
             model: Nazwa modelu w Ollama
             base_url: URL serwera Ollama
+            http: Sesja HTTP (domyślnie z ustawieniami domyślnymi)
+            keep_alive: Czas utrzymania modelu w pamięci ("30m", sekundy, -1 = bez limitu)
+            num_ctx: Okno kontekstu modelu (None = domyślne Ollama)
         """
         self.model = model
         self.base_url = base_url
-        logger.info(f"Inicjalizacja Ollama Provider: model={model}, url={base_url}")
+        self.http = http or ProviderSession("ollama")
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.latency = get_latency_tracker()
+        logger.info(f"Inicjalizacja Ollama Provider: model={model}, url={base_url}, "
+                    f"keep_alive={keep_alive}, num_ctx={num_ctx or 'domyślny'}")
     
     def list_models(self) -> List[Dict[str, Any]]:
         """Pobiera listę dostępnych modeli lokalnych"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/api/tags",
                 timeout=5
             )
@@ -268,6 +902,47 @@ class OllamaProvider(ModelProvider):
             logger.error(f"Błąd podczas pobierania listy modeli Ollama: {e}")
             return []
     
+    def _generate_payload(self, prompt: str, context: str, stream: bool, **kwargs) -> Dict[str, Any]:
+        return ollama_generate_payload(self.model, prompt, context, stream,
+                                       keep_alive=self.keep_alive, num_ctx=self.num_ctx, **kwargs)
+    
+    def warm_up(self, extra_models: Optional[List[Tuple[str, Optional[int]]]] = None):
+        """
+        Ładuje model generowania (i dodatkowe, np. wizyjny) w wątku tła.
+        
+        Każdy model rozgrzewany jest raz na proces (claim_warm_up).
+        
+        Args:
+            extra_models: Dodatkowe modele jako (nazwa, num_ctx)
+        """
+        models = [(self.model, self.num_ctx)]
+        models += [(name, num_ctx) for name, num_ctx in extra_models or [] if name != self.model]
+        models = claim_warm_up(self.base_url, models)
+        if models:
+            threading.Thread(target=self._warm_up_models, args=(models,), name="ollama-warmup", daemon=True).start()
+    
+    def _warm_up_models(self, models: List[Tuple[str, Optional[int]]]):
+        for model, num_ctx in models:
+            start = time.perf_counter()
+            try:
+                response = self.http.post(
+                    f"{self.base_url}/api/generate",
+                    json=ollama_warmup_payload(model, self.keep_alive, num_ctx),
+                    timeout=600,
+                    retry=False
+                )
+                if response.status_code != 200:
+                    logger.warning(f"Rozgrzewanie modelu {model} nieudane: HTTP {response.status_code}")
+                    release_warm_up(self.base_url, model, num_ctx)
+                    continue
+                seconds = time.perf_counter() - start
+                self.latency.record_warmup(model, seconds)
+                load_seconds = response.json().get('load_duration', 0) / 1e9
+                logger.info(f"Model {model} rozgrzany w {seconds:.1f}s (ładowanie {load_seconds:.1f}s)")
+            except Exception as e:
+                logger.warning(f"Rozgrzewanie modelu {model} nieudane: {e}")
+                release_warm_up(self.base_url, model, num_ctx)
+    
     def generate(self, prompt: str, context: str = "", **kwargs) -> str:
         """
         Generuje odpowiedź używając Ollama.
@@ -278,26 +953,9 @@ class OllamaProvider(ModelProvider):
             **kwargs: temperature, num_predict, etc.
         """
         try:
-            # Połącz prompt i context
-            full_prompt = prompt
-            if context:
-                full_prompt = f"{prompt}\n\n{context}"
-            
-            data = {
-                "model": self.model,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": kwargs.get('temperature', 0.1),
-                    "num_predict": kwargs.get('max_tokens', 1000),
-                    "top_k": kwargs.get('top_k', 30),
-                    "top_p": kwargs.get('top_p', 0.85),
-                }
-            }
-            
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/generate",
-                json=data,
+                json=self._generate_payload(prompt, context, stream=False, **kwargs),
                 timeout=kwargs.get('timeout', 300)
             )
             
@@ -320,12 +978,57 @@ class OllamaProvider(ModelProvider):
             logger.error(f"Błąd podczas generowania odpowiedzi Ollama: {e}")
             raise
     
+    def generate_stream(self, prompt: str, context: str = "", stats: Optional[GenerationStats] = None,
+                        **kwargs) -> Iterator[str]:
+        """
+        Generuje odpowiedź strumieniowo (NDJSON - jeden obiekt JSON na linię).
+        
+        Ostatni obiekt ("done": true) zawiera liczby tokenów (eval_count, prompt_eval_count).
+        """
+        stats = stats if stats is not None else GenerationStats()
+        stats.model = self.model
+        stats.streamed = True
+        
+        try:
+            with self.http.post(
+                f"{self.base_url}/api/generate",
+                json=self._generate_payload(prompt, context, stream=True, **kwargs),
+                stream=True,
+                timeout=kwargs.get('timeout', 300)
+            ) as response:
+                if response.status_code != 200:
+                    error_msg = f"Ollama API error: {response.status_code}"
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+                
+                for line in response.iter_lines():
+                    token, final, done = parse_ollama_stream_line(line)
+                    if token:
+                        stats.mark_token()
+                        yield token
+                    
+                    if done:
+                        stats.load_seconds = final.get('load_duration', 0) / 1e9
+                        stats.finish(output_tokens=final.get('eval_count'),
+                                     prompt_tokens=final.get('prompt_eval_count'))
+                        break
+            
+            stats.finish()
+            self.latency.record(stats)
+            logger.info(f"Ollama stream: {stats.output_tokens} tokenów, TTFT {stats.ttft or 0:.2f}s "
+                        f"(ładowanie modelu {stats.load_seconds:.1f}s), {stats.tokens_per_second:.1f} tok/s")
+                
+        except Exception as e:
+            logger.error(f"Błąd podczas strumieniowania odpowiedzi Ollama: {e}")
+            raise
+    
     def is_available(self) -> bool:
         """Sprawdza czy Ollama jest dostępne"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/api/tags",
-                timeout=2
+                timeout=2,
+                retry=False
             )
             return response.status_code == 200
         except:
@@ -361,23 +1064,29 @@ class ModelFactory:
                 - openai_model: preferowany model OpenAI (opcjonalny)
                 - ollama_model: model Ollama (domyślnie gemma3:12b)
                 - ollama_url: URL Ollama (domyślnie localhost:11434)
+                - ollama_keep_alive: czas utrzymania modelu w pamięci
+                - ollama_num_ctx: okno kontekstu Ollama
+                - http: sekcja "model_http" (pula połączeń, ponawianie, circuit breaker;
+                  "async": true - provider asynchroniczny z limitem równoległości)
         
         Returns:
             Instancja ModelProvider
         """
         openai_key = config.get('openai_api_key', '').strip()
         openai_model = config.get('openai_model', None)
+        http_config = config.get('http', {})
         
         # Próba 1: OpenAI (jeśli jest klucz)
         if openai_key:
             try:
                 logger.info("Próba inicjalizacji OpenAI Provider...")
-                provider = OpenAIProvider(api_key=openai_key, model=openai_model)
+                provider = OpenAIProvider(api_key=openai_key, model=openai_model,
+                                          http=get_provider_session("openai", http_config))
                 
                 if provider.is_available():
                     logger.info(f"[OK] Używam OpenAI API - model: {provider.get_model_name()}")
                     logger.info(f"   Dostępne modele: {len(provider.list_models())}")
-                    return provider
+                    return ModelFactory._finalize(provider, http_config)
                 else:
                     logger.warning("[WARNING] OpenAI API niedostępne (błąd autoryzacji?)")
                     
@@ -389,16 +1098,46 @@ class ModelFactory:
         ollama_model = config.get('ollama_model', 'gemma3:12b')
         ollama_url = config.get('ollama_url', 'http://127.0.0.1:11434')
         
-        provider = OllamaProvider(model=ollama_model, base_url=ollama_url)
+        provider = OllamaProvider(model=ollama_model, base_url=ollama_url,
+                                  http=get_provider_session("ollama", http_config),
+                                  keep_alive=config.get('ollama_keep_alive', DEFAULT_KEEP_ALIVE),
+                                  num_ctx=config.get('ollama_num_ctx'))
         
         if provider.is_available():
             logger.info(f"[OK] Używam Ollama (lokalny) - model: {provider.get_model_name()}")
             logger.info(f"   Dostępne modele: {len(provider.list_models())}")
-            return provider
+            return ModelFactory._finalize(provider, http_config)
         else:
             error_msg = "[ERROR] Brak dostępnego providera! Sprawdź OpenAI API key lub uruchom Ollama."
             logger.error(error_msg)
             raise Exception(error_msg)
+    
+    @staticmethod
+    def _finalize(provider: ModelProvider, http_config: Dict[str, Any]) -> ModelProvider:
+        """
+        Zamienia wybrany provider na wariant asynchroniczny, jeśli włączono
+        "async" w sekcji "model_http" (bez httpx zostaje provider synchroniczny).
+        """
+        if not http_config.get('async'):
+            return provider
+        
+        try:
+            from async_model_provider import AsyncOllamaProvider, AsyncOpenAIProvider, SyncModelProvider
+            if isinstance(provider, OpenAIProvider):
+                async_provider = AsyncOpenAIProvider.from_config(
+                    http_config, api_key=provider.api_key, model=provider.get_model_name())
+            else:
+                async_provider = AsyncOllamaProvider.from_config(
+                    http_config, model=provider.get_model_name(), base_url=provider.base_url,
+                    keep_alive=provider.keep_alive, num_ctx=provider.num_ctx)
+        except ImportError as e:
+            logger.warning(f"[WARNING] Provider asynchroniczny niedostępny ({e}) - używam synchronicznego")
+            return provider
+        
+        wrapped = SyncModelProvider.from_config(async_provider, http_config)
+        logger.info(f"[OK] Provider asynchroniczny: limit {wrapped.limiter.max_concurrency} "
+                    f"równoległych generowań, {wrapped.limiter.per_user} na użytkownika")
+        return wrapped
 
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR Engine - rozpoznawanie tekstu na obrazach (Tesseract) w tle.
+
+Obsługuje:
+- Pulę workerów OCR (OCR działa równolegle z opisem modelu wizyjnego),
+  jedną na proces dla danych ustawień (get_ocr_engine)
+- Tani detektor obecności tekstu (gęstość krawędzi + kontrast) - zdjęcia
+  bez tekstu nie uruchamiają Tesseracta
+- Konfigurowalny tryb segmentacji strony (--psm) i silnik (--oem)
+"""
+
+import io
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict
+
+import pytesseract
+from PIL import Image, ImageFilter, ImageStat
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OCR_LANG = "pol"
+DEFAULT_PSM = 3              # Automatyczna segmentacja strony (domyślna w Tesseract)
+DEFAULT_OEM = 3              # Domyślny silnik (LSTM jeśli dostępny)
+DEFAULT_MAX_WORKERS = 2      # Każde wywołanie to osobny proces tesseract
+
+# Detektor tekstu - progi dobrane zachowawczo (lepiej OCR-ować za dużo niż zgubić tekst)
+DETECTION_MAX_SIDE = 1024    # Detektor liczy na zmniejszonej kopii obrazu
+EDGE_THRESHOLD = 64          # Jasność piksela po FIND_EDGES uznawana za krawędź
+MIN_EDGE_DENSITY = 0.02      # Minimalny udział pikseli krawędzi
+MIN_CONTRAST = 20.0          # Minimalne odchylenie standardowe jasności
+
+
+class OCREngine:
+    """
+    OCR obrazów z pulą workerów i pomijaniem obrazów bez tekstu.
+
+    Tesseract uruchamiany jest przez pytesseract jako osobny proces, więc
+    pula wątków daje prawdziwą równoległość bez kopiowania danych obrazów
+    między procesami Pythona.
+    """
+
+    def __init__(
+        self,
+        lang: str = DEFAULT_OCR_LANG,
+        psm: int = DEFAULT_PSM,
+        oem: int = DEFAULT_OEM,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        detect_text: bool = True,
+        min_edge_density: float = MIN_EDGE_DENSITY,
+        min_contrast: float = MIN_CONTRAST
+    ):
+        """
+        Inicjalizuje silnik OCR.
+
+        Args:
+            lang: Język(i) Tesseract, np. "pol" lub "pol+eng"
+            psm: Tryb segmentacji strony (3 = auto, 6 = blok tekstu, 11 = tekst rozproszony)
+            oem: Tryb silnika OCR
+            max_workers: Liczba równoległych wywołań Tesseract
+            detect_text: Czy pomijać obrazy, na których detektor nie widzi tekstu
+            min_edge_density: Próg gęstości krawędzi detektora
+            min_contrast: Próg kontrastu detektora
+        """
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self.max_workers = max(1, max_workers)
+        self.detect_text = detect_text
+        self.min_edge_density = min_edge_density
+        self.min_contrast = min_contrast
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ocr")
+        self._stats_lock = threading.Lock()
+        self.stats = {'recognized': 0, 'skipped': 0}
+
+        logger.info(f"OCREngine: lang={lang}, psm={psm}, oem={oem}, workerów={self.max_workers}, "
+                    f"detekcja tekstu={'tak' if detect_text else 'nie'}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'OCREngine':
+        """Tworzy silnik na podstawie sekcji "ocr" konfiguracji"""
+        return cls(
+            lang=config.get('lang', DEFAULT_OCR_LANG),
+            psm=config.get('psm', DEFAULT_PSM),
+            oem=config.get('oem', DEFAULT_OEM),
+            max_workers=config.get('max_workers', DEFAULT_MAX_WORKERS),
+            detect_text=config.get('detect_text', True),
+            min_edge_density=config.get('min_edge_density', MIN_EDGE_DENSITY),
+            min_contrast=config.get('min_contrast', MIN_CONTRAST)
+        )
+
+    def params(self) -> Dict[str, Any]:
+        """Parametry wpływające na wynik OCR (część wersji cache)"""
+        return {
+            'lang': self.lang, 'psm': self.psm, 'oem': self.oem,
+            'detect_text': self.detect_text,
+            'min_edge_density': self.min_edge_density, 'min_contrast': self.min_contrast
+        }
+
+    def submit(self, image_bytes: bytes) -> Future:
+        """Zleca OCR obrazu w tle (Future z tekstem)"""
+        return self._executor.submit(self.recognize, image_bytes)
+
+    def recognize(self, image_bytes: bytes) -> str:
+        """
+        Rozpoznaje tekst na obrazie.
+
+        Args:
+            image_bytes: Surowe dane obrazu
+
+        Returns:
+            Rozpoznany tekst (pusty string gdy obraz pominięto)
+        """
+        image = Image.open(io.BytesIO(image_bytes))
+        image.load()
+
+        if self.detect_text and not self.has_text(image):
+            self._count('skipped')
+            logger.debug(f"OCR pominięty - detektor nie wykrył tekstu ({image.width}x{image.height})")
+            return ""
+
+        text = pytesseract.image_to_string(image, lang=self.lang, config=f"--psm {self.psm} --oem {self.oem}")
+        self._count('recognized')
+        return text
+
+    def _count(self, key: str):
+        # recognize działa w wątkach puli
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def has_text(self, image: Image.Image) -> bool:
+        """
+        Szybka heurystyka obecności tekstu.
+
+        Tekst daje dużo ostrych krawędzi przy wyraźnym kontraście. Gładkie
+        zdjęcia, gradienty i rozmyte tła odpadają przed uruchomieniem Tesseracta.
+        """
+        gray = image.convert('L')
+        if max(gray.size) > DETECTION_MAX_SIDE:
+            gray.thumbnail((DETECTION_MAX_SIDE, DETECTION_MAX_SIDE))
+
+        contrast = ImageStat.Stat(gray).stddev[0]
+        if contrast < self.min_contrast:
+            return False
+
+        histogram = gray.filter(ImageFilter.FIND_EDGES).histogram()
+        edge_density = sum(histogram[EDGE_THRESHOLD:]) / max(1, sum(histogram))
+        return edge_density >= self.min_edge_density
+
+    def close(self):
+        """Zamyka pulę workerów"""
+        self._executor.shutdown(wait=False)
+
+
+_engines: Dict[str, OCREngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_ocr_engine(config: Dict[str, Any]) -> OCREngine:
+    """
+    Zwraca silnik OCR wspólny dla procesu.
+
+    Procesory dokumentów (po jednym na profil) i kolejne przebudowy RAGSystem
+    przez Streamlit używają tej samej puli workerów zamiast tworzyć nowe,
+    nigdy niezamykane. Osobny silnik powstaje tylko dla innych ustawień.
+
+    Args:
+        config: Sekcja "ocr" konfiguracji
+
+    Returns:
+        Instancja OCREngine
+    """
+    # "enabled" decyduje tylko, czy procesor w ogóle używa OCR (profile) - nie tworzy osobnej puli
+    key = json.dumps({k: v for k, v in config.items() if k != 'enabled'}, sort_keys=True, default=str)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = OCREngine.from_config(config)
+        return engine
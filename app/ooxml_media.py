@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OOXML Media - odczyt grafik bezpośrednio z archiwum zip plików Office.
+
+Pliki DOCX i XLSX to archiwa zip - grafiki leżą w word/media/* i xl/media/*,
+a powiązanie część dokumentu → obraz opisują pliki relacji (*.rels).
+Czytamy je wprost z zip, bez budowania modelu obiektowego dokumentu:
+- DOCX: obrazy w tekście i pływające (a:blip), stare obrazy VML (v:imagedata),
+  również w nagłówkach, stopkach i przypisach
+- XLSX: obrazy z rysunków (drawing) przypisane do arkuszy
+"""
+
+import logging
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Typy relacji (końcówki URI - identyczne w Transitional i Strict OOXML)
+REL_OFFICE_DOCUMENT = '/officeDocument'
+REL_WORKSHEET = '/worksheet'
+REL_DRAWING = '/drawing'
+REL_IMAGE = '/image'
+
+# Części DOCX powiązane z dokumentem, w których mogą być obrazy
+DOCX_SUBPART_TYPES = ('/header', '/footer', '/footnotes', '/endnotes')
+
+# Elementy odwołujące się do obrazu i ich atrybuty z identyfikatorem relacji
+_IMAGE_REFERENCES = {'blip': 'embed', 'imagedata': 'id'}
+
+
+def _local(tag: str) -> str:
+    """Zwraca nazwę elementu/atrybutu bez przestrzeni nazw"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _rels_path(part_name: str) -> str:
+    """Ścieżka pliku relacji dla danej części (np. xl/_rels/workbook.xml.rels)"""
+    directory, name = posixpath.split(part_name)
+    return posixpath.join(directory, '_rels', f"{name}.rels")
+
+
+def read_relationships(zf: zipfile.ZipFile, part_name: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Czyta relacje części dokumentu.
+
+    Args:
+        zf: Otwarte archiwum OOXML
+        part_name: Nazwa części, np. "xl/workbook.xml"
+
+    Returns:
+        Słownik rId -> (typ relacji, pełna nazwa części docelowej w zip).
+        Relacje zewnętrzne (linki) są pomijane.
+    """
+    try:
+        root = ET.fromstring(zf.read(_rels_path(part_name)))
+    except KeyError:
+        return {}
+
+    base_dir = posixpath.dirname(part_name)
+    relationships = {}
+    for rel in root:
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(base_dir, target))
+        relationships[rel.get('Id')] = (rel.get('Type', ''), target)
+    return relationships
+
+
+def main_part(zf: zipfile.ZipFile) -> str:
+    """Zwraca nazwę głównej części dokumentu (np. word/document.xml, xl/workbook.xml)"""
+    for rel_type, target in read_relationships(zf, '').values():
+        if rel_type.endswith(REL_OFFICE_DOCUMENT):
+            return target
+    raise KeyError("Brak relacji officeDocument w _rels/.rels")
+
+
+def _image_targets(zf: zipfile.ZipFile, part_name: str) -> List[str]:
+    """Zwraca części obrazów osadzonych w części (kolejność wystąpienia, bez powtórzeń)"""
+    relationships = read_relationships(zf, part_name)
+    images = {rid: target for rid, (rel_type, target) in relationships.items() if rel_type.endswith(REL_IMAGE)}
+    if not images:
+        return []
+
+    targets = []
+    for element in ET.fromstring(zf.read(part_name)).iter():
+        id_attr = _IMAGE_REFERENCES.get(_local(element.tag))
+        if id_attr is None:
+            continue
+        for attr, value in element.attrib.items():
+            if _local(attr) == id_attr and value in images and images[value] not in targets:
+                targets.append(images[value])
+    return targets
+
+
+def docx_media(zf: zipfile.ZipFile) -> List[str]:
+    """
+    Zwraca grafiki dokumentu DOCX.
+
+    Args:
+        zf: Otwarte archiwum DOCX
+
+    Returns:
+        Lista części word/media/* - najpierw treść dokumentu (w kolejności
+        wystąpienia), potem nagłówki, stopki i przypisy
+    """
+    document_part = main_part(zf)
+    media = _image_targets(zf, document_part)
+
+    for rel_type, subpart in read_relationships(zf, document_part).values():
+        if rel_type.endswith(DOCX_SUBPART_TYPES) and subpart in zf.NameToInfo:
+            media.extend(t for t in _image_targets(zf, subpart) if t not in media)
+    return media
+
+
+def xlsx_sheet_media(zf: zipfile.ZipFile) -> List[Tuple[str, List[str]]]:
+    """
+    Mapuje arkusze XLSX na osadzone w nich grafiki.
+
+    Args:
+        zf: Otwarte archiwum XLSX
+
+    Returns:
+        Lista (nazwa arkusza, [części xl/media/*]) w kolejności arkuszy
+        (również arkusze wykresów - z pustą listą, żeby indeksy zgadzały się z sheetnames)
+    """
+    workbook_part = main_part(zf)
+    relationships = read_relationships(zf, workbook_part)
+
+    result = []
+    for element in ET.fromstring(zf.read(workbook_part)).iter():
+        if _local(element.tag) != 'sheet':
+            continue
+        rid = next((v for k, v in element.attrib.items() if _local(k) == 'id'), None)
+        rel_type, sheet_part = relationships.get(rid, ('', ''))
+
+        media = []
+        if rel_type.endswith(REL_WORKSHEET):  # Arkusze wykresów nie mają grafik w xl/media
+            for drawing_type, drawing_part in read_relationships(zf, sheet_part).values():
+                if drawing_type.endswith(REL_DRAWING):
+                    media.extend(t for t in _image_targets(zf, drawing_part) if t not in media)
+        result.append((element.get('name', ''), media))
+    return result
+
+
+def iter_media_bytes(zf: zipfile.ZipFile, parts: List[str]) -> Iterator[Tuple[int, bytes]]:
+    """
+    Odczytuje dane grafik po kolei (w pamięci tylko jedna grafika naraz).
+
+    Args:
+        zf: Otwarte archiwum OOXML
+        parts: Nazwy części grafik
+
+    Yields:
+        (indeks grafiki, dane)
+    """
+    for idx, part in enumerate(parts):
+        try:
+            yield idx, zf.read(part)
+        except KeyError:
+            logger.debug(f"Brak części {part} w archiwum")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF Extraction - ekstrakcja tekstu i grafik z zakresów stron PDF.
+
+Moduł jest celowo lekki (pdfplumber + PIL), bo funkcje z niego są
+uruchamiane w osobnych procesach przy równoległym przetwarzaniu dużych PDF:
+- Podział dokumentu na zakresy stron
+- Ekstrakcja tekstu + surowych danych grafik strona po stronie
+- Zwalnianie cache strony zaraz po jej przetworzeniu (stała pamięć per proces)
+"""
+
+import io
+import logging
+from typing import List, Optional, Tuple
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# (numer_strony, tekst, [surowe dane grafik])
+PageContent = Tuple[int, str, List[bytes]]
+
+# Sygnatury formatów, które model wizyjny przyjmuje bez konwersji
+_IMAGE_SIGNATURES = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n')
+
+# Przestrzenie kolorów PDF -> tryby PIL (dla strumieni z surowymi pikselami)
+_COLORSPACE_MODES = {'DeviceRGB': 'RGB', 'DeviceGray': 'L', 'DeviceCMYK': 'CMYK'}
+
+
+def count_pdf_pages(file_path: str) -> int:
+    """
+    Zwraca liczbę stron PDF bez parsowania ich zawartości.
+
+    Args:
+        file_path: Ścieżka do pliku PDF
+
+    Returns:
+        Liczba stron
+    """
+    from pdfminer.pdfpage import PDFPage
+
+    with pdfplumber.open(file_path) as pdf:
+        # Iteracja po drzewie stron pdfminer - bez tworzenia obiektów Page
+        return sum(1 for _ in PDFPage.create_pages(pdf.doc))
+
+
+def split_page_ranges(total_pages: int, pages_per_range: int) -> List[Tuple[int, int]]:
+    """
+    Dzieli dokument na zakresy stron (1-indeksowane, włącznie).
+
+    Args:
+        total_pages: Liczba stron dokumentu
+        pages_per_range: Maksymalna liczba stron w zakresie
+
+    Returns:
+        Lista krotek (pierwsza_strona, ostatnia_strona) w kolejności stron
+    """
+    pages_per_range = max(1, pages_per_range)
+    return [
+        (first, min(first + pages_per_range - 1, total_pages))
+        for first in range(1, total_pages + 1, pages_per_range)
+    ]
+
+
+def extract_pdf_pages(file_path: str, first_page: int, last_page: int) -> List[PageContent]:
+    """
+    Wyciąga tekst i surowe dane grafik z zakresu stron PDF.
+
+    Zwraca wyłącznie proste typy (int/str/bytes), więc wynik można bezpiecznie
+    przekazać między procesami. Cache każdej strony jest zwalniany od razu po
+    jej przetworzeniu, więc zużycie pamięci nie rośnie z długością zakresu.
+
+    Args:
+        file_path: Ścieżka do pliku PDF
+        first_page: Pierwsza strona zakresu (od 1)
+        last_page: Ostatnia strona zakresu (włącznie)
+
+    Returns:
+        Lista krotek (numer_strony, tekst, [dane grafik]) w kolejności stron
+    """
+    # Wyłączenie logowania pdfminer (również w procesach potomnych)
+    logging.getLogger("pdfminer").setLevel(logging.CRITICAL)
+
+    pages = []
+    with pdfplumber.open(file_path, pages=list(range(first_page, last_page + 1))) as pdf:
+        for page in pdf.pages:
+            page_num = page.page_number
+            try:
+                text = page.extract_text() or ""
+
+                images = []
+                for img_idx, img_obj in enumerate(page.images):
+                    try:
+                        images.append(_image_bytes(img_obj))
+                    except Exception as e:
+                        logger.debug(f"Nie udało się odczytać grafiki {img_idx+1} na stronie {page_num}: {e}")
+
+                pages.append((page_num, text, images))
+            except Exception as e:
+                logger.error(f"Błąd podczas ekstrakcji strony {page_num} z {file_path}: {e}")
+            finally:
+                # Zwolnienie cache strony (obiekty layoutu pdfminer)
+                page.close()
+
+    return pages
+
+
+def _image_bytes(img_obj) -> bytes:
+    """
+    Zwraca dane grafiki z PDF w formacie obrazu.
+
+    Strumienie DCTDecode to gotowe pliki JPEG. Strumienie FlateDecode po
+    zdekodowaniu zawierają surowe piksele - odtwarzamy z nich PNG, żeby
+    dalszy pipeline obrazów mógł je zdekodować.
+    """
+    data = img_obj['stream'].get_data()
+    if data.startswith(_IMAGE_SIGNATURES):
+        return data
+
+    mode = _pixel_mode(img_obj.get('colorspace'))
+    width, height = img_obj.get('srcsize', (0, 0))
+    if mode is None or img_obj.get('bits') != 8 or not width or not height:
+        return data
+
+    expected = width * height * len(mode)
+    if len(data) < expected:
+        return data
+
+    from PIL import Image
+    image = Image.frombytes(mode, (int(width), int(height)), data[:expected])
+    if image.mode == 'CMYK':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _pixel_mode(colorspace) -> Optional[str]:
+    """Mapuje przestrzeń kolorów pdfminer na tryb PIL (None jeśli nieobsługiwana)"""
+    if not colorspace:
+        return None
+    name = getattr(colorspace[0], 'name', None)
+    if isinstance(name, bytes):
+        name = name.decode('latin-1')
+    return _COLORSPACE_MODES.get(name)
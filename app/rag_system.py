@@ -8,15 +8,21 @@ Wykorzystuje lokalne modele Ollama: Gemma 3:12B do opisu grafik i rozmów o praw
 """
 
 import os
+import io
 import sys
 import json
 import uuid
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Callable, Iterator, Optional
 from dataclasses import dataclass, field
 from pathlib import Path
 import shutil
 import time
+import threading
+import multiprocessing
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
 # WYŁĄCZENIE LOGOWANIA PDFMINER NA SAMYM POCZĄTKU
 try:
@@ -47,7 +53,6 @@ import pdfplumber
 from docx import Document
 import openpyxl
 from PIL import Image
-import pytesseract
 
 # Przetwarzanie języka naturalnego
 from sentence_transformers import SentenceTransformer
@@ -61,7 +66,8 @@ import requests
 from greeting_filter import GreetingFilter
 
 # Model providers (OpenAI, Ollama)
-from model_provider import ModelFactory, ModelProvider
+from model_provider import DEFAULT_KEEP_ALIVE, GenerationStats, ModelFactory, ModelProvider
+from context_builder import ContextBuilder, ContextFragment, context_window
 
 # Hybrydowe wyszukiwanie
 from hybrid_search import HybridSearch
@@ -75,6 +81,49 @@ from device_manager import DeviceManager
 # Web search (intranet/internet)
 from web_search import BingSearchProvider, WebScraper, WebSearchCache
 
+# Ekstrakcja stron PDF (również w procesach potomnych)
+from pdf_extraction import count_pdf_pages, split_page_ranges, extract_pdf_pages
+
+# Przygotowanie obrazów w pamięci + deduplikacja
+from image_pipeline import ImagePipeline
+
+# Klient modelu wizyjnego (Ollama)
+from vision_client import get_vision_client
+
+# OCR w tle z pomijaniem obrazów bez tekstu
+from ocr_engine import get_ocr_engine
+
+# Podział tekstu na fragmenty mierzone w tokenach
+from text_chunker import TextChunker
+
+# Współdzielony model Whisper (leniwe ładowanie, zwalnianie po bezczynności)
+from whisper_manager import get_whisper_manager
+
+# Transkrypcja długich nagrań w oknach mowy (VAD + repliki Whisper)
+from audio_transcription import (SAMPLE_RATE, AudioDecodeError, ChunkedTranscriber, load_audio,
+                                 merge_window_results, stitch_window)
+
+# Rozpoznawanie mówców (cechy ramek liczone raz dla całego nagrania)
+from speaker_diarization import create_diarizer
+
+# Klatki wideo próbkowane jednym przebiegiem strumienia
+from video_frames import DEFAULT_SAMPLE_INTERVAL, FrameChangeFilter, iter_frames, probe_video
+
+# Łączenie segmentów audio i klatek wideo w okna czasowe
+from timeline_windows import TimelineWindower, format_timestamp
+
+# Grafiki z plików Office czytane wprost z archiwum zip
+from ooxml_media import docx_media, xlsx_sheet_media, iter_media_bytes
+
+# Trwały cache opisów obrazów, OCR i transkrypcji
+from artifact_cache import get_artifact_cache, hash_bytes, hash_file, params_version
+
+# Stan indeksowania plików (postęp, wznawianie przerwanych nagrań)
+from index_status import get_index_status_store
+
+# Profile indeksowania (fast / balanced / thorough)
+from ingestion_profiles import apply_profile, get_profile, resolve_profile
+
 # Konfiguracja logowania - bardziej szczegółowa
 logging.basicConfig(
     level=logging.INFO,  # Zmienione z DEBUG na INFO
@@ -109,6 +158,24 @@ for directory in [MODELS_DIR, WHISPER_MODELS_DIR, EMBEDDING_MODELS_DIR, RERANKER
 # Konfiguracja modeli
 VISION_MODEL = "gemma3:12b"  # Model multimodalny do opisu grafik
 LLM_MODEL = "gemma3:12b"     # Model do generowania odpowiedzi
+VISION_PROMPT = "Opisz szczegółowo co znajduje się na tym obrazie. Odpowiedz po polsku."
+VISION_BATCH_SIZE = 32       # Liczba obrazów/klatek zbieranych przed równoległym wysłaniem do modelu
+
+# OCR (Tesseract) - nazwa modelu w cache, parametry w sekcji "ocr" konfiguracji
+OCR_MODEL = "tesseract"
+
+# Strumieniowe przetwarzanie XLSX (grupy wierszy z nagłówkiem w każdym fragmencie,
+# limit tokenów z sekcji "chunking")
+XLSX_ROWS_PER_CHUNK = 50
+XLSX_PUBLISH_CHUNKS = 64      # Fragmentów arkusza publikowanych naraz (indeksowanie z UI/watchera)
+
+# Równoległe przetwarzanie dużych PDF (zakresy stron w osobnych procesach)
+PDF_PARALLEL_MIN_PAGES = 64   # Mniejsze PDF przetwarzane w jednym procesie
+PDF_PAGES_PER_WORKER = 32     # Liczba stron w jednym zakresie
+PDF_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+# Publikacja fragmentów długich nagrań w trakcie przetwarzania
+INDEX_BM25_REFRESH_SECONDS = 30    # Odstęp między zapisami BM25 przy publikacji przyrostowej
 
 # Plik z sugerowanymi pytaniami
 SUGGESTED_QUESTIONS_FILE = BASE_DIR / "suggested_questions.json"
@@ -124,6 +191,43 @@ class DocumentChunk:
     element_id: str = ""  # ID elementu w dokumencie (np. numer sekcji)
     embedding: List[float] = field(default_factory=list)
 
+# Publikacja przyrostowa: publish(etap, fragmenty, wykonane, łącznie)
+PublishCallback = Callable[[str, List['DocumentChunk'], int, int], None]
+
+
+def stable_chunk_id(source_file: str, element_id: str) -> str:
+    """
+    Zwraca deterministyczne ID fragmentu.
+
+    Ten sam fragment ponownie przetworzonego pliku (wznowienie, dopisanie
+    mówców) nadpisuje poprzednią wersję w bazie zamiast tworzyć duplikat.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"rag://{source_file}#{element_id}"))
+
+
+def with_script_context(fn: Callable) -> Callable:
+    """
+    Przenosi kontekst skryptu Streamlit bieżącego wątku do wątku roboczego.
+
+    Bez niego wywołania UI z progress_callback w wątku w tle (gałąź audio
+    wideo) są przez Streamlit pomijane. Poza Streamlit (watcher, CLI)
+    zwraca fn bez zmian.
+    """
+    if 'streamlit' not in sys.modules:
+        return fn
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:
+        return fn
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return fn
+
+    def run(*args, **kwargs):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+    return run
+
 @dataclass
 class SourceReference:
     """Reprezentacja odniesienia do źródła"""
@@ -132,13 +236,61 @@ class SourceReference:
     element_id: str
     content: str
     distance: float = 0.0
+    id: str = ""
+    chunk_type: str = "text"
 
 class DocumentProcessor:
     """Klasa do przetwarzania różnych formatów dokumentów"""
     
-    def __init__(self):
+    def __init__(self, config: Dict[str, Any] = None, profile: Optional[str] = None):
+        """
+        Args:
+            config: Konfiguracja aplikacji (auth_config.json)
+            profile: Profil indeksowania (fast / balanced / thorough, None = domyślny)
+        """
         self.supported_formats = {'.pdf', '.docx', '.xlsx', '.jpg', '.jpeg', '.png', '.bmp'}
-        logger.info("Inicjalizacja DocumentProcessor")
+        base_config = config or {}
+        
+        # Profil indeksowania nadpisuje kosztowne ustawienia sekcji konfiguracji
+        self.profile = resolve_profile(base_config, profile)
+        overrides = get_profile(base_config, self.profile)
+        self.config = apply_profile(base_config, overrides)
+        logger.info(f"Inicjalizacja DocumentProcessor (profil: {self.profile})")
+        
+        # OCR obrazów, opis grafik osadzonych w dokumentach i próbkowanie klatek wideo
+        self.ocr_enabled = self.config.get('ocr', {}).get('enabled', True)
+        self.describe_embedded_images = self.config.get('vision', {}).get('embedded_images', True)
+        self.frame_interval = self.config.get('video', {}).get('sample_interval', DEFAULT_SAMPLE_INTERVAL)
+        
+        # Wspólny pipeline obrazów - deduplikacja opisów między dokumentami
+        self.image_pipeline = ImagePipeline.from_config(self.config.get('images', {}))
+        
+        # Klient modelu wizyjnego wspólny dla procesu (pula połączeń, limit równoległych żądań)
+        self.vision_client = get_vision_client(self.config)
+        
+        # Wspólny podział tekstu na fragmenty (limit w tokenach e5)
+        self.chunker = TextChunker.from_config(self.config.get('chunking', {}))
+        
+        # OCR w puli workerów (równolegle z opisem obrazu)
+        self.ocr_engine = get_ocr_engine(self.config.get('ocr', {}))
+        
+        # Model Whisper wspólny dla całego procesu (watcher, UI, CLI); profil może wskazać inny rozmiar
+        self.whisper = get_whisper_manager(base_config.get('whisper', {}))
+        self.whisper_model = overrides.get('whisper', {}).get('model')
+        self.transcriber = ChunkedTranscriber.from_config(self.whisper, self.config.get('whisper', {}))
+        
+        # Trwały cache wyników (opisy obrazów, OCR, transkrypcje)
+        self.artifact_cache = get_artifact_cache(self.config.get('artifact_cache', {}))
+        self._vision_version = params_version({'prompt': VISION_PROMPT, **self.image_pipeline.encoding_params()})
+        self._ocr_version = params_version(self.ocr_engine.params())
+        
+        # Okna czasowe fragmentów nagrań (sekcja "consolidation": długość i limit tokenów)
+        consolidation = self.config.get('consolidation', {})
+        self.audio_windower = TimelineWindower.from_config(consolidation, "audio")
+        self.video_windower = TimelineWindower.from_config(consolidation, "video")
+        
+        # Rozpoznawanie mówców (backend z sekcji "diarization": cechy MFCC lub embeddingi ECAPA)
+        self.diarizer = create_diarizer(self.config.get('diarization', {}), self.artifact_cache)
     
     def process_directory(self, directory_path: str) -> List[DocumentChunk]:
         """Przetwarza wszystkie obsługiwane pliki w katalogu"""
@@ -170,8 +322,18 @@ class DocumentProcessor:
         logger.info(f"Zakończono przetwarzanie katalogu. Łącznie fragmentów: {len(chunks)}")
         return chunks
     
-    def process_file(self, file_path: Path) -> List[DocumentChunk]:
-        """Przetwarza pojedynczy plik zgodnie z jego rozszerzeniem"""
+    def process_file(self, file_path: Path, publish: Optional[PublishCallback] = None) -> List[DocumentChunk]:
+        """
+        Przetwarza pojedynczy plik zgodnie z jego rozszerzeniem.
+        
+        Args:
+            file_path: Ścieżka do pliku
+            publish: Publikacja fragmentów w trakcie przetwarzania (audio/wideo/XLSX) -
+                wywoływana po każdym oknie transkrypcji / paczce klatek / paczce wierszy
+        
+        Returns:
+            Wszystkie fragmenty pliku (w wersji ostatecznej)
+        """
         suffix = file_path.suffix.lower()
         logger.debug(f"Rozpoczynanie przetwarzania pliku {file_path} (typ: {suffix})")
         
@@ -180,19 +342,19 @@ class DocumentProcessor:
         elif suffix == '.docx':
             return self._process_docx(file_path)
         elif suffix == '.xlsx':
-            return self._process_xlsx(file_path)
+            return self._process_xlsx(file_path, publish)
         elif suffix in ['.jpg', '.jpeg', '.png', '.bmp']:
             return self._process_image(file_path)
         elif suffix in ['.mp3', '.wav', '.flac', '.ogg', '.m4a']:
-            return self._process_audio(file_path)
+            return self._process_audio(file_path, publish)
         elif suffix in ['.mp4', '.avi', '.mov', '.mkv', '.webm']:
-            return self._process_video(file_path)
+            return self._process_video(file_path, publish)
         else:
             logger.warning(f"Nieobsługiwany format pliku: {suffix}")
             return []
     
     def _process_pdf(self, file_path: Path) -> List[DocumentChunk]:
-        """Przetwarza plik PDF"""
+        """Przetwarza plik PDF (duże pliki równolegle, w zakresach stron)"""
         logger.info(f"Rozpoczynanie przetwarzania PDF: {file_path}")
         chunks = []
         
@@ -202,56 +364,33 @@ class DocumentProcessor:
             original_level = pdfminer_logger.level
             pdfminer_logger.setLevel(logging.CRITICAL)
             
-            with pdfplumber.open(file_path) as pdf:
-                logger.info(f"PDF {file_path} ma {len(pdf.pages)} stron")
-                for page_num, page in enumerate(pdf.pages, 1):
-                    logger.debug(f"Przetwarzanie strony {page_num}")
-                    
-                    # Ekstrakcja tekstu
-                    text = page.extract_text()
-                    if text:
-                        text_chunks = self._chunk_text(text)
-                        logger.debug(f"Znaleziono tekst na stronie {page_num}, podzielono na {len(text_chunks)} fragmentów")
-                        for i, chunk in enumerate(text_chunks):
-                            chunks.append(DocumentChunk(
-                                id=str(uuid.uuid4()),
-                                content=chunk,
-                                source_file=file_path.name,
-                                page_number=page_num,
-                                chunk_type='text',
-                                element_id=f"tekst_{page_num}_{i+1}"
-                            ))
-                    
-                    # Ekstrakcja obrazów
-                    if page.images:
-                        logger.info(f"Znaleziono {len(page.images)} grafik na stronie {page_num}")
-                        for img_idx, img_obj in enumerate(page.images):
-                            try:
-                                logger.debug(f"Przetwarzanie grafiki {img_idx+1}/{len(page.images)} na stronie {page_num}")
-                                # Zapis obrazu tymczasowo
-                                img_data = img_obj['stream'].get_data()
-                                img_path = TEMP_DIR / f"temp_img_{uuid.uuid4()}.png"
-                                
-                                with open(img_path, 'wb') as f:
-                                    f.write(img_data)
-                                
-                                # Opis obrazu
-                                description = self._describe_image(img_path)
-                                if description:
-                                    logger.debug(f"Wygenerowano opis grafiki, długość: {len(description)} znaków")
-                                    chunks.append(DocumentChunk(
-                                        id=str(uuid.uuid4()),
-                                        content=description,
-                                        source_file=file_path.name,
-                                        page_number=page_num,
-                                        chunk_type='image_description',
-                                        element_id=f"grafika_{page_num}_{img_idx+1}"
-                                    ))
-                                
-                                # Usunięcie tymczasowego pliku
-                                img_path.unlink()
-                            except Exception as e:
-                                logger.error(f"Błąd podczas przetwarzania obrazu {img_idx+1} na stronie {page_num}: {e}")
+            total_pages = count_pdf_pages(str(file_path))
+            logger.info(f"PDF {file_path} ma {total_pages} stron")
+            seen_images = set()  # Powtarzające się grafiki (np. logo) opisujemy raz na dokument
+            
+            # Strony czekające na opis grafik - grafiki z kilku stron idą do modelu równolegle
+            pending_pages = []
+            pending_images = 0
+            
+            for page_num, text, images in self._iter_pdf_pages(file_path, total_pages):
+                logger.debug(f"Przetwarzanie strony {page_num}")
+                if not self.describe_embedded_images:
+                    images = []  # Profil bez opisu grafik osadzonych (np. "fast")
+                
+                text_chunks = self._chunk_text(text) if text else []
+                if text_chunks:
+                    logger.debug(f"Znaleziono tekst na stronie {page_num}, podzielono na {len(text_chunks)} fragmentów")
+                if images:
+                    logger.info(f"Znaleziono {len(images)} grafik na stronie {page_num}")
+                
+                pending_pages.append((page_num, text_chunks, images))
+                pending_images += len(images)
+                
+                if pending_images >= VISION_BATCH_SIZE or pending_images == 0:
+                    chunks.extend(self._build_pdf_chunks(file_path, pending_pages, seen_images))
+                    pending_pages, pending_images = [], 0
+            
+            chunks.extend(self._build_pdf_chunks(file_path, pending_pages, seen_images))
             
             # Przywrócenie oryginalnego poziomu logowania
             pdfminer_logger.setLevel(original_level)
@@ -262,6 +401,93 @@ class DocumentProcessor:
         
         return chunks
     
+    def _build_pdf_chunks(self, file_path: Path, pages: List[Tuple[int, List[str], List[bytes]]],
+                          seen_images: set) -> List[DocumentChunk]:
+        """Tworzy fragmenty dla grupy stron PDF (grafiki opisywane jednym wywołaniem równoległym)"""
+        all_images = [img_data for _, _, images in pages for img_data in images]
+        descriptions = iter(self._describe_images_data(all_images, seen_images))
+        chunks = []
+        
+        for page_num, text_chunks, images in pages:
+            for i, chunk in enumerate(text_chunks):
+                chunks.append(DocumentChunk(
+                    id=str(uuid.uuid4()),
+                    content=chunk,
+                    source_file=file_path.name,
+                    page_number=page_num,
+                    chunk_type='text',
+                    element_id=f"tekst_{page_num}_{i+1}"
+                ))
+            
+            for img_idx in range(len(images)):
+                description = next(descriptions)
+                if description:
+                    logger.debug(f"Wygenerowano opis grafiki, długość: {len(description)} znaków")
+                    chunks.append(DocumentChunk(
+                        id=str(uuid.uuid4()),
+                        content=description,
+                        source_file=file_path.name,
+                        page_number=page_num,
+                        chunk_type='image_description',
+                        element_id=f"grafika_{page_num}_{img_idx+1}"
+                    ))
+        
+        return chunks
+    
+    def _iter_pdf_pages(self, file_path: Path, total_pages: int):
+        """
+        Zwraca kolejne strony PDF jako (numer_strony, tekst, [dane grafik]).
+        
+        Duże PDF są dzielone na zakresy stron przetwarzane w osobnych procesach.
+        Wyniki zakresów są oddawane w kolejności stron, a każdy zakres jest
+        zwalniany z pamięci zaraz po skonsumowaniu. W toku jest najwyżej tyle
+        zakresów, ile procesów - kolejny zlecany jest dopiero po skonsumowaniu
+        poprzedniego, więc przy wolnym opisie grafik pamięć nie rośnie z liczbą stron.
+        """
+        page_ranges = split_page_ranges(total_pages, PDF_PAGES_PER_WORKER)
+        
+        if total_pages < PDF_PARALLEL_MIN_PAGES or PDF_MAX_WORKERS < 2 or len(page_ranges) < 2:
+            for first_page, last_page in page_ranges:
+                yield from extract_pdf_pages(str(file_path), first_page, last_page)
+            return
+        
+        workers = min(PDF_MAX_WORKERS, len(page_ranges))
+        logger.info(f"Równoległe przetwarzanie PDF: {len(page_ranges)} zakresów po {PDF_PAGES_PER_WORKER} stron, {workers} procesów")
+        
+        # spawn zamiast fork - proces nadrzędny może mieć wątki (Streamlit, watchdog) i zainicjalizowane CUDA
+        mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+            in_flight = deque()  # (zakres, future) w kolejności stron
+            next_range = 0
+            
+            def submit_next():
+                nonlocal next_range
+                if next_range < len(page_ranges):
+                    first, last = page_ranges[next_range]
+                    in_flight.append(((first, last), executor.submit(extract_pdf_pages, str(file_path), first, last)))
+                    next_range += 1
+            
+            for _ in range(workers):
+                submit_next()
+            try:
+                while in_flight:
+                    (first_page, last_page), future = in_flight.popleft()
+                    try:
+                        range_pages = future.result()
+                    except Exception as e:
+                        logger.error(f"Błąd w procesie dla stron {first_page}-{last_page}, ponawiam lokalnie: {e}")
+                        range_pages = extract_pdf_pages(str(file_path), first_page, last_page)
+                    
+                    logger.info(f"Przetworzono strony {first_page}-{last_page}/{total_pages}")
+                    yield from range_pages
+                    # Kolejny zakres dopiero po skonsumowaniu poprzedniego - wynik trzymany tylko do tego momentu
+                    del range_pages
+                    submit_next()
+            finally:
+                # Przerwana iteracja - nie czekamy na zakresy, których nikt nie odbierze
+                for _, future in in_flight:
+                    future.cancel()
+    
     def _process_docx(self, file_path: Path) -> List[DocumentChunk]:
         """Przetwarza plik DOCX (tekst + obrazy)"""
         logger.info(f"Rozpoczynanie przetwarzania DOCX: {file_path}")
@@ -292,48 +518,14 @@ class DocumentProcessor:
                         element_id=f"sekcja_{i+1}"
                     ))
             
-            # Wyciągnij obrazy z DOCX
+            # Wyciągnij obrazy z DOCX (wprost z word/media/* - również pływające, nagłówki, stopki)
             logger.info("Wyszukiwanie obrazów w DOCX...")
             image_count = 0
             
-            # Metoda 1: inline_shapes (obrazy w tekście)
             try:
-                for shape_idx, inline_shape in enumerate(doc.inline_shapes):
-                    try:
-                        # Sprawdź czy to obraz
-                        if inline_shape.type == 3:  # 3 = PICTURE
-                            logger.debug(f"Znaleziono obraz #{shape_idx + 1} w DOCX")
-                            
-                            # Wyciągnij dane obrazu
-                            image_blob = inline_shape._inline.graphic.graphicData.pic.blipFill.blip.embed
-                            image_part = doc.part.related_parts[image_blob]
-                            image_bytes = image_part.blob
-                            
-                            # Zapisz tymczasowo
-                            img_path = TEMP_DIR / f"temp_docx_img_{uuid.uuid4()}.png"
-                            with open(img_path, 'wb') as f:
-                                f.write(image_bytes)
-                            
-                            # Rozpoznaj przez Gemma 3
-                            description = self._describe_image(img_path)
-                            if description:
-                                logger.debug(f"Wygenerowano opis obrazu z DOCX, długość: {len(description)} znaków")
-                                chunks.append(DocumentChunk(
-                                    id=str(uuid.uuid4()),
-                                    content=description,
-                                    source_file=file_path.name,
-                                    page_number=0,
-                                    chunk_type='image_description',
-                                    element_id=f"obraz_docx_{shape_idx + 1}"
-                                ))
-                                image_count += 1
-                            
-                            # Usuń temp file
-                            img_path.unlink()
-                            
-                    except Exception as img_error:
-                        logger.debug(f"Błąd przetwarzania obrazu {shape_idx + 1} w DOCX: {img_error}")
-                        continue
+                image_chunks = self._ooxml_image_chunks(file_path, docx_media, "obraz_docx")
+                chunks.extend(image_chunks)
+                image_count = len(image_chunks)
                 
                 if image_count > 0:
                     logger.info(f"Rozpoznano {image_count} obrazów w DOCX")
@@ -347,97 +539,189 @@ class DocumentProcessor:
         
         return chunks
     
-    def _process_xlsx(self, file_path: Path) -> List[DocumentChunk]:
-        """Przetwarza plik XLSX (tekst + obrazy + wykresy)"""
+    def _process_xlsx(self, file_path: Path, publish: Optional[PublishCallback] = None) -> List[DocumentChunk]:
+        """
+        Przetwarza plik XLSX strumieniowo (tekst + obrazy).
+        
+        Wiersze czytane są w trybie read-only (openpyxl nie buduje modelu
+        całego arkusza) i od razu grupowane we fragmenty z powtórzonym wierszem
+        nagłówka. Z publish fragmenty trafiają do bazy paczkami po
+        XLSX_PUBLISH_CHUNKS (embeddingi liczone na bieżąco). Zwracana lista
+        nadal zawiera wszystkie fragmenty pliku - index_file potrzebuje
+        wersji ostatecznej do usunięcia nieaktualnych fragmentów. Grafiki
+        odczytywane są bezpośrednio z części xl/media/* archiwum.
+        """
         logger.info(f"Rozpoczynanie przetwarzania XLSX: {file_path}")
         chunks = []
         
         try:
-            workbook = openpyxl.load_workbook(file_path)
-            logger.info(f"Plik XLSX {file_path} ma {len(workbook.sheetnames)} arkuszy")
-            
-            total_images = 0
-            
-            for sheet_idx, sheet_name in enumerate(workbook.sheetnames):
-                sheet = workbook[sheet_name]
-                sheet_content = []
-                
-                # Wyciągnij TEKST z komórek
-                row_count = 0
-                for row_idx, row in enumerate(sheet.iter_rows(values_only=True)):
-                    row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
-                    if row_text.strip():
-                        sheet_content.append(f"Wiersz {row_idx+1}: {row_text}")
-                        row_count += 1
-                
-                if sheet_content:
-                    text = f"Arkusz: {sheet_name}\n" + "\n".join(sheet_content)
-                    text_chunks = self._chunk_text(text)
-                    logger.debug(f"Znaleziono dane w arkuszu {sheet_name} ({row_count} wierszy), podzielono na {len(text_chunks)} fragmentów")
-                    for i, chunk in enumerate(text_chunks):
-                        chunks.append(DocumentChunk(
-                            id=str(uuid.uuid4()),
-                            content=chunk,
-                            source_file=file_path.name,
-                            page_number=0,
-                            chunk_type='text',
-                            element_id=f"arkusz_{sheet_idx+1}_fragment_{i+1}"
-                        ))
-                
-                # Wyciągnij OBRAZY z arkusza
-                logger.info(f"Wyszukiwanie obrazów w arkuszu '{sheet_name}'...")
-                try:
-                    if hasattr(sheet, '_images') and sheet._images:
-                        logger.info(f"Znaleziono {len(sheet._images)} obrazów w arkuszu '{sheet_name}'")
-                        
-                        for img_idx, image in enumerate(sheet._images):
-                            try:
-                                logger.debug(f"Przetwarzanie obrazu {img_idx + 1}/{len(sheet._images)} z arkusza '{sheet_name}'")
-                                
-                                # Wyciągnij dane obrazu (PIL Image)
-                                img_path = TEMP_DIR / f"temp_xlsx_img_{uuid.uuid4()}.png"
-                                image_pil = image._data()
-                                image_pil.save(img_path)
-                                
-                                # Rozpoznaj przez Gemma 3
-                                description = self._describe_image(img_path)
-                                if description:
-                                    logger.debug(f"Wygenerowano opis obrazu z Excel, długość: {len(description)} znaków")
-                                    chunks.append(DocumentChunk(
-                                        id=str(uuid.uuid4()),
-                                        content=description,
-                                        source_file=file_path.name,
-                                        page_number=0,
-                                        chunk_type='image_description',
-                                        element_id=f"obraz_arkusz_{sheet_idx+1}_{img_idx+1}"
-                                    ))
-                                    total_images += 1
-                                
-                                # Usuń temp file
-                                img_path.unlink()
-                                
-                            except Exception as img_error:
-                                logger.error(f"Błąd przetwarzania obrazu {img_idx + 1} w arkuszu '{sheet_name}': {img_error}")
-                                continue
-                
-                except Exception as e:
-                    logger.debug(f"Brak obrazów w arkuszu '{sheet_name}' lub błąd: {e}")
-            
-            logger.info(f"Zakończono przetwarzanie XLSX {file_path}, znaleziono {len(chunks)} fragmentów (w tym {total_images} obrazów)")
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                sheet_names = workbook.sheetnames
+                logger.info(f"Plik XLSX {file_path} ma {len(sheet_names)} arkuszy")
+                for sheet_idx, sheet_name in enumerate(sheet_names):
+                    batch = []
+                    for chunk in self._xlsx_sheet_chunks(file_path, workbook[sheet_name], sheet_idx):
+                        chunks.append(chunk)
+                        batch.append(chunk)
+                        if publish is not None and len(batch) >= XLSX_PUBLISH_CHUNKS:
+                            publish("arkusze", batch, sheet_idx, len(sheet_names))
+                            batch = []
+                    if publish is not None:
+                        publish("arkusze", batch, sheet_idx + 1, len(sheet_names))
+            finally:
+                workbook.close()
+            
+            image_chunks = self._xlsx_image_chunks(file_path)
+            chunks.extend(image_chunks)
+            
+            logger.info(f"Zakończono przetwarzanie XLSX {file_path}, znaleziono {len(chunks)} fragmentów (w tym {len(image_chunks)} obrazów)")
         except Exception as e:
             logger.error(f"Błąd podczas przetwarzania XLSX {file_path}: {e}", exc_info=True)
         
         return chunks
     
+    def _xlsx_sheet_chunks(self, file_path: Path, sheet, sheet_idx: int) -> Iterator[DocumentChunk]:
+        """
+        Dzieli wiersze arkusza na grupy (nagłówek arkusza + nagłówek tabeli w każdej grupie).
+        
+        Tokeny liczone są paczkami po XLSX_ROWS_PER_CHUNK wierszy (jedno
+        wywołanie tokenizera na paczkę). Fragmenty mają stałe ID - ponowne
+        indeksowanie nadpisuje opublikowane wcześniej wersje.
+        """
+        chunk_count = 0
+        header = None
+        header_tokens = 0
+        group = []
+        group_tokens = 0
+        pending = []  # Wiersze czekające na policzenie tokenów
+        row_count = 0
+        
+        def make_chunk() -> DocumentChunk:
+            nonlocal chunk_count
+            chunk_count += 1
+            lines = [f"Arkusz: {sheet.title}"]
+            if header:
+                lines.append(f"Nagłówek: {header}")
+            lines.extend(group)
+            element_id = f"arkusz_{sheet_idx+1}_fragment_{chunk_count}"
+            return DocumentChunk(
+                id=stable_chunk_id(file_path.name, element_id),
+                content="\n".join(lines),
+                source_file=file_path.name,
+                page_number=0,
+                chunk_type='text',
+                element_id=element_id
+            )
+        
+        def pack_pending() -> Iterator[DocumentChunk]:
+            nonlocal group, group_tokens
+            for line, line_tokens in zip(pending, self.chunker.counter.count_many(pending)):
+                if group and (len(group) >= XLSX_ROWS_PER_CHUNK
+                              or header_tokens + group_tokens + line_tokens > self.chunker.max_tokens):
+                    yield make_chunk()
+                    group = []
+                    group_tokens = 0
+                group.append(line)
+                group_tokens += line_tokens
+            pending.clear()
+        
+        for row_idx, row in enumerate(sheet.iter_rows(values_only=True)):
+            cells = [str(cell) if cell is not None else "" for cell in row]
+            while cells and not cells[-1].strip():
+                cells.pop()
+            if not cells:
+                continue
+            
+            row_text = " | ".join(cells)
+            row_count += 1
+            if header is None:
+                # Pierwszy niepusty wiersz traktujemy jako nagłówek tabeli (jest w każdym fragmencie)
+                header = row_text
+                header_tokens = self.chunker.count_tokens(f"Arkusz: {sheet.title}\nNagłówek: {header}")
+                continue
+            
+            pending.append(f"Wiersz {row_idx+1}: {row_text}")
+            if len(pending) >= XLSX_ROWS_PER_CHUNK:
+                yield from pack_pending()
+        
+        yield from pack_pending()
+        if header is not None:
+            # Ostatnia grupa (arkusz z samym nagłówkiem też trafia do bazy)
+            yield make_chunk()
+        
+        if chunk_count:
+            logger.debug(f"Znaleziono dane w arkuszu {sheet.title} ({row_count} wierszy), podzielono na {chunk_count} fragmentów")
+    
+    def _xlsx_image_chunks(self, file_path: Path) -> List[DocumentChunk]:
+        """Opisuje grafiki arkuszy czytane wprost z archiwum XLSX"""
+        chunks = []
+        seen_images = set()
+        
+        with zipfile.ZipFile(file_path) as zf:
+            for sheet_idx, (sheet_name, media_parts) in enumerate(xlsx_sheet_media(zf)):
+                if media_parts:
+                    logger.info(f"Znaleziono {len(media_parts)} obrazów w arkuszu '{sheet_name}'")
+                    chunks.extend(self._describe_media_parts(
+                        file_path, zf, media_parts, f"obraz_arkusz_{sheet_idx+1}", seen_images
+                    ))
+        
+        return chunks
+    
+    def _ooxml_image_chunks(self, file_path: Path, find_media, element_prefix: str) -> List[DocumentChunk]:
+        """Opisuje grafiki dokumentu Office wskazane przez find_media (np. docx_media)"""
+        with zipfile.ZipFile(file_path) as zf:
+            media_parts = find_media(zf)
+            logger.debug(f"Znaleziono {len(media_parts)} grafik w {file_path.name}")
+            return self._describe_media_parts(file_path, zf, media_parts, element_prefix, set())
+    
+    def _describe_media_parts(self, file_path: Path, zf: zipfile.ZipFile, media_parts: List[str],
+                              element_prefix: str, seen_images: set) -> List[DocumentChunk]:
+        """Strumieniuje grafiki z archiwum do pipeline obrazów (paczkami VISION_BATCH_SIZE)"""
+        chunks = []
+        if not self.describe_embedded_images:
+            logger.debug(f"Pomijam opis {len(media_parts)} grafik {file_path.name} (profil {self.profile})")
+            return chunks
+        batch = []  # (numer obrazu, dane obrazu)
+        
+        def flush():
+            # Rozpoznaj przez Gemma 3 (paczka obrazów równolegle)
+            descriptions = self._describe_images_data([data for _, data in batch], seen_images)
+            for (img_idx, _), description in zip(batch, descriptions):
+                if description:
+                    chunks.append(DocumentChunk(
+                        id=str(uuid.uuid4()),
+                        content=description,
+                        source_file=file_path.name,
+                        page_number=0,
+                        chunk_type='image_description',
+                        element_id=f"{element_prefix}_{img_idx+1}"
+                    ))
+            batch.clear()
+        
+        for img_idx, data in iter_media_bytes(zf, media_parts):
+            batch.append((img_idx, data))
+            if len(batch) >= VISION_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        
+        return chunks
+    
     def _process_image(self, file_path: Path) -> List[DocumentChunk]:
         """Przetwarza plik obrazu używając modelu multimodalnego Gemma 3"""
         logger.info(f"Rozpoczynanie przetwarzania obrazu: {file_path}")
         chunks = []
         
         try:
+            image_bytes = file_path.read_bytes()
+            
+            # OCR startuje w tle i działa w trakcie opisu obrazu
+            ocr_future = self._submit_ocr(image_bytes)
+            
             # Opis obrazu przez Gemma 3 (główna metoda)
             logger.debug("Rozpoczynanie analizy obrazu przez Gemma 3:12B...")
-            description = self._describe_image(file_path)
+            description = self._describe_image_data(image_bytes)
             if description:
                 logger.debug(f"Wygenerowano opis grafiki przez Gemma 3, długość: {len(description)} znaków")
                 chunks.append(DocumentChunk(
@@ -451,9 +735,7 @@ class DocumentProcessor:
             
             # OCR tekstu z obrazu (opcjonalnie, jeśli Tesseract jest dostępny)
             try:
-                logger.debug("Próba OCR tekstu z obrazu (opcjonalnie)...")
-                image = Image.open(file_path)
-                ocr_text = pytesseract.image_to_string(image, lang='pol')
+                ocr_text = ocr_future.result()
                 
                 if ocr_text.strip():
                     text_chunks = self._chunk_text(ocr_text)
@@ -476,8 +758,13 @@ class DocumentProcessor:
         
         return chunks
     
-    def _process_audio(self, file_path: Path) -> List[DocumentChunk]:
-        """Przetwarza plik audio (transkrypcja + rozpoznawanie mówców)"""
+    def _process_audio(self, file_path: Path, publish: Optional[PublishCallback] = None) -> List[DocumentChunk]:
+        """
+        Przetwarza plik audio (transkrypcja + rozpoznawanie mówców).
+        
+        Z publish fragmenty każdego okna transkrypcji trafiają do bazy od razu
+        (bez mówców) - po rozpoznaniu mówców są nadpisywane wersją z etykietami.
+        """
         logger.info(f"Rozpoczynanie przetwarzania pliku audio: {file_path}")
         chunks = []
         
@@ -496,39 +783,53 @@ class DocumentProcessor:
             logger.info("=" * 70)
             logger.info(f"Plik: {file_path.name}")
             
-            # Sprawdź czy model jest już pobrany
-            model_file = WHISPER_MODELS_DIR / "large-v3.pt"
-
-            if not model_file.exists():
-                logger.info("[WARNING] MODEL WHISPER NIE JEST POBRANY!")
-                logger.info("[DOWNLOAD] Rozpoczynam pobieranie modelu Whisper large-v3 (~3 GB)...")
-                logger.info("[INFO] To może potrwać 5-15 minut przy pierwszym użyciu...")
-                logger.info(f"[INFO] Model zostanie zapisany w: {model_file.parent}")
-                logger.info("[INFO] Kolejne pliki audio będą przetwarzane szybciej (model w cache)")
-            else:
-                logger.info(f"[OK] Model Whisper large-v3 znaleziony w {model_file.parent}")
-
-            logger.info("[LOADING] Ładowanie modelu Whisper large-v3...")
-            load_start = time.time()
-            model = whisper.load_model("large-v3", download_root=str(WHISPER_MODELS_DIR))
-            load_time = time.time() - load_start
-            logger.info(f"[OK] Model Whisper załadowany w {load_time:.2f} sekund")
-            
-            # Transkrypcja audio
-            logger.info(f"Transkrypcja pliku audio: {file_path.name} (może potrwać kilka minut)...")
-            start_time = time.time()
-            
-            result = model.transcribe(
-                str(file_path),
-                language=None,  # Auto-detect language (lepsze niż wymuszanie "pl")
-                task="transcribe",
-                verbose=False,
-                fp16=False,  # Lepsze dla kompatybilności
-                condition_on_previous_text=False  # Lepsze dla krótkich plików
-            )
+            transcribe_options = {
+                'language': None,  # Auto-detect language (lepsze niż wymuszanie "pl")
+                'task': "transcribe",
+                'fp16': False,  # Lepsze dla kompatybilności
+                'condition_on_previous_text': False  # Lepsze dla krótkich plików
+            }
+            
+            # Transkrypcja z cache (bez ładowania modelu) jeśli plik był już przetwarzany
+            audio_hash = hash_file(file_path)
+            whisper_model = self.whisper_model or self.whisper.model_name
+            result = self._get_cached_transcription(audio_hash, whisper_model, transcribe_options)
             
-            transcription_time = time.time() - start_time
-            logger.info(f"Transkrypcja zakończona w {transcription_time:.2f} sekund")
+            # Próbki PCM dekodowane raz - wspólne dla transkrypcji i rozpoznawania mówców
+            audio_data = None
+            
+            if result is not None:
+                logger.info("[CACHE] Transkrypcja wczytana z cache - pomijam Whisper")
+            else:
+                audio_data = load_audio(file_path)
+                
+                # Transkrypcja audio (model ładowany tylko raz na proces)
+                logger.info(f"Transkrypcja pliku audio: {file_path.name} (Whisper {whisper_model}, może potrwać kilka minut)...")
+                start_time = time.time()
+                
+                timeline = []  # Segmenty opublikowanych okien transkrypcji (elementy osi czasu)
+                
+                def publish_window(idx: int, total: int, window_segments: List[Dict[str, Any]]):
+                    if publish is None:
+                        return
+                    timeline.extend(self._timeline_items(window_segments, len(timeline)))
+                    # Publikowane są zamknięte okna fragmentów (ostatnie może się jeszcze wydłużyć);
+                    # jedno okno transkrypcji (krótkie nagranie) - fragmenty zapisywane raz, już z mówcami
+                    window_chunks = []
+                    if total > 1:
+                        windows = self.audio_windower.group(timeline)[:-1]
+                        window_chunks = [
+                            self._timeline_chunk(file_path, "audio_window", 'audio_transcription', n, items)
+                            for n, items in enumerate(windows)
+                        ]
+                    publish("transkrypcja", window_chunks, idx + 1, total)
+                
+                result = self._transcribe_windows(audio_hash, whisper_model, transcribe_options, audio_data,
+                                                  on_window=publish_window)
+                result = self._store_transcription(audio_hash, whisper_model, transcribe_options, result)
+                
+                transcription_time = time.time() - start_time
+                logger.info(f"Transkrypcja zakończona w {transcription_time:.2f} sekund")
             
             # Pobierz segmenty z timestampami
             segments = result.get("segments", [])
@@ -547,86 +848,13 @@ class DocumentProcessor:
             logger.info("[DIARIZATION] Rozpoznawanie mówców przez analizę barwy głosu...")
             
             try:
-                from sklearn.cluster import AgglomerativeClustering
-                import numpy as np
-                import librosa
-                
-                # Wczytaj audio
+                # Cechy ramek liczone raz dla całego nagrania, agregowane per segment
                 logger.info(f"[DIARIZATION] Analiza barwy głosu dla {len(segments)} segmentów...")
-                audio_data, sr = librosa.load(str(file_path), sr=16000)
-                
-                # Ekstraktuj cechy audio (MFCC + pitch) dla każdego segmentu
-                segment_features = []
-                valid_segments = []
+                if audio_data is None and segments:
+                    audio_data = load_audio(file_path)
+                speaker_map = self.diarizer.diarize(audio_data, segments) if segments else None
                 
-                for i, seg in enumerate(segments):
-                    start_time = seg.get("start", 0)
-                    end_time = seg.get("end", 0)
-                    
-                    # Wyciągnij fragment audio
-                    start_sample = int(start_time * sr)
-                    end_sample = int(end_time * sr)
-                    
-                    if end_sample > start_sample and end_sample <= len(audio_data):
-                        segment_audio = audio_data[start_sample:end_sample]
-                        
-                        # Minimum 0.4s do analizy
-                        if len(segment_audio) > sr * 0.4:
-                            try:
-                                # MFCC (Mel-frequency cepstral coefficients) - charakterystyka barwy
-                                mfcc = librosa.feature.mfcc(
-                                    y=segment_audio, 
-                                    sr=sr, 
-                                    n_mfcc=13
-                                )
-                                mfcc_mean = np.mean(mfcc, axis=1)
-                                
-                                # Pitch (F0) - wysokość głosu
-                                pitches, magnitudes = librosa.piptrack(
-                                    y=segment_audio, 
-                                    sr=sr
-                                )
-                                pitch_mean = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
-                                
-                                # Energy - energia głosu
-                                energy = np.mean(librosa.feature.rms(y=segment_audio))
-                                
-                                # Połącz cechy
-                                features = np.concatenate([
-                                    mfcc_mean, 
-                                    [pitch_mean, energy]
-                                ])
-                                
-                                segment_features.append(features)
-                                valid_segments.append(i)
-                            except Exception as e:
-                                logger.debug(f"Błąd analizy segmentu {i}: {e}")
-                
-                if len(segment_features) >= 2:
-                    # Clustering: grupowanie podobnych głosów
-                    features_array = np.array(segment_features)
-                    
-                    # Normalizacja (ważne dla clustering)
-                    from sklearn.preprocessing import StandardScaler
-                    scaler = StandardScaler()
-                    features_normalized = scaler.fit_transform(features_array)
-                    
-                    # Hierarchical clustering z automatycznym wykrywaniem liczby klastrów
-                    clustering = AgglomerativeClustering(
-                        n_clusters=None,
-                        distance_threshold=18.0,  # Wysoki threshold = mało klastrów (2-5 osób)
-                        linkage='ward'  # Ward minimalizuje wariancję wewnątrz klastrów
-                    )
-                    labels = clustering.fit_predict(features_normalized)
-                    
-                    # Mapuj segmenty do mówców
-                    for seg_idx, speaker_id in zip(valid_segments, labels):
-                        speaker_map[seg_idx] = f"SPEAKER_{speaker_id}"
-                    
-                    unique_speakers = len(set(labels))
-                    logger.info(f"[DIARIZATION] ✅ Wykryto {unique_speakers} mówców (analiza MFCC + pitch)")
-                    logger.info(f"[DIARIZATION] Przeanalizowano {len(valid_segments)}/{len(segments)} segmentów")
-                else:
+                if not speaker_map:
                     logger.warning("[DIARIZATION] Za mało segmentów do analizy")
                     raise Exception("Fallback")
                     
@@ -635,50 +863,27 @@ class DocumentProcessor:
                 logger.info("[DIARIZATION] Fallback: pojedynczy mówca")
                 
                 # FALLBACK: Zakładamy pojedynczego mówcę
-                for i in range(len(segments)):
-                    speaker_map[i] = f"SPEAKER_0"
+                speaker_map = {i: "SPEAKER_0" for i in range(len(segments))}
                 
                 logger.info(f"[DIARIZATION] Fallback: 1 mówca")
             
-            # Tworzenie fragmentów z timestampami
+            # Tworzenie fragmentów: kolejne segmenty łączone w okna czasowe (z timestampami i mówcami)
             if len(segments) > 0:
-                # Normalna ścieżka: używamy segmentów z timestampami
-                for i, segment in enumerate(segments):
-                    start_time = segment.get("start", 0)
-                    end_time = segment.get("end", 0)
-                    text = segment.get("text", "").strip()
-                    
-                    if not text:
-                        continue
-                    
-                    # Formatowanie czasu (MM:SS)
-                    start_min = int(start_time // 60)
-                    start_sec = int(start_time % 60)
-                    end_min = int(end_time // 60)
-                    end_sec = int(end_time % 60)
-                    
-                    # Informacja o mówcy (jeśli dostępna)
-                    speaker = speaker_map.get(i, f"SPEAKER_0")  # Fallback: speaker 0
-                    
-                    # Stwórz fragment z timestampem
-                    fragment_text = f"[{start_min:02d}:{start_sec:02d} - {end_min:02d}:{end_sec:02d}] "
-                    if speaker:
-                        fragment_text += f"[{speaker}] "
-                    fragment_text += text
-                    
-                    chunks.append(DocumentChunk(
-                        id=str(uuid.uuid4()),
-                        content=fragment_text,
-                        source_file=file_path.name,
-                        page_number=0,
-                        chunk_type='audio_transcription',
-                        element_id=f"audio_segment_{i+1}_{start_min:02d}m{start_sec:02d}s"
-                    ))
+                timeline = self._timeline_items(segments)
+                for item in timeline:
+                    item['label'] = speaker_map.get(item['index'], "SPEAKER_0")
+                windows = self.audio_windower.group(timeline)
+                chunks = [
+                    self._timeline_chunk(file_path, "audio_window", 'audio_transcription', n, items)
+                    for n, items in enumerate(windows)
+                ]
+                logger.info(f"Połączono {len(timeline)} segmentów w {len(chunks)} okien "
+                            f"(do {self.audio_windower.window_seconds:.0f}s / {self.audio_windower.max_tokens} tokenów)")
             elif full_text:
                 # Fallback: jeśli brak segmentów ale jest pełny tekst, utwórz jeden chunk
                 logger.info("[FALLBACK] Brak segmentów, używam pełnego tekstu transkrypcji")
                 chunks.append(DocumentChunk(
-                    id=str(uuid.uuid4()),
+                    id=stable_chunk_id(file_path.name, "audio_full_transcription"),
                     content=full_text,
                     source_file=file_path.name,
                     page_number=0,
@@ -694,13 +899,24 @@ class DocumentProcessor:
         
         return chunks
     
-    def _process_video(self, file_path: Path) -> List[DocumentChunk]:
-        """Przetwarza plik wideo (audio przez Whisper + klatki przez Gemma 3)"""
+    def _process_video(self, file_path: Path, publish: Optional[PublishCallback] = None) -> List[DocumentChunk]:
+        """
+        Przetwarza plik wideo (audio przez Whisper + klatki przez Gemma 3).
+        
+        Transkrypcja audio biegnie w wątku w tle, równolegle z opisem klatek -
+        czas przetwarzania zbliża się do dłuższej z gałęzi zamiast ich sumy.
+        Obie osie czasu łączone są na końcu po znacznikach czasu.
+        
+        Z publish fragmenty kolejnych sekund trafiają do bazy po każdej paczce
+        opisanych klatek, gdy transkrypcja jest już gotowa.
+        """
         logger.info("=" * 70)
         logger.info("[VIDEO] PRZETWARZANIE PLIKU WIDEO")
         logger.info("=" * 70)
         logger.info(f"Plik: {file_path.name}")
         chunks = []
+        audio_executor = None
+        audio_cancelled = threading.Event()
         
         try:
             # Sprawdź wymagane biblioteki
@@ -712,256 +928,435 @@ class DocumentProcessor:
                 logger.error("Zainstaluj: pip install opencv-python openai-whisper")
                 return chunks
             
-            # ===== CZĘŚĆ 1: EKSTRAKCJA AUDIO =====
-            logger.info("[STEP 1/3] Ekstrakcja audio z wideo")
-            
-            # Otwórz wideo
-            video = cv2.VideoCapture(str(file_path))
-            fps = video.get(cv2.CAP_PROP_FPS)
-            total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / fps if fps > 0 else 0
+            # Parametry wideo
+            fps, total_frames, duration = probe_video(file_path)
             
             logger.info(f"[INFO] Parametry wideo:")
             logger.info(f"   FPS: {fps:.2f}")
             logger.info(f"   Klatki: {total_frames}")
             logger.info(f"   Długość: {duration:.2f} sekund ({duration/60:.1f} minut)")
             
-            video.release()
+            # ===== CZĘŚĆ 1-2: AUDIO (W TLE) =====
+            # Whisper i model wizyjny to różne zasoby - transkrypcja biegnie równolegle z opisem klatek,
+            # a obie gałęzie łączone są po znacznikach czasu
+            logger.info("[STEP 1-2/3] Dekodowanie i transkrypcja audio (w tle, równolegle z klatkami)")
+            audio_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-audio")
+            audio_future = audio_executor.submit(with_script_context(self._transcribe_video_audio),
+                                                 file_path, duration, publish, audio_cancelled)
             
-            # Wyciągnij audio do pliku tymczasowego
-            audio_temp = TEMP_DIR / f"temp_audio_{uuid.uuid4()}.wav"
-            logger.info(f"[EXTRACT] Ekstrakcja audio do: {audio_temp.name}")
+            # Oś czasu: wypowiedzi (gdy transkrypcja jest gotowa) + opisy kolejnych scen
+            speech_items = None
+            frame_items = []
             
-            try:
-                # Użyj opencv do wyciągnięcia audio
-                import subprocess
-                result = subprocess.run([
-                    'ffmpeg', '-i', str(file_path),
-                    '-vn',  # No video
-                    '-acodec', 'pcm_s16le',  # WAV format
-                    '-ar', '16000',  # 16kHz (Whisper preferuje)
-                    '-ac', '1',  # Mono
-                    str(audio_temp),
-                    '-y'  # Overwrite
-                ], capture_output=True, text=True, timeout=300)
-                
-                if result.returncode != 0 or not audio_temp.exists():
-                    logger.warning("ffmpeg niedostępny, próba bez audio...")
-                    audio_segments = []
-                else:
-                    logger.info("[OK] Audio wyekstraktowane")
-                    
-                    # ===== CZĘŚĆ 2: TRANSKRYPCJA AUDIO =====
-                    logger.info("[STEP 2/3] Transkrypcja audio przez Whisper")
-                    
-                    # Załaduj Whisper
-                    logger.info("Ładowanie modelu Whisper large-v3...")
-                    whisper_model = whisper.load_model("large-v3")
-                    
-                    # Transkrypcja
-                    logger.info(f"Transkrypcja audio z wideo ({duration:.1f}s)...")
-                    transcription_start = time.time()
-                    
-                    result = whisper_model.transcribe(
-                        str(audio_temp),
-                        language="pl",
-                        task="transcribe",
-                        verbose=False
-                    )
-                    
-                    audio_segments = result.get("segments", [])
-                    transcription_time = time.time() - transcription_start
-                    logger.info(f"[OK] Transkrypcja zakończona w {transcription_time:.2f}s")
-                    logger.info(f"   Segmentów audio: {len(audio_segments)}")
-                    
-                    # Usuń temp audio
-                    audio_temp.unlink()
-                    
-            except Exception as audio_error:
-                logger.warning(f"Błąd ekstrakcji/transkrypcji audio: {audio_error}")
-                audio_segments = []
+            def audio_items(wait: bool):
+                nonlocal speech_items
+                if speech_items is None and (wait or audio_future.done()):
+                    speech_items = self._timeline_items(audio_future.result(), label="Audio")
+                return speech_items
             
             # ===== CZĘŚĆ 3: EKSTRAKCJA I ROZPOZNAWANIE KLATEK =====
             logger.info("[STEP 3/3] Ekstrakcja i rozpoznawanie klatek wideo")
             
-            video = cv2.VideoCapture(str(file_path))
-            
-            # Oblicz które klatki wyciągnąć (1 klatka/sekundę)
-            frames_to_extract = []
-            for second in range(int(duration) + 1):
-                frame_num = int(second * fps)
-                if frame_num < total_frames:
-                    frames_to_extract.append((second, frame_num))
-            
-            logger.info(f"[FRAMES] Będę analizować {len(frames_to_extract)} klatek (1 klatka/sekundę)")
-            
-            # Ekstrakcja i rozpoznawanie klatek
+            # Ekstrakcja i rozpoznawanie klatek (paczki klatek opisywane równolegle)
+            logger.info(f"[FRAMES] Będę analizować do {int(duration) + 1} klatek (1 klatka/sekundę, jeden przebieg strumienia)")
             frame_descriptions = {}
-            
-            for second, frame_num in frames_to_extract:
+            pending_frames = []  # (sekunda, dane JPEG)
+            total_seconds = int(duration) + 1
+            
+            def describe_pending():
+                # Opis sceny trafia na oś czasu tylko gdy różni się od poprzedniego
+                descriptions = self._describe_video_frames(pending_frames)
+                frame_descriptions.update(descriptions)
+                for second in sorted(descriptions):
+                    if frame_items and frame_items[-1]['text'] == descriptions[second]:
+                        continue
+                    frame_items.append({'start': second, 'end': second + 1, 'text': descriptions[second],
+                                        'label': "Video", 'kind': 'frame'})
+            
+            def video_windows(until: float, speech: List[Dict[str, Any]]):
+                # Elementy do sekundy until są kompletne - okna zamknięte przed nią już się nie zmienią
+                items = [item for item in speech if item['start'] <= until] + frame_items
+                items.sort(key=lambda item: (item['start'], item['kind'] == 'frame'))
+                return self.video_windower.group(items)
+            
+            def publish_windows(until: int):
+                if publish is None:
+                    return
+                speech = audio_items(wait=False)
+                if speech is None:
+                    # Transkrypcja jeszcze trwa - okna bez wypowiedzi nie są ostateczne
+                    publish("klatki", [], until + 1, total_seconds)
+                    return
+                windows = video_windows(until, speech)[:-1]
+                window_chunks = [
+                    self._timeline_chunk(file_path, "video_window", 'video_transcription', n, items)
+                    for n, items in enumerate(windows)
+                ]
+                publish("klatki", window_chunks, until + 1, total_seconds)
+            
+            # Do modelu trafiają tylko klatki różne od ostatnio opisanej (zmiana sceny),
+            # pominięte sekundy należą do poprzedniej sceny na osi czasu
+            frame_filter = FrameChangeFilter.from_config(self.config.get('video', {}))
+            frame_filter.reset(duration)
+            if frame_filter.min_gap:
+                logger.info(f"[FRAMES] Limit {frame_filter.max_frames} klatek - opis najwyżej co {frame_filter.min_gap}s")
+            
+            # Klatki dekodowane po kolei (grab/retrieve) zamiast seeka dla każdej sekundy
+            frames_start = time.time()
+            for second, frame in iter_frames(file_path, self.frame_interval):
                 try:
-                    # Przejdź do klatki
-                    video.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-                    ret, frame = video.read()
+                    if not frame_filter.accept(second, frame):
+                        continue
                     
-                    if not ret:
+                    # Zakoduj klatkę w pamięci
+                    ok, frame_jpeg = cv2.imencode('.jpg', frame)
+                    if not ok:
                         continue
                     
-                    # Zapisz klatkę tymczasowo
-                    frame_temp = TEMP_DIR / f"temp_frame_{uuid.uuid4()}.jpg"
-                    cv2.imwrite(str(frame_temp), frame)
+                    pending_frames.append((second, frame_jpeg.tobytes()))
                     
                     # Rozpoznaj przez Gemma 3
-                    if second % 5 == 0:  # Log co 5 sekund
-                        logger.info(f"   Analiza klatki {second}s/{int(duration)}s...")
-                    
-                    description = self._describe_image(frame_temp)
-                    
-                    if description:
-                        # Usuń prefix "[Opis grafiki]" dla klatek wideo
-                        description = description.replace("[Opis grafiki] ", "")
-                        frame_descriptions[second] = description
-                    
-                    # Usuń temp file
-                    frame_temp.unlink()
+                    if len(pending_frames) >= VISION_BATCH_SIZE:
+                        logger.info(f"   Analiza klatek do {second}s/{int(duration)}s...")
+                        describe_pending()
+                        pending_frames = []
+                        publish_windows(second)
                     
                 except Exception as frame_error:
                     logger.debug(f"Błąd przetwarzania klatki {second}s: {frame_error}")
                     continue
             
-            video.release()
-            logger.info(f"[OK] Rozpoznano {len(frame_descriptions)} klatek wideo")
+            describe_pending()
+            logger.info(f"[OK] Rozpoznano {len(frame_descriptions)} klatek wideo w {time.time() - frames_start:.2f}s "
+                        f"(pominięto {frame_filter.skipped} podobnych, {len(frame_items)} scen)")
             
             # ===== CZĘŚĆ 4: ŁĄCZENIE AUDIO + VIDEO =====
-            logger.info("[STEP 4/4] Łączenie transkrypcji audio z opisami klatek")
-            
-            # Stwórz mapę: sekunda → segment audio
-            audio_by_second = {}
-            for seg in audio_segments:
-                start_sec = int(seg.get("start", 0))
-                end_sec = int(seg.get("end", 0))
-                text = seg.get("text", "").strip()
-                
-                # Przypisz segment do każdej sekundy którą obejmuje
-                for sec in range(start_sec, end_sec + 1):
-                    if sec not in audio_by_second:
-                        audio_by_second[sec] = []
-                    audio_by_second[sec].append(text)
-            
-            # Tworzenie fragmentów dla każdej sekundy
-            for second in range(int(duration) + 1):
-                # Audio dla tej sekundy
-                audio_text = " ".join(audio_by_second.get(second, ["[cisza]"]))
-                
-                # Opis klatki dla tej sekundy
-                frame_desc = frame_descriptions.get(second, "[brak opisu klatki]")
-                
-                # Formatuj czas
-                minutes = second // 60
-                seconds = second % 60
-                timestamp = f"{minutes:02d}:{seconds:02d}"
-                
-                # Połącz audio + video
-                fragment_text = f"[{timestamp}]\n"
-                fragment_text += f"[Audio] {audio_text}\n"
-                fragment_text += f"[Video] {frame_desc}"
-                
-                chunks.append(DocumentChunk(
-                    id=str(uuid.uuid4()),
-                    content=fragment_text,
-                    source_file=file_path.name,
-                    page_number=0,
-                    chunk_type='video_transcription',
-                    element_id=f"video_second_{second}_{minutes:02d}m{seconds:02d}s"
-                ))
+            if not audio_future.done():
+                logger.info("[STEP 4/4] Klatki gotowe - czekam na zakończenie transkrypcji")
+            speech_items = audio_items(wait=True)
+            logger.info("[STEP 4/4] Łączenie transkrypcji audio z opisami scen w okna czasowe")
+            
+            windows = video_windows(float('inf'), speech_items)
+            chunks = [
+                self._timeline_chunk(file_path, "video_window", 'video_transcription', n, items)
+                for n, items in enumerate(windows)
+            ]
+            logger.info(f"   {len(speech_items)} wypowiedzi i {len(frame_items)} scen w {len(chunks)} oknach "
+                        f"(do {self.video_windower.window_seconds:.0f}s / {self.video_windower.max_tokens} tokenów)")
             
             logger.info("=" * 70)
             logger.info(f"[OK] ZAKOŃCZONO PRZETWARZANIE WIDEO")
             logger.info(f"   Fragmentów utworzonych: {len(chunks)}")
-            logger.info(f"   Audio segmentów: {len(audio_segments)}")
+            logger.info(f"   Wypowiedzi audio: {len(speech_items)}")
             logger.info(f"   Klatek rozpoznanych: {len(frame_descriptions)}")
             logger.info("=" * 70)
             
         except Exception as e:
             logger.error(f"Błąd podczas przetwarzania wideo {file_path}: {e}", exc_info=True)
+        finally:
+            # Błąd gałęzi klatek - transkrypcja przerywa się po bieżącym oknie, zamiast zajmować Whisper w tle
+            if audio_executor is not None:
+                audio_cancelled.set()
+                audio_executor.shutdown(wait=True)
         
         return chunks
     
-    def _chunk_text(self, text: str, max_chunk_size: int = 500) -> List[str]:
-        """Dzieli tekst na fragmenty o maksymalnej długości"""
-        if not text.strip():
-            return []
-        
-        # Podział na zdania
-        sentences = text.split('. ')
-        chunks = []
-        current_chunk = ""
+    @staticmethod
+    def _timeline_items(segments: List[Dict[str, Any]], offset: int = 0,
+                        label: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Zamienia segmenty transkrypcji na wypowiedzi osi czasu (indeks segmentu do przypisania mówcy)"""
+        return [
+            {'start': seg.get('start', 0), 'end': seg.get('end', 0), 'text': seg.get('text', '').strip(),
+             'label': label, 'kind': 'speech', 'index': offset + i}
+            for i, seg in enumerate(segments)
+            if seg.get('text', '').strip()
+        ]
+    
+    def _timeline_chunk(self, file_path: Path, element_prefix: str, chunk_type: str, number: int,
+                        items: List[Dict[str, Any]]) -> DocumentChunk:
+        """
+        Tworzy fragment okna osi czasu.
         
-        for sentence in sentences:
-            # Dodajemy kropkę z powrotem (jeśli była)
-            sentence = sentence.strip() + ". " if sentence.strip() else ""
-            
-            # Sprawdzamy czy dodanie zdania nie przekroczy limitu
-            if len(current_chunk) + len(sentence) <= max_chunk_size:
-                current_chunk += sentence
+        Nagłówek to zakres czasu okna. Kolejne wypowiedzi z tą samą etykietą
+        (mówca, [Audio]) tworzą jedną linię zaczynającą się od ich czasu,
+        każdy opis sceny ([Video]) ma osobną linię.
+        """
+        start = int(items[0]['start'])
+        end = max(item['end'] for item in items)
+        lines = [f"[{format_timestamp(start)} - {format_timestamp(end)}]"]
+        previous = None
+        for item in items:
+            if (previous is not None and item['kind'] == 'speech' and previous['kind'] == 'speech'
+                    and item.get('label') == previous.get('label')):
+                lines[-1] += f" {item['text']}"
             else:
-                # Jeśli mamy już coś w chunku, zapisujemy i zaczynamy nowy
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
+                label = f" [{item['label']}]" if item.get('label') else ""
+                lines.append(f"[{format_timestamp(item['start'])}]{label} {item['text']}")
+            previous = item
         
-        # Dodajemy ostatni chunk jeśli nie jest pusty
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        element_id = f"{element_prefix}_{number+1}_{start // 60:02d}m{start % 60:02d}s"
+        return DocumentChunk(
+            id=stable_chunk_id(file_path.name, element_id),
+            content="\n".join(lines),
+            source_file=file_path.name,
+            page_number=0,
+            chunk_type=chunk_type,
+            element_id=element_id
+        )
+    
+    def _transcribe_windows(self, input_hash: str, model_name: str, options: Dict[str, Any], audio,
+                            on_window: Optional[Callable[[int, int, List[Dict[str, Any]]], None]] = None) -> Dict[str, Any]:
+        """
+        Transkrybuje nagranie okno po oknie.
         
-        logger.debug(f"Podzielono tekst na {len(chunks)} fragmentów")
-        return chunks
+        Wynik każdego okna trafia do cache zaraz po transkrypcji - przerwane
+        przetwarzanie wznawia się od pierwszego okna bez zapisanego wyniku.
+        
+        Args:
+            input_hash: Hash pliku źródłowego
+            model_name: Rozmiar modelu Whisper
+            options: Opcje whisper.transcribe
+            audio: Próbki 16 kHz mono float32
+            on_window: Wywoływane po każdym oknie (indeks, liczba okien, segmenty z czasem bezwzględnym)
+        
+        Returns:
+            {'text', 'language', 'segments'}
+        """
+        windows = self.transcriber.plan(audio)
+        version = self._transcription_version(options)
+        model = f"whisper-{model_name}"
+        
+        def window_version(idx: int) -> str:
+            start, end = windows[idx]
+            return f"{version}:{start:.2f}-{end:.2f}"
+        
+        cached_windows = set()
+        
+        def cached(idx: int) -> Optional[Dict[str, Any]]:
+            result = self.artifact_cache.get('transcription_window', input_hash, model, window_version(idx))
+            if result is not None:
+                cached_windows.add(idx)
+            return result
+        
+        results = []
+        for idx, result in self.transcriber.iter_windows(audio, windows, cached=cached, model_name=model_name,
+                                                         **options):
+            if idx in cached_windows:
+                logger.info(f"[CACHE] Okno {idx + 1}/{len(windows)} wczytane z cache (wznowienie)")
+            else:
+                self.artifact_cache.set('transcription_window', input_hash, model, window_version(idx), result)
+                logger.info(f"[WHISPER] Okno {idx + 1}/{len(windows)} przetranskrybowane")
+            results.append(result)
+            if on_window:
+                on_window(idx, len(windows), stitch_window(windows, idx, result.get('segments', [])))
+        
+        return merge_window_results(windows, results, options.get('language'))
     
-    def _describe_image(self, image_path: Path) -> str:
-        """Generuje opis obrazu za pomocą modelu multimodalnego (Gemma 3:12B)"""
-        logger.debug(f"Rozpoczynanie opisu obrazu: {image_path}")
-        start_time = time.time()
+    def _transcribe_video_audio(self, file_path: Path, duration: float,
+                                publish: Optional[PublishCallback] = None,
+                                cancelled: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Gałąź audio wideo: dekodowanie ścieżki dźwiękowej i transkrypcja (wątek w tle).
+        
+        Ustawienie cancelled (błąd gałęzi klatek) przerywa transkrypcję po
+        bieżącym oknie - okna już przetranskrybowane zostają w cache.
         
+        Returns:
+            Segmenty transkrypcji (pusta lista, gdy wideo nie ma dźwięku lub transkrypcja się nie udała)
+        """
         try:
-            # Konwersja obrazu do base64
-            import base64
-            with open(image_path, "rb") as image_file:
-                encoded_image = base64.b64encode(image_file.read()).decode('utf-8')
-            
-            logger.debug("Wysyłanie żądania do modelu Gemma 3:12B...")
-            # Wysłanie zapytania do Ollama z modelem multimodalnym
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": VISION_MODEL,
-                    "prompt": "Opisz szczegółowo co znajduje się na tym obrazie. Odpowiedz po polsku.",
-                    "stream": False,
-                    "images": [encoded_image]
-                },
-                timeout=300  # 5 minut timeout dla dużych obrazów
-            )
+            # ===== CZĘŚĆ 2: TRANSKRYPCJA AUDIO =====
+            logger.info("[STEP 2/3] Transkrypcja audio przez Whisper")
+
+            transcribe_options = {'language': "pl", 'task': "transcribe"}
+            video_hash = hash_file(file_path)
+            whisper_model = self.whisper_model or self.whisper.model_name
+            result = self._get_cached_transcription(video_hash, whisper_model, transcribe_options)
+
+            if result is not None:
+                logger.info("[CACHE] Transkrypcja wideo wczytana z cache - pomijam dekodowanie i Whisper")
+            else:
+                # Ścieżka dźwiękowa dekodowana potokiem ffmpeg prosto do pamięci (bez pliku WAV)
+                logger.info("[EXTRACT] Dekodowanie ścieżki dźwiękowej (16 kHz mono)")
+                audio_data = load_audio(file_path)
+                logger.info(f"[OK] Audio zdekodowane ({len(audio_data) / SAMPLE_RATE:.1f}s)")
+
+                # Transkrypcja współdzielonym modelem
+                logger.info(f"Transkrypcja audio z wideo ({duration:.1f}s, Whisper {whisper_model})...")
+                transcription_start = time.time()
+
+                def report_window(idx: int, total: int, window_segments: List[Dict[str, Any]]):
+                    if cancelled is not None and cancelled.is_set():
+                        raise InterruptedError(f"przerwano po oknie {idx + 1}/{total}")
+                    if publish is not None:
+                        publish("transkrypcja", [], idx + 1, total)
+
+                result = self._transcribe_windows(video_hash, whisper_model, transcribe_options, audio_data,
+                                                  on_window=report_window)
+                result = self._store_transcription(video_hash, whisper_model, transcribe_options, result)
+                del audio_data
+
+                transcription_time = time.time() - transcription_start
+                logger.info(f"[OK] Transkrypcja zakończona w {transcription_time:.2f}s")
+
+            audio_segments = result.get("segments", [])
+            logger.info(f"   Segmentów audio: {len(audio_segments)}")
+
+        except AudioDecodeError as decode_error:
+            logger.warning(f"Brak ścieżki dźwiękowej lub ffmpeg niedostępny ({decode_error}) - tylko klatki")
+            audio_segments = []
+        except InterruptedError as interrupted:
+            logger.info(f"[WHISPER] Transkrypcja wideo przerwana ({interrupted})")
+            audio_segments = []
+        except Exception as audio_error:
+            logger.warning(f"Błąd ekstrakcji/transkrypcji audio: {audio_error}")
+            audio_segments = []
+        
+        return audio_segments
+    
+    def _chunk_text(self, text: str) -> List[str]:
+        """Dzieli tekst na fragmenty w limicie tokenów (wspólny TextChunker)"""
+        return self.chunker.chunk(text)
+    
+    def _describe_video_frames(self, frames: List[Tuple[int, bytes]]) -> Dict[int, str]:
+        """Opisuje paczkę klatek wideo, zwraca mapę sekunda -> opis (bez prefiksu grafiki)"""
+        # Identyczne klatki (statyczny obraz) dostają opis z pamięci pipeline'u
+        descriptions = self._describe_images_data([data for _, data in frames])
+        return {
+            second: description.replace("[Opis grafiki] ", "")
+            for (second, _), description in zip(frames, descriptions)
+            if description
+        }
+    
+    def _describe_image_data(self, image_data: bytes, seen_hashes: set = None) -> str:
+        """Opisuje pojedynczy obraz podany jako bytes (patrz _describe_images_data)"""
+        return self._describe_images_data([image_data], seen_hashes)[0]
+    
+    def _describe_images_data(self, images: List[bytes], seen_hashes: set = None) -> List[str]:
+        """
+        Opisuje listę obrazów podanych jako bytes (bez plików tymczasowych).
+        
+        Obrazy znane z pamięci lub cache nie trafiają do modelu, pozostałe
+        unikalne obrazy są wysyłane równolegle przez VisionClient.
+        
+        Args:
+            images: Surowe dane obrazów
+            seen_hashes: Hashe obrazów już opisanych w bieżącym dokumencie -
+                duplikat w tym samym dokumencie zwraca pusty opis (brak nowego fragmentu)
+        
+        Returns:
+            Opisy w kolejności wejścia (pusty string: obraz pominięty / duplikat / błąd)
+        """
+        results = [""] * len(images)
+        to_describe = {}  # hash -> (PreparedImage, [indeksy wejścia])
+        
+        for idx, image_data in enumerate(images):
+            content_hash = ImagePipeline.content_hash(image_data)
+            
+            if seen_hashes is not None:
+                if content_hash in seen_hashes:
+                    logger.debug(f"Pominięto powtórzony obraz w dokumencie ({content_hash[:12]})")
+                    continue
+                seen_hashes.add(content_hash)
             
-            processing_time = time.time() - start_time
-            logger.debug(f"Otrzymano odpowiedź od modelu w {processing_time:.2f} sekund")
+            if content_hash in to_describe:
+                to_describe[content_hash][1].append(idx)
+                continue
             
-            if response.status_code == 200:
-                result = response.json()
-                description = result.get('response', '').strip()
-                if description:
-                    logger.debug(f"Wygenerowano opis grafiki ({len(description)} znaków)")
-                    return f"[Opis grafiki] {description}"
-                else:
-                    logger.warning("Model zwrócił pustą odpowiedź")
-                    return ""
-            else:
-                logger.error(f"Błąd HTTP podczas opisywania obrazu: {response.status_code}")
-                return ""
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout podczas opisywania obrazu {image_path}")
-            return ""
-        except Exception as e:
-            logger.error(f"Błąd podczas opisywania obrazu {image_path}: {e}", exc_info=True)
-            return ""
+            cached = self._get_cached_description(content_hash)
+            if cached is not None:
+                results[idx] = cached
+                continue
+            
+            prepared = self.image_pipeline.prepare(image_data)
+            if prepared is not None:
+                to_describe[content_hash] = (prepared, [idx])
+        
+        if not to_describe:
+            return results
+        
+        hashes = list(to_describe)
+        logger.debug(f"Wysyłanie {len(hashes)} obrazów do modelu {self.vision_client.model}...")
+        start_time = time.time()
+        responses = self.vision_client.describe_many(
+            [to_describe[content_hash][0].encoded for content_hash in hashes],
+            VISION_PROMPT
+        )
+        logger.debug(f"Opisano {len(hashes)} obrazów w {time.time() - start_time:.2f} sekund")
+        
+        for content_hash, response in zip(hashes, responses):
+            if not response:
+                continue
+            description = f"[Opis grafiki] {response}"
+            self.image_pipeline.remember(content_hash, description)
+            self.artifact_cache.set('vision', content_hash, self.vision_client.model, self._vision_version, description)
+            for idx in to_describe[content_hash][1]:
+                results[idx] = description
+        
+        return results
+    
+    def _get_cached_description(self, content_hash: str) -> str:
+        """Zwraca opis obrazu z pamięci lub trwałego cache (None jeśli brak)"""
+        # Obraz opisany już wcześniej (w tym lub innym dokumencie)
+        cached = self.image_pipeline.get_description(content_hash)
+        if cached is not None:
+            logger.debug(f"Opis obrazu z pamięci ({content_hash[:12]})")
+            return cached
+        
+        # Opis z poprzednich uruchomień (reindeksacja, ponowny upload)
+        cached = self.artifact_cache.get('vision', content_hash, self.vision_client.model, self._vision_version)
+        if cached:
+            self.image_pipeline.remember(content_hash, cached)
+            return cached
+        return None
+    
+    def _submit_ocr(self, image_bytes: bytes) -> Future:
+        """Zleca OCR obrazu w tle (Tesseract) z trwałym cache wyników"""
+        if not self.ocr_enabled:
+            # Profil bez OCR - pusty wynik, obraz opisuje tylko model wizyjny
+            future = Future()
+            future.set_result("")
+            return future
+        
+        content_hash = hash_bytes(image_bytes)
+        cached = self.artifact_cache.get('ocr', content_hash, OCR_MODEL, self._ocr_version)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+        
+        def store(done: Future):
+            # Zapisujemy również pusty wynik - zdjęcia bez tekstu nie są OCR-owane ponownie
+            if done.exception() is None:
+                self.artifact_cache.set('ocr', content_hash, OCR_MODEL, self._ocr_version, done.result())
+        
+        future = self.ocr_engine.submit(image_bytes)
+        future.add_done_callback(store)
+        return future
+    
+    def _get_cached_transcription(self, input_hash: str, model_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Zwraca transkrypcję Whisper z cache (lub None)"""
+        return self.artifact_cache.get('transcription', input_hash, f"whisper-{model_name}",
+                                       self._transcription_version(options))
+    
+    def _transcription_version(self, options: Dict[str, Any]) -> str:
+        """Wersja transkrypcji: opcje Whisper + parametry podziału na okna mowy"""
+        return params_version({**options, 'windows': self.transcriber.params()})
+    
+    def _store_transcription(self, input_hash: str, model_name: str, options: Dict[str, Any],
+                             result: Dict[str, Any]) -> Dict[str, Any]:
+        """Zapisuje transkrypcję do cache (tylko pola używane przy tworzeniu fragmentów)"""
+        compact = {
+            'text': result.get('text', ''),
+            'language': result.get('language', 'unknown'),
+            'segments': [
+                {'start': seg.get('start', 0), 'end': seg.get('end', 0), 'text': seg.get('text', '')}
+                for seg in result.get('segments', [])
+            ]
+        }
+        self.artifact_cache.set('transcription', input_hash, f"whisper-{model_name}",
+                                self._transcription_version(options), compact)
+        return compact
 
 class EmbeddingProcessor:
     """Klasa do tworzenia embeddingów tekstów"""
@@ -1065,26 +1460,8 @@ class VectorDatabase:
         start_time = time.time()
         
         try:
-            ids = [chunk.id for chunk in chunks]
-            embeddings = [chunk.embedding for chunk in chunks]
-            documents = [chunk.content for chunk in chunks]
-            metadatas = [
-                {
-                    "source_file": chunk.source_file,
-                    "page_number": chunk.page_number,
-                    "chunk_type": chunk.chunk_type,
-                    "element_id": chunk.element_id
-                }
-                for chunk in chunks
-            ]
-            
             logger.debug("Wysyłanie danych do bazy wektorowej...")
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas
-            )
+            self.collection.add(**self._records(chunks))
             
             total_time = time.time() - start_time
             logger.info(f"Zakończono dodawanie dokumentów do bazy w {total_time:.2f} sekund")
@@ -1094,6 +1471,37 @@ class VectorDatabase:
             logger.error(f"Błąd podczas dodawania dokumentów do bazy: {e}", exc_info=True)
             raise
     
+    def upsert_documents(self, chunks: List[DocumentChunk]):
+        """Dodaje lub nadpisuje fragmenty o tych samych ID (publikacja przyrostowa, wznawianie)"""
+        if not chunks:
+            return
+        
+        start_time = time.time()
+        try:
+            self.collection.upsert(**self._records(chunks))
+            logger.info(f"Zapisano {len(chunks)} fragmentów w bazie wektorowej w {time.time() - start_time:.2f} sekund")
+        except Exception as e:
+            logger.error(f"Błąd podczas zapisu fragmentów do bazy: {e}", exc_info=True)
+            raise
+    
+    @staticmethod
+    def _records(chunks: List[DocumentChunk]) -> Dict[str, list]:
+        """Zamienia fragmenty na argumenty collection.add/upsert"""
+        return {
+            'ids': [chunk.id for chunk in chunks],
+            'embeddings': [chunk.embedding for chunk in chunks],
+            'documents': [chunk.content for chunk in chunks],
+            'metadatas': [
+                {
+                    "source_file": chunk.source_file,
+                    "page_number": chunk.page_number,
+                    "chunk_type": chunk.chunk_type,
+                    "element_id": chunk.element_id
+                }
+                for chunk in chunks
+            ]
+        }
+    
     def search(self, query: str, n_results: int = 5) -> List[SourceReference]:
         """Wyszukuje dokumenty pasujące do zapytania"""
         logger.info(f"Rozpoczynanie wyszukiwania dla zapytania: {query}")
@@ -1135,6 +1543,70 @@ class VectorDatabase:
             logger.error(f"Błąd podczas wyszukiwania: {e}", exc_info=True)
             return []
 
+class ChunkPublisher:
+    """
+    Zapisuje fragmenty jednego pliku w bazie w trakcie jego przetwarzania.
+    
+    Fragmenty mają deterministyczne ID - ponowna publikacja (wznowienie,
+    dopisanie mówców) nadpisuje poprzednią wersję, a fragmenty o niezmienionej
+    treści nie są ponownie embedowane ani zapisywane. Publikacje z kilku wątków
+    (gałąź audio i klatki wideo) są serializowane.
+    """
+    
+    def __init__(self, rag_system: 'RAGSystem', source_file: str, existing: Dict[str, str] = None,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            rag_system: System RAG (embeddingi, baza wektorowa, BM25)
+            source_file: Nazwa pliku (klucz stanu indeksowania)
+            existing: Fragmenty pliku już zapisane w bazie (ID -> treść)
+            progress_callback: Wywoływane z aktualnym stanem pliku po każdej publikacji
+        """
+        self.rag = rag_system
+        self.source_file = source_file
+        self.status_store = get_index_status_store()
+        self.progress_callback = progress_callback
+        self.published: Dict[str, str] = dict(existing or {})
+        self.written = 0
+        self._bm25_pending: Dict[str, str] = {}
+        self._bm25_refreshed = 0.0
+        self._lock = threading.Lock()
+    
+    def __call__(self, stage: str, chunks: List[DocumentChunk], done: int, total: int):
+        """Publikuje fragmenty ukończonego okna/paczki i zapisuje postęp (PublishCallback)"""
+        with self._lock:
+            self.write(chunks)
+            record = self.status_store.progress(self.source_file, stage, done, total, chunks=len(self.published))
+        if self.progress_callback:
+            self.progress_callback(record)
+    
+    def write(self, chunks: List[DocumentChunk]) -> int:
+        """Embeduje i zapisuje nowe lub zmienione fragmenty, zwraca ich liczbę"""
+        fresh = [chunk for chunk in chunks if self.published.get(chunk.id) != chunk.content]
+        if not fresh:
+            return 0
+        
+        self.rag.embedding_processor.create_embeddings(fresh)
+        self.rag.vector_db.upsert_documents(fresh)
+        for chunk in fresh:
+            self.published[chunk.id] = chunk.content
+            self._bm25_pending[chunk.id] = chunk.content
+        self.written += len(fresh)
+        
+        # BM25 przeliczany jest na całym korpusie - w trakcie pliku nie częściej niż co kilkadziesiąt sekund
+        if time.time() - self._bm25_refreshed >= INDEX_BM25_REFRESH_SECONDS:
+            self.flush_bm25()
+        return len(fresh)
+    
+    def flush_bm25(self):
+        """Przenosi opublikowane fragmenty do indeksu BM25"""
+        if self._bm25_pending and self.rag.hybrid_search:
+            self.rag.hybrid_search.upsert_bm25(
+                [{'id': doc_id, 'content': content} for doc_id, content in self._bm25_pending.items()]
+            )
+        self._bm25_pending = {}
+        self._bm25_refreshed = time.time()
+
 class RAGSystem:
     """Główna klasa systemu RAG"""
     
@@ -1145,16 +1617,25 @@ class RAGSystem:
         self.device_manager = DeviceManager(mode=device_mode)
         logger.info(f"Device configuration: {self.device_manager.config}")
         
+        # Konfiguracja (potrzebna już przy tworzeniu komponentów)
+        self.config = self._load_config(config_file)
+        
         # Komponenty z device assignment
-        self.doc_processor = DocumentProcessor()
+        self.doc_processor = DocumentProcessor(config=self.config)
+        self._processors = {self.doc_processor.profile: self.doc_processor}  # Procesory per profil indeksowania
+        self._processors_lock = threading.Lock()
         embeddings_device = self.device_manager.get_device('embeddings')
         self.embedding_processor = EmbeddingProcessor(device=embeddings_device)
         self.vector_db = VectorDatabase()
         self.greeting_filter = GreetingFilter()  # Filtr powitań
+        self.context_builder = ContextBuilder.from_config(self.config.get('context', {}))
         
         # Inicjalizacja Model Provider (OpenAI lub Ollama)
-        self.config = self._load_config(config_file)
         self.model_provider = self._initialize_model_provider()
+        if self.config.get('ollama', {}).get('warmup', True):
+            # Ładowanie modeli w tle - pierwsze pytanie nie czeka na wczytanie modelu
+            vision_client = self.doc_processor.vision_client
+            self.model_provider.warm_up([(vision_client.model, vision_client.num_ctx)])
         
         # Inicjalizacja Hybrydowego Wyszukiwania
         reranker_device = self.device_manager.get_device('reranker')
@@ -1209,6 +1690,13 @@ class RAGSystem:
                 provider_config['ollama_model'] = 'gemma3:12b'
                 provider_config['ollama_url'] = 'http://127.0.0.1:11434'
             
+            # Utrzymanie modelu w pamięci i stałe okno kontekstu (budżet ContextBuilder + odpowiedź)
+            provider_config['ollama_keep_alive'] = self.config.get('ollama', {}).get('keep_alive', DEFAULT_KEEP_ALIVE)
+            provider_config['ollama_num_ctx'] = context_window(self.config)
+            
+            # Pula połączeń, ponawianie i circuit breaker (wspólne lub w podsekcjach "openai" / "ollama")
+            provider_config['http'] = self.config.get('model_http', {})
+            
             # Utwórz provider
             provider = ModelFactory.create_provider(provider_config)
             logger.info(f"Model provider: {provider.__class__.__name__} - {provider.get_model_name()}")
@@ -1285,17 +1773,37 @@ class RAGSystem:
         else:
             logger.warning("Hybrydowe wyszukiwanie nie jest dostępne")
     
-    def index_documents(self, data_directory: str):
-        """Indeksuje dokumenty z katalogu"""
+    def get_document_processor(self, profile: Optional[str] = None) -> DocumentProcessor:
+        """
+        Zwraca procesor dokumentów dla profilu indeksowania (tworzony przy pierwszym użyciu).
+        
+        Args:
+            profile: fast / balanced / thorough lub profil z konfiguracji (None = domyślny)
+        """
+        name = resolve_profile(self.config, profile)
+        with self._processors_lock:
+            if name not in self._processors:
+                self._processors[name] = DocumentProcessor(config=self.config, profile=name)
+            return self._processors[name]
+    
+    def index_documents(self, data_directory: str, profile: Optional[str] = None):
+        """
+        Indeksuje dokumenty z katalogu.
+        
+        Args:
+            data_directory: Katalog z dokumentami
+            profile: Profil indeksowania (None = domyślny z konfiguracji)
+        """
+        processor = self.get_document_processor(profile)
         logger.info("="*60)
-        logger.info("ROZPOCZYNAM INDEKSOWANIE DOKUMENTÓW")
+        logger.info(f"ROZPOCZYNAM INDEKSOWANIE DOKUMENTÓW (profil: {processor.profile})")
         logger.info("="*60)
         start_time = time.time()
         
         try:
             # Przetwarzanie dokumentów
             logger.info("Etap 1: Przetwarzanie dokumentów")
-            chunks = self.doc_processor.process_directory(data_directory)
+            chunks = processor.process_directory(data_directory)
             logger.info(f"Etap 1 zakończony: {len(chunks)} fragmentów dokumentów")
             
             if not chunks:
@@ -1326,6 +1834,106 @@ class RAGSystem:
             logger.error(f"Błąd podczas indeksowania dokumentów: {e}", exc_info=True)
             raise
     
+    def index_file(self, file_path: Path,
+                   progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   profile: Optional[str] = None, explicit_profile: bool = False) -> Dict[str, Any]:
+        """
+        Indeksuje pojedynczy plik (UI, watcher).
+        
+        Długie nagrania publikowane są okno po oknie - pierwsze fragmenty są
+        wyszukiwalne przed końcem transkrypcji. Plik przerwany w trakcie
+        (status "indexing" w IndexStatusStore) jest wznawiany: okna z cache
+        nie trafiają ponownie do Whisper, a zapisane fragmenty nie są ponownie
+        embedowane.
+        
+        Przy jawnym wyborze profilu (UI) plik zaindeksowany innym profilem jest
+        indeksowany ponownie. Przebiegi automatyczne (watcher) indeksują ponownie
+        tylko profilem dokładniejszym od zapisanego. Przy zmianie profilu lub
+        wznowieniu poprzednie fragmenty pozostają wyszukiwalne do zapisania
+        nowej wersji; przy zmianie zawartości pliku są usuwane przed
+        indeksowaniem.
+        
+        Plik zaindeksowany przed wprowadzeniem stanu indeksowania dostaje stan
+        z bieżącym hashem (IndexStatusStore.adopt) - kolejna zmiana jego
+        zawartości wymusza reindeksację.
+        
+        Args:
+            file_path: Ścieżka do pliku
+            progress_callback: Wywoływane ze stanem pliku po każdej publikacji
+            profile: Profil indeksowania (None = domyślny z konfiguracji)
+            explicit_profile: Profil wybrany jawnie przez użytkownika - każda zmiana profilu wymusza reindeksację
+        
+        Returns:
+            {'stage': 'done' | 'skip' | 'empty' | 'error', 'chunks': liczba fragmentów, 'error': opis}
+        """
+        file_path = Path(file_path)
+        name = file_path.name
+        processor = self.get_document_processor(profile)
+        status_store = get_index_status_store()
+        collection = self.vector_db.collection
+        
+        existing = collection.get(where={"source_file": name}, include=['documents'])
+        existing = dict(zip(existing.get('ids') or [], existing.get('documents') or []))
+        record = status_store.get(name)
+        file_hash = hash_file(file_path)
+        
+        # Pliki zaindeksowane przed wprowadzeniem stanu indeksowania
+        if existing and record is None:
+            record = status_store.adopt(name, file_hash, len(existing))
+        
+        if status_store.is_complete(name, file_hash, processor.profile, exact_profile=explicit_profile) and existing:
+            return {'stage': 'skip', 'chunks': len(existing), 'error': None}
+        
+        # Ta sama zawartość (wznowienie lub zmiana profilu) - fragmenty spoza nowej wersji usuwane na końcu
+        same_content = bool(record) and record.get('file_hash') == file_hash
+        record = status_store.begin(name, file_hash, processor.profile)
+        rebuild_bm25 = False
+        if existing and not same_content:
+            # Nowa zawartość pliku o tej samej nazwie - stare fragmenty są usuwane
+            logger.info(f"[INDEX] Zawartość {name} zmieniła się - usuwam {len(existing)} starych fragmentów")
+            collection.delete(ids=list(existing))
+            existing = {}
+            rebuild_bm25 = True
+        
+        publisher = ChunkPublisher(self, name, existing=existing, progress_callback=progress_callback)
+        start_time = time.time()
+        
+        try:
+            chunks = processor.process_file(file_path, publish=publisher)
+            
+            if not chunks:
+                if publisher.written:
+                    # Procesor przerwał pracę po opublikowaniu części fragmentów - stan zostaje do wznowienia
+                    raise RuntimeError("Przetwarzanie przerwane po częściowej publikacji")
+                status_store.remove(name)
+                return {'stage': 'empty', 'chunks': 0, 'error': None}
+            
+            publisher.write(chunks)
+            
+            # Fragmenty z poprzedniej (przerwanej) próby, których nie ma w wersji ostatecznej
+            stale = set(publisher.published) - {chunk.id for chunk in chunks}
+            if stale:
+                collection.delete(ids=list(stale))
+                rebuild_bm25 = True
+            
+            if rebuild_bm25:
+                self.rebuild_bm25_index()
+            else:
+                publisher.flush_bm25()
+            
+            record = status_store.complete(name, len(chunks))
+            if progress_callback:
+                progress_callback(record)
+            logger.info(f"[INDEX] Zaindeksowano {name} (profil {processor.profile}): {len(chunks)} fragmentów "
+                        f"({publisher.written} zapisanych) w {time.time() - start_time:.2f} sekund")
+            return {'stage': 'done', 'chunks': len(chunks), 'error': None}
+        
+        except Exception as e:
+            logger.error(f"Błąd podczas indeksowania {name}: {e}", exc_info=True)
+            publisher.flush_bm25()
+            status_store.fail(name, str(e))
+            return {'stage': 'error', 'chunks': len(publisher.published), 'error': str(e)}
+    
     def _format_source_info(self, source: SourceReference) -> str:
         """Formatuje informacje o źródle"""
         info_parts = [f"Dokument: {source.source_file}"]
@@ -1340,7 +1948,28 @@ class RAGSystem:
     
     def query(self, question: str, n_results: int = 3, user_id: str = 'anonymous', session_id: str = None, 
               temperature: float = 0.1, top_p: float = 0.85, top_k: int = 30, max_tokens: int = 1000) -> str:
-        """Odpowiada na pytanie użytkownika"""
+        """Odpowiada na pytanie użytkownika (cała odpowiedź naraz - patrz query_stream)"""
+        return "".join(self.query_stream(
+            question, n_results=n_results, user_id=user_id, session_id=session_id,
+            temperature=temperature, top_p=top_p, top_k=top_k, max_tokens=max_tokens
+        ))
+    
+    def query_stream(self, question: str, n_results: int = 3, user_id: str = 'anonymous', session_id: str = None,
+                     temperature: float = 0.1, top_p: float = 0.85, top_k: int = 30, max_tokens: int = 1000,
+                     stats: Optional[GenerationStats] = None) -> Iterator[str]:
+        """
+        Odpowiada na pytanie użytkownika strumieniowo.
+        
+        Fragmenty odpowiedzi oddawane są w miarę generowania przez model,
+        lista źródeł na końcu. Czas do pierwszego tokenu i tokeny/s trafiają
+        do stats, logów i audit logu.
+        
+        Args:
+            stats: Metryki generowania do wypełnienia (np. do wyświetlenia w UI)
+        
+        Yields:
+            Kolejne fragmenty odpowiedzi
+        """
         logger.info("="*60)
         logger.info(f"ROZPOCZYNAM ODPOWIADANIE NA PYTANIE: {question}")
         logger.info("="*60)
@@ -1362,7 +1991,8 @@ class RAGSystem:
             # Sprawdź czy po filtrowaniu zostało jakieś pytanie
             if not question_cleaned or len(question_cleaned) < 3:
                 logger.warning("Pytanie jest puste po usunięciu powitań")
-                return "Proszę zadaj pytanie dotyczące dokumentów w bazie."
+                yield "Proszę zadaj pytanie dotyczące dokumentów w bazie."
+                return
             
             # Używamy oczyszczonego pytania
             question = question_cleaned
@@ -1401,22 +2031,27 @@ class RAGSystem:
             
             if not results:
                 logger.warning("Nie znaleziono odpowiednich informacji w bazie danych")
-                return "Nie znaleziono odpowiednich informacji w bazie danych."
+                yield "Nie znaleziono odpowiednich informacji w bazie danych."
+                return
             
             logger.info(f"Etap 1 zakończony: Znaleziono {len(results)} pasujących dokumentów")
             
             # Przygotowanie kontekstu dla modelu
             logger.info("Etap 2: Przygotowanie kontekstu dla modelu")
-            context_parts = []
-            sources_info = []
-            
-            for i, result in enumerate(results):
-                source_info = self._format_source_info(result)
-                context_parts.append(f"[{i+1}] {source_info}\nFragment: {result.content}")
-                sources_info.append(source_info)
-            
-            context = "\n\n".join(context_parts)
-            logger.info("Etap 2 zakończony: Przygotowano kontekst")
+            packed = self.context_builder.pack([
+                ContextFragment(
+                    header=self._format_source_info(result),
+                    content=result.content,
+                    source_file=result.source_file,
+                    page_number=result.page_number,
+                    id=result.id
+                )
+                for result in results
+            ])
+            context = packed.text
+            sources_info = [fragment.header for fragment in packed.fragments]
+            logger.info(f"Etap 2 zakończony: Przygotowano kontekst ({len(packed.fragments)} fragmentów, "
+                        f"~{packed.tokens}/{packed.budget} tokenów)")
             
             # Przygotowanie promptu dla modelu
             system_prompt = """Jesteś asystentem analizującym dokumenty. Twoim zadaniem jest odpowiedzieć na pytanie użytkownika WYŁĄCZNIE na podstawie dostarczonych fragmentów dokumentów.
@@ -1439,20 +2074,32 @@ Odpowiedź (bazując TYLKO na powyższych fragmentach):"""
             # Wysłanie zapytania do modelu (OpenAI lub Ollama)
             logger.info(f"Etap 3: Generowanie odpowiedzi przez model {self.model_provider.get_model_name()}")
             response_start = time.time()
+            stats = stats if stats is not None else GenerationStats()
+            prompt_raw_tokens = self.context_builder.count(f"{system_prompt}\n\n{user_context}", calibrated=False)
+            stats.prompt_estimate = self.context_builder.scale(prompt_raw_tokens)
+            answer_parts = []
             
             try:
-                answer = self.model_provider.generate(
+                for token in self.model_provider.generate_stream(
                     prompt=system_prompt,
                     context=user_context,
+                    stats=stats,
                     temperature=temperature,
                     max_tokens=max_tokens,
                     top_k=top_k,
                     top_p=top_p,
-                    timeout=300
-                )
+                    timeout=300,
+                    user_id=user_id
+                ):
+                    answer_parts.append(token)
+                    yield token
+                answer = "".join(answer_parts)
+                if stats.prompt_tokens:
+                    self.context_builder.calibrate(prompt_raw_tokens, stats.prompt_tokens)
                 
                 response_time = time.time() - response_start
-                logger.info(f"Etap 3 zakończony: Odpowiedź wygenerowana w {response_time:.2f} sekund")
+                logger.info(f"Etap 3 zakończony: Odpowiedź wygenerowana w {response_time:.2f} sekund "
+                            f"(pierwszy token po {stats.ttft or 0:.2f}s, {stats.tokens_per_second:.1f} tokenów/s)")
                 
                 # Dodanie informacji o źródłach
                 sources_text = "\n\nŹródła:\n" + "\n".join([
@@ -1486,20 +2133,22 @@ Odpowiedź (bazując TYLKO na powyższych fragmentach):"""
                         response=answer,
                         sources=audit_sources,
                         model=self.model_provider.get_model_name(),
-                        time_ms=total_time * 1000
+                        time_ms=total_time * 1000,
+                        generation={**stats.as_dict(), 'context': packed.as_dict()}
                     )
                 except Exception as audit_error:
                     logger.warning(f"Błąd audit log: {audit_error}")
                 
-                return answer + sources_text
+                yield sources_text
                 
             except Exception as model_error:
                 logger.error(f"Błąd podczas generowania odpowiedzi przez model: {model_error}", exc_info=True)
-                return f"Wystąpił błąd podczas generowania odpowiedzi: {str(model_error)}"
+                separator = "\n\n" if answer_parts else ""
+                yield f"{separator}Wystąpił błąd podczas generowania odpowiedzi: {str(model_error)}"
                 
         except Exception as e:
             logger.error(f"Błąd podczas przetwarzania zapytania: {e}", exc_info=True)
-            return "Wystąpił błąd podczas przetwarzania zapytania."
+            yield "Wystąpił błąd podczas przetwarzania zapytania."
     
     def generate_questions_for_file(self, file_name: str, max_questions: int = 3) -> List[str]:
         """Generuje przykładowe pytania dla danego pliku na podstawie jego treści"""
@@ -1639,7 +2288,7 @@ def main():
     # Sprawdzenie argumentów linii poleceń
     if len(sys.argv) < 2:
         print("Użycie:")
-        print("  Indeksowanie dokumentów: python rag_system.py index <ścieżka_do_katalogu>")
+        print("  Indeksowanie dokumentów: python rag_system.py index <ścieżka_do_katalogu> [--profile fast|balanced|thorough]")
         print("  Zadanie pytania: python rag_system.py query \"Twoje pytanie\"")
         return
     
@@ -1651,7 +2300,14 @@ def main():
             return
         
         data_directory = sys.argv[2]
-        rag_system.index_documents(data_directory)
+        profile = None
+        if "--profile" in sys.argv[3:]:
+            profile_idx = sys.argv.index("--profile") + 1
+            if profile_idx >= len(sys.argv):
+                print("Podaj nazwę profilu: fast, balanced lub thorough")
+                return
+            profile = sys.argv[profile_idx]
+        rag_system.index_documents(data_directory, profile=profile)
     
     elif command == "query":
         if len(sys.argv) < 3:
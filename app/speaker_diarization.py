@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Speaker Diarization - rozpoznawanie mówców przez analizę barwy głosu.
+
+Obsługuje:
+- Cechy ramek (MFCC, pitch, energia, centroid widma) liczone raz dla całego
+  nagrania - jedno STFT na blok audio zamiast osobnego na każdy segment
+- Agregację cech per segment sumami skumulowanymi (NumPy, bez pętli po ramkach)
+- Klastrowanie hierarchiczne segmentów w mówców (SPEAKER_N)
+- Opcjonalny backend neuronowy: embeddingi mówców ECAPA (speechbrain) liczone
+  paczkami na CPU, cache embeddingów per segment, klastrowanie cosinusowe
+
+Czas i pamięć rosną liniowo z długością nagrania (STFT liczone blokami).
+"""
+
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+BLOCK_FRAMES = 4096             # Ramki STFT liczone naraz (~2 min audio przy 16 kHz)
+
+DEFAULT_DISTANCE_THRESHOLD = 18.0   # Wysoki próg = mało klastrów (2-5 osób)
+DEFAULT_MIN_SEGMENT_SECONDS = 0.4   # Krótsze segmenty nie są analizowane
+
+# Backend neuronowy (speechbrain ECAPA-TDNN)
+BASE_DIR = Path(__file__).resolve().parent.parent
+SPKREC_MODEL = "speechbrain/spkrec-ecapa-voxceleb"
+SPKREC_MODEL_DIR = BASE_DIR / "models" / "spkrec_model"
+DEFAULT_COSINE_THRESHOLD = 0.55     # Odległość cosinusowa łączenia klastrów (average linkage)
+EMBEDDING_BATCH_SIZE = 32
+MAX_EMBEDDING_SECONDS = 10.0        # Z dłuższych segmentów brany jest środkowy fragment
+
+# Kolumny macierzy cech ramek
+_MFCC = slice(0, N_MFCC)
+_PITCH_SUM, _PITCH_SQ_SUM, _PITCH_COUNT, _RMS, _CENTROID = range(N_MFCC, N_MFCC + 5)
+
+
+def compute_frame_features(audio: np.ndarray, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Liczy cechy wszystkich ramek nagrania.
+
+    Ramka t obejmuje próbki [t*HOP_LENGTH, t*HOP_LENGTH + N_FFT). Audio
+    przetwarzane jest blokami z zakładką N_FFT - HOP_LENGTH, więc wynik
+    jest identyczny jak dla jednego STFT, a pamięć nie zależy od długości.
+
+    Args:
+        audio: Próbki mono float32
+        sr: Częstotliwość próbkowania
+
+    Returns:
+        Macierz (liczba ramek, N_MFCC + 5): MFCC, suma/suma kwadratów/liczba
+        wartości pitch, RMS, centroid widma
+    """
+    import librosa
+
+    if len(audio) < N_FFT:
+        audio = np.pad(audio, (0, N_FFT - len(audio)))
+    n_frames = 1 + (len(audio) - N_FFT) // HOP_LENGTH
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=N_FFT)
+
+    blocks = []
+    for first in range(0, n_frames, BLOCK_FRAMES):
+        last = min(first + BLOCK_FRAMES, n_frames)
+        block = audio[first * HOP_LENGTH:(last - 1) * HOP_LENGTH + N_FFT]
+        S = np.abs(librosa.stft(block, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False))
+
+        mel_db = librosa.power_to_db(mel_basis @ (S ** 2), top_db=None)
+        mfcc = librosa.feature.mfcc(S=mel_db, n_mfcc=N_MFCC)
+
+        pitches, _ = librosa.piptrack(S=S, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH)
+        voiced = pitches > 0
+
+        rms = librosa.feature.rms(S=S, frame_length=N_FFT, hop_length=HOP_LENGTH, center=False)[0]
+        centroid = librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH)[0]
+
+        blocks.append(np.column_stack([
+            mfcc.T,
+            pitches.sum(axis=0),
+            (pitches ** 2).sum(axis=0),
+            voiced.sum(axis=0),
+            rms,
+            centroid
+        ]))
+
+    return np.vstack(blocks).astype(np.float64)
+
+
+def segment_features(
+    frame_features: np.ndarray,
+    bounds: List[Tuple[float, float]],
+    sr: int = SAMPLE_RATE,
+    extended: bool = False
+) -> np.ndarray:
+    """
+    Agreguje cechy ramek w cechy segmentów (sumy skumulowane).
+
+    Args:
+        frame_features: Wynik compute_frame_features
+        bounds: Lista (początek, koniec) segmentów w sekundach
+        sr: Częstotliwość próbkowania
+        extended: False = MFCC + pitch + energia (15 wymiarów),
+            True = dodatkowo odchylenia MFCC i pitch oraz centroid (30 wymiarów)
+
+    Returns:
+        Macierz (liczba segmentów, wymiar cech)
+    """
+    n_frames = len(frame_features)
+    starts = np.array([int(start * sr) // HOP_LENGTH for start, _ in bounds])
+    ends = np.array([-(-int(end * sr) // HOP_LENGTH) for _, end in bounds])
+    starts = np.clip(starts, 0, n_frames - 1)
+    ends = np.clip(np.maximum(ends, starts + 1), 1, n_frames)
+
+    cumsum = np.vstack([np.zeros((1, frame_features.shape[1])), np.cumsum(frame_features, axis=0)])
+    sums = cumsum[ends] - cumsum[starts]
+    counts = (ends - starts)[:, None]
+    means = sums / counts
+
+    mfcc_mean = means[:, _MFCC]
+    pitch_count = np.maximum(sums[:, _PITCH_COUNT], 1)
+    pitch_mean = sums[:, _PITCH_SUM] / pitch_count
+    energy = means[:, _RMS]
+
+    if not extended:
+        return np.column_stack([mfcc_mean, pitch_mean, energy])
+
+    mfcc_sq = np.cumsum(frame_features[:, _MFCC] ** 2, axis=0)
+    mfcc_sq = np.vstack([np.zeros((1, N_MFCC)), mfcc_sq])
+    mfcc_var = (mfcc_sq[ends] - mfcc_sq[starts]) / counts - mfcc_mean ** 2
+    pitch_var = sums[:, _PITCH_SQ_SUM] / pitch_count - pitch_mean ** 2
+
+    return np.column_stack([
+        mfcc_mean,
+        np.sqrt(np.maximum(mfcc_var, 0)),
+        pitch_mean,
+        np.sqrt(np.maximum(pitch_var, 0)),
+        energy,
+        means[:, _CENTROID]
+    ])
+
+
+def cluster_speakers(features: np.ndarray, distance_threshold: float, linkage: str = 'ward') -> np.ndarray:
+    """Grupuje segmenty w mówców (klastrowanie hierarchiczne na cechach znormalizowanych)"""
+    from sklearn.cluster import AgglomerativeClustering
+    from sklearn.preprocessing import StandardScaler
+
+    features_normalized = StandardScaler().fit_transform(features)
+    clustering = AgglomerativeClustering(
+        n_clusters=None,
+        distance_threshold=distance_threshold,
+        linkage=linkage
+    )
+    return clustering.fit_predict(features_normalized)
+
+
+class SpeakerDiarizer:
+    """
+    Przypisuje segmentom transkrypcji mówców na podstawie barwy głosu.
+
+    Zwraca speaker_map {indeks segmentu: "SPEAKER_N"} - segmenty zbyt krótkie
+    do analizy nie trafiają do mapy (wywołujący traktuje je jak SPEAKER_0).
+    """
+
+    def __init__(
+        self,
+        distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD,
+        min_segment_seconds: float = DEFAULT_MIN_SEGMENT_SECONDS,
+        extended_features: bool = False
+    ):
+        """
+        Inicjalizuje diaryzację.
+
+        Args:
+            distance_threshold: Próg odległości łączenia klastrów (ward)
+            min_segment_seconds: Minimalna długość analizowanego segmentu
+            extended_features: Rozszerzony zestaw cech (30 wymiarów)
+        """
+        self.distance_threshold = distance_threshold
+        self.min_segment_seconds = min_segment_seconds
+        self.extended_features = extended_features
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'SpeakerDiarizer':
+        """Tworzy diaryzację na podstawie sekcji "diarization" konfiguracji"""
+        return cls(
+            distance_threshold=config.get('distance_threshold', DEFAULT_DISTANCE_THRESHOLD),
+            min_segment_seconds=config.get('min_segment_seconds', DEFAULT_MIN_SEGMENT_SECONDS),
+            extended_features=config.get('extended_features', False)
+        )
+
+    def valid_segments(self, segments: List[Dict[str, Any]], duration: float) -> List[int]:
+        """Zwraca indeksy segmentów nadających się do analizy"""
+        return [
+            i for i, seg in enumerate(segments)
+            if seg.get('end', 0) - seg.get('start', 0) > self.min_segment_seconds
+            and seg.get('end', 0) <= duration
+        ]
+
+    def diarize(self, audio: np.ndarray, segments: List[Dict[str, Any]],
+                sr: int = SAMPLE_RATE) -> Optional[Dict[int, str]]:
+        """
+        Rozpoznaje mówców segmentów.
+
+        Args:
+            audio: Próbki mono float32 całego nagrania
+            segments: Segmenty Whisper ('start', 'end' w sekundach)
+            sr: Częstotliwość próbkowania
+
+        Returns:
+            speaker_map lub None gdy segmentów do analizy jest za mało
+        """
+        valid = self.valid_segments(segments, len(audio) / sr)
+        if len(valid) < 2:
+            return None
+
+        frame_features = compute_frame_features(audio, sr)
+        features = segment_features(
+            frame_features,
+            [(segments[i].get('start', 0), segments[i].get('end', 0)) for i in valid],
+            sr,
+            extended=self.extended_features
+        )
+        labels = cluster_speakers(features, self.distance_threshold)
+
+        logger.info(f"[DIARIZATION] Wykryto {len(set(labels))} mówców "
+                    f"({len(valid)}/{len(segments)} segmentów, {len(frame_features)} ramek)")
+        return {seg_idx: f"SPEAKER_{label}" for seg_idx, label in zip(valid, labels)}
+
+
+class EmbeddingDiarizer(SpeakerDiarizer):
+    """
+    Diaryzacja na embeddingach mówców ECAPA-TDNN (speechbrain).
+
+    Segmenty sortowane są po długości i przetwarzane paczkami (mało paddingu),
+    embeddingi zapisywane w ArtifactCache po hashu próbek segmentu. Klastrowanie:
+    odległość cosinusowa + average linkage (scipy). Interfejs jak SpeakerDiarizer.
+    """
+
+    _encoder = None
+    _encoder_lock = threading.Lock()
+
+    def __init__(
+        self,
+        distance_threshold: float = DEFAULT_COSINE_THRESHOLD,
+        min_segment_seconds: float = DEFAULT_MIN_SEGMENT_SECONDS,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        artifact_cache=None
+    ):
+        """
+        Inicjalizuje diaryzację neuronową (model ładowany przy pierwszym użyciu).
+
+        Args:
+            distance_threshold: Próg odległości cosinusowej łączenia klastrów
+            min_segment_seconds: Minimalna długość analizowanego segmentu
+            batch_size: Liczba segmentów w jednym przebiegu modelu
+            artifact_cache: Opcjonalny ArtifactCache na embeddingi segmentów
+        """
+        super().__init__(distance_threshold=distance_threshold, min_segment_seconds=min_segment_seconds)
+        self.batch_size = max(1, batch_size)
+        self.artifact_cache = artifact_cache
+
+    @classmethod
+    def encoder(cls):
+        """Zwraca współdzielony enkoder ECAPA (pobierany do models/spkrec_model)"""
+        with cls._encoder_lock:
+            if cls._encoder is None:
+                try:
+                    from speechbrain.inference.speaker import EncoderClassifier
+                except ImportError:
+                    from speechbrain.pretrained import EncoderClassifier  # speechbrain < 1.0
+
+                logger.info(f"[DIARIZATION] Ładowanie modelu {SPKREC_MODEL}...")
+                cls._encoder = EncoderClassifier.from_hparams(
+                    source=SPKREC_MODEL,
+                    savedir=str(SPKREC_MODEL_DIR),
+                    run_opts={"device": "cpu"}
+                )
+            return cls._encoder
+
+    def embed_segments(self, audio: np.ndarray, bounds: List[Tuple[float, float]],
+                       sr: int = SAMPLE_RATE) -> np.ndarray:
+        """
+        Liczy embeddingi segmentów (z cache, brakujące paczkami).
+
+        Args:
+            audio: Próbki mono float32 (16 kHz)
+            bounds: Lista (początek, koniec) segmentów w sekundach
+            sr: Częstotliwość próbkowania
+
+        Returns:
+            Macierz (liczba segmentów, 192)
+        """
+        max_samples = int(MAX_EMBEDDING_SECONDS * sr)
+        clips = []
+        for start, end in bounds:
+            clip = audio[int(start * sr):int(end * sr)]
+            if len(clip) > max_samples:
+                offset = (len(clip) - max_samples) // 2
+                clip = clip[offset:offset + max_samples]
+            clips.append(np.ascontiguousarray(clip, dtype=np.float32))
+
+        hashes = [hashlib.sha256(clip.tobytes()).hexdigest() for clip in clips]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(clips)
+        if self.artifact_cache is not None:
+            for i, clip_hash in enumerate(hashes):
+                cached = self.artifact_cache.get('speaker_embedding', clip_hash, SPKREC_MODEL, str(MAX_EMBEDDING_SECONDS))
+                if cached is not None:
+                    embeddings[i] = np.asarray(cached, dtype=np.float32)
+
+        missing = sorted((i for i, e in enumerate(embeddings) if e is None), key=lambda i: len(clips[i]))
+        if missing:
+            import torch
+
+            encoder = self.encoder()
+            for first in range(0, len(missing), self.batch_size):
+                batch = missing[first:first + self.batch_size]
+                longest = max(len(clips[i]) for i in batch)
+                wavs = torch.zeros(len(batch), longest)
+                for row, i in enumerate(batch):
+                    wavs[row, :len(clips[i])] = torch.from_numpy(clips[i])
+                wav_lens = torch.tensor([len(clips[i]) / longest for i in batch])
+
+                with torch.no_grad():
+                    output = encoder.encode_batch(wavs, wav_lens).squeeze(1).cpu().numpy()
+
+                for row, i in enumerate(batch):
+                    embeddings[i] = output[row]
+                    if self.artifact_cache is not None:
+                        self.artifact_cache.set('speaker_embedding', hashes[i], SPKREC_MODEL,
+                                                str(MAX_EMBEDDING_SECONDS), output[row].tolist())
+
+        logger.debug(f"[DIARIZATION] Embeddingi: {len(clips) - len(missing)} z cache, {len(missing)} policzone")
+        return np.vstack(embeddings)
+
+    def diarize(self, audio: np.ndarray, segments: List[Dict[str, Any]],
+                sr: int = SAMPLE_RATE) -> Optional[Dict[int, str]]:
+        """Rozpoznaje mówców segmentów (ten sam format wyniku co SpeakerDiarizer)"""
+        from scipy.cluster.hierarchy import fcluster, linkage
+
+        valid = self.valid_segments(segments, len(audio) / sr)
+        if len(valid) < 2:
+            return None
+
+        embeddings = self.embed_segments(
+            audio, [(segments[i].get('start', 0), segments[i].get('end', 0)) for i in valid], sr
+        )
+        tree = linkage(embeddings, method='average', metric='cosine')
+        clusters = fcluster(tree, t=self.distance_threshold, criterion='distance')
+
+        # Numeracja mówców w kolejności pierwszej wypowiedzi
+        order = {}
+        for cluster in clusters:
+            order.setdefault(cluster, len(order))
+
+        logger.info(f"[DIARIZATION] Wykryto {len(order)} mówców (embeddingi ECAPA, "
+                    f"{len(valid)}/{len(segments)} segmentów)")
+        return {seg_idx: f"SPEAKER_{order[cluster]}" for seg_idx, cluster in zip(valid, clusters)}
+
+
+def create_diarizer(config: Dict[str, Any], artifact_cache=None) -> SpeakerDiarizer:
+    """
+    Tworzy diaryzację wybraną w sekcji "diarization" konfiguracji.
+
+    backend: "features" (MFCC + pitch, domyślnie) lub "embeddings" (speechbrain ECAPA).
+    Gdy speechbrain nie jest zainstalowany, używany jest backend "features".
+    """
+    if config.get('backend', 'features') == 'embeddings':
+        try:
+            import speechbrain  # noqa: F401
+            return EmbeddingDiarizer(
+                distance_threshold=config.get('cosine_threshold', DEFAULT_COSINE_THRESHOLD),
+                min_segment_seconds=config.get('min_segment_seconds', DEFAULT_MIN_SEGMENT_SECONDS),
+                batch_size=config.get('batch_size', EMBEDDING_BATCH_SIZE),
+                artifact_cache=artifact_cache
+            )
+        except ImportError:
+            logger.warning("speechbrain niedostępny - diaryzacja na cechach MFCC + pitch")
+    return SpeakerDiarizer.from_config(config)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Text Chunker - podział tekstu na fragmenty mierzone w tokenach.
+
+Obsługuje:
+- Liczenie tokenów tokenizerem modelu embeddingów (e5-large, ładowany raz na proces)
+  z estymatorem znakowym, gdy tokenizer jest niedostępny
+- Granice zdań lub akapitów (zdania dzielone na słowa tylko gdy przekraczają limit,
+  słowa dłuższe niż limit - np. URL-e - cięte według offsetów tokenizera)
+- Konfigurowalną zakładkę (overlap) między kolejnymi fragmentami
+- Czas liniowy względem długości tekstu
+"""
+
+import logging
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+EMBEDDING_MODELS_DIR = BASE_DIR / "models" / "embeddings"
+TOKENIZER_MODEL = "intfloat/multilingual-e5-large"
+
+# e5-large obcina wejście na 512 tokenach, reranker (MiniLM) liczy 512 razem z zapytaniem
+DEFAULT_MAX_TOKENS = 256
+DEFAULT_OVERLAP_TOKENS = 32
+DEFAULT_BOUNDARY = "sentence"        # "sentence" lub "paragraph"
+CHARS_PER_TOKEN = 3.5                # Estymator dla polskiego tekstu (tokenizer XLM-R)
+
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n')
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?…])\s+|\n')
+
+_tokenizer_lock = threading.Lock()
+_token_counter: Optional['TokenCounter'] = None
+
+
+class TokenCounter:
+    """Liczy tokeny tokenizerem embeddingów lub estymatorem znakowym"""
+
+    def __init__(self, model_name: str = TOKENIZER_MODEL, cache_dir: Path = EMBEDDING_MODELS_DIR):
+        self.model_name = model_name
+        self.tokenizer = None
+        try:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=str(cache_dir))
+            logger.info(f"TokenCounter: tokenizer {model_name}")
+        except Exception as e:
+            logger.warning(f"Tokenizer {model_name} niedostępny - używam estymatora "
+                           f"({CHARS_PER_TOKEN} znaku/token): {e}")
+
+    @property
+    def exact(self) -> bool:
+        """Czy liczenie używa prawdziwego tokenizera"""
+        return self.tokenizer is not None
+
+    def count(self, text: str) -> int:
+        """Zwraca liczbę tokenów tekstu (bez tokenów specjalnych)"""
+        return self.count_many([text])[0]
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Zwraca liczby tokenów dla listy tekstów (jedno wywołanie tokenizera)"""
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            return [math.ceil(len(text) / CHARS_PER_TOKEN) for text in texts]
+        encoded = self.tokenizer(texts, add_special_tokens=False)['input_ids']
+        return [len(ids) for ids in encoded]
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """
+        Tnie tekst na kawałki po max_tokens tokenów niezależnie od granic słów.
+
+        Cięcie według offsetów tokenizera (bez tokenizera - co max_tokens
+        * CHARS_PER_TOKEN znaków). Używane dla "słów" dłuższych niż limit,
+        np. długich URL-i lub ciągów bez spacji.
+        """
+        max_tokens = max(1, max_tokens)
+        if self.tokenizer is None:
+            size = max(1, int(max_tokens * CHARS_PER_TOKEN))
+            return [text[i:i + size] for i in range(0, len(text), size)]
+
+        offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)['offset_mapping']
+        # Margines na różnicę tokenizacji kawałka wyciętego ze środka tekstu
+        step = max(1, max_tokens - 2)
+        pieces = []
+        for i in range(0, len(offsets), step):
+            start = offsets[i][0] if i else 0
+            end = offsets[i + step][0] if i + step < len(offsets) else len(text)
+            piece = text[start:end].strip()
+            if piece:
+                pieces.append(piece)
+        return pieces
+
+
+def get_token_counter() -> TokenCounter:
+    """Zwraca współdzielony TokenCounter (tokenizer ładowany raz na proces)"""
+    global _token_counter
+    if _token_counter is None:
+        with _tokenizer_lock:
+            if _token_counter is None:
+                _token_counter = TokenCounter()
+    return _token_counter
+
+
+class TextChunker:
+    """
+    Dzieli tekst na fragmenty o ograniczonej liczbie tokenów.
+
+    Tekst jest dzielony na jednostki (zdania lub akapity), tokeny liczone
+    są raz dla wszystkich jednostek, a fragmenty składane zachłannie
+    w jednym przebiegu - bez wielokrotnego sklejania rosnących stringów.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        boundary: str = DEFAULT_BOUNDARY,
+        counter: Optional[TokenCounter] = None
+    ):
+        """
+        Inicjalizuje chunker.
+
+        Args:
+            max_tokens: Maksymalna liczba tokenów fragmentu
+            overlap_tokens: Liczba tokenów powtarzanych z końca poprzedniego fragmentu
+            boundary: "sentence" (fragmenty ze zdań) lub "paragraph" (z całych akapitów)
+            counter: Licznik tokenów (domyślnie współdzielony tokenizer e5)
+        """
+        if boundary not in ("sentence", "paragraph"):
+            raise ValueError(f"Nieznany typ granicy fragmentów: {boundary}")
+
+        self.max_tokens = max(16, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self.boundary = boundary
+        self._counter = counter
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'TextChunker':
+        """Tworzy chunker na podstawie sekcji "chunking" konfiguracji"""
+        return cls(
+            max_tokens=config.get('max_tokens', DEFAULT_MAX_TOKENS),
+            overlap_tokens=config.get('overlap_tokens', DEFAULT_OVERLAP_TOKENS),
+            boundary=config.get('boundary', DEFAULT_BOUNDARY)
+        )
+
+    @property
+    def counter(self) -> TokenCounter:
+        if self._counter is None:
+            self._counter = get_token_counter()
+        return self._counter
+
+    def count_tokens(self, text: str) -> int:
+        """Zwraca liczbę tokenów tekstu"""
+        return self.counter.count(text)
+
+    def chunk(self, text: str) -> List[str]:
+        """
+        Dzieli tekst na fragmenty.
+
+        Args:
+            text: Tekst do podziału
+
+        Returns:
+            Lista fragmentów (każdy w limicie max_tokens)
+        """
+        if not text or not text.strip():
+            return []
+
+        # Jednostki: (tekst, początek nowego akapitu)
+        units = []
+        for paragraph in _PARAGRAPH_SPLIT.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if self.boundary == "paragraph":
+                units.append((paragraph, True))
+            else:
+                sentences = [s.strip() for s in _SENTENCE_SPLIT.split(paragraph) if s.strip()]
+                units.extend((sentence, i == 0) for i, sentence in enumerate(sentences))
+
+        tokens = self.counter.count_many([unit for unit, _ in units])
+        units = self._split_oversized(units, tokens)
+        return self._pack(units)
+
+    def _split_oversized(self, units, tokens):
+        """Dzieli jednostki dłuższe niż limit (akapit → zdania → słowa)"""
+        result = []
+        for (unit, new_paragraph), count in zip(units, tokens):
+            if count <= self.max_tokens:
+                result.append((unit, new_paragraph, count))
+                continue
+
+            if self.boundary == "paragraph":
+                sentences = [s.strip() for s in _SENTENCE_SPLIT.split(unit) if s.strip()]
+                if len(sentences) > 1:
+                    sub_units = [(s, new_paragraph and i == 0) for i, s in enumerate(sentences)]
+                    result.extend(self._split_oversized(sub_units, self.counter.count_many(sentences)))
+                    continue
+
+            # Pojedyncze zbyt długie zdanie - podział po słowach, słowa dłuższe niż limit cięte twardo
+            pieces = self._split_words(unit)
+            for i, (piece, piece_count) in enumerate(zip(pieces, self.counter.count_many(pieces))):
+                if piece_count > self.max_tokens:
+                    hard = self.counter.split(piece, self.max_tokens)
+                    for j, (part, part_count) in enumerate(zip(hard, self.counter.count_many(hard))):
+                        result.append((part, new_paragraph and i == 0 and j == 0, part_count))
+                else:
+                    result.append((piece, new_paragraph and i == 0, piece_count))
+        return result
+
+    def _split_words(self, unit: str) -> List[str]:
+        """Składa słowa zachłannie w kawałki do max_tokens (słowo ponad limit - cięte po tokenach)"""
+        words = unit.split()
+        pieces = []
+        current = []
+        current_tokens = 0
+        for word, word_tokens in zip(words, self.counter.count_many(words)):
+            if word_tokens > self.max_tokens:
+                if current:
+                    pieces.append(" ".join(current))
+                    current, current_tokens = [], 0
+                pieces.extend(self.counter.split(word, self.max_tokens))
+                continue
+            if current and current_tokens + word_tokens > self.max_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += word_tokens
+        if current:
+            pieces.append(" ".join(current))
+        return pieces
+
+    def _pack(self, units) -> List[str]:
+        """Składa jednostki we fragmenty z zakładką (jeden przebieg)"""
+        chunks = []
+        current = []        # [(tekst, nowy akapit, tokeny)]
+        current_tokens = 0
+
+        for unit in units:
+            if current and current_tokens + unit[2] > self.max_tokens:
+                chunks.append(self._join(current))
+
+                # Zakładka: końcowe jednostki poprzedniego fragmentu mieszczące się w overlap_tokens
+                overlap = []
+                overlap_tokens = 0
+                for previous in reversed(current):
+                    if overlap_tokens + previous[2] > self.overlap_tokens:
+                        break
+                    overlap.append(previous)
+                    overlap_tokens += previous[2]
+                overlap.reverse()
+
+                if overlap_tokens + unit[2] > self.max_tokens:
+                    overlap, overlap_tokens = [], 0
+                current, current_tokens = overlap, overlap_tokens
+
+            current.append(unit)
+            current_tokens += unit[2]
+
+        if current:
+            chunks.append(self._join(current))
+        return chunks
+
+    @staticmethod
+    def _join(units) -> str:
+        """Łączy jednostki (zdania spacją, akapity pustą linią)"""
+        parts = []
+        for i, (text, new_paragraph, _) in enumerate(units):
+            if i > 0:
+                parts.append("\n\n" if new_paragraph else " ")
+            parts.append(text)
+        return "".join(parts)
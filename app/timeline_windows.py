@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Timeline Windows - łączenie elementów osi czasu nagrań w okna.
+
+Obsługuje:
+- Grupowanie kolejnych segmentów transkrypcji i opisów klatek w okna
+  z limitem długości (sekundy) i liczby tokenów
+- Grupowanie zachłanne i stabilne względem prefiksu - zamknięte okna nie
+  zmieniają się po dołożeniu kolejnych elementów (publikacja w trakcie)
+- Formatowanie znaczników czasu MM:SS
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from text_chunker import TokenCounter, get_token_counter
+
+logger = logging.getLogger(__name__)
+
+# Sekcja "consolidation" konfiguracji
+DEFAULT_AUDIO_WINDOW_SECONDS = 60.0
+DEFAULT_VIDEO_WINDOW_SECONDS = 30.0
+DEFAULT_WINDOW_MAX_TOKENS = 384     # e5-large obcina wejście na 512 tokenach
+LINE_OVERHEAD_TOKENS = 8            # Znacznik czasu i etykieta (mówca, Audio/Video) w każdej linii
+
+
+def format_timestamp(seconds: float) -> str:
+    """Formatuje czas jako MM:SS (minuty mogą przekraczać 59)"""
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class TimelineWindower:
+    """
+    Dzieli oś czasu nagrania na okna.
+
+    Elementy to słowniki z polami 'start', 'end' (sekundy) i 'text'. Okno
+    jest zamykane, gdy kolejny element wydłużyłby je ponad window_seconds
+    lub przekroczył max_tokens. Liczba tokenów elementu liczona jest raz
+    i zapamiętywana w polu 'tokens'.
+    """
+
+    def __init__(self, window_seconds: float, max_tokens: int = DEFAULT_WINDOW_MAX_TOKENS,
+                 counter: Optional[TokenCounter] = None):
+        """
+        Inicjalizuje podział na okna.
+
+        Args:
+            window_seconds: Maksymalna długość okna (s)
+            max_tokens: Maksymalna liczba tokenów okna
+            counter: Licznik tokenów (domyślnie współdzielony tokenizer e5)
+        """
+        self.window_seconds = max(1.0, window_seconds)
+        self.max_tokens = max(32, max_tokens)
+        self._counter = counter
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], media: str) -> 'TimelineWindower':
+        """
+        Tworzy podział na okna na podstawie sekcji "consolidation" konfiguracji.
+
+        Args:
+            config: Sekcja "consolidation"
+            media: "audio" lub "video"
+        """
+        default_seconds = DEFAULT_AUDIO_WINDOW_SECONDS if media == "audio" else DEFAULT_VIDEO_WINDOW_SECONDS
+        return cls(
+            window_seconds=config.get(f'{media}_window_seconds', default_seconds),
+            max_tokens=config.get('max_tokens', DEFAULT_WINDOW_MAX_TOKENS)
+        )
+
+    @property
+    def counter(self) -> TokenCounter:
+        if self._counter is None:
+            self._counter = get_token_counter()
+        return self._counter
+
+    def group(self, items: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Grupuje elementy (w kolejności osi czasu) w okna.
+
+        Args:
+            items: Elementy z polami 'start', 'end', 'text'
+
+        Returns:
+            Lista okien (list elementów)
+        """
+        uncounted = [item for item in items if 'tokens' not in item]
+        if uncounted:
+            counts = self.counter.count_many([item['text'] for item in uncounted])
+            for item, count in zip(uncounted, counts):
+                item['tokens'] = count + LINE_OVERHEAD_TOKENS
+
+        windows = []
+        current = []
+        current_tokens = 0
+        for item in items:
+            if current and (item['end'] - current[0]['start'] > self.window_seconds
+                            or current_tokens + item['tokens'] > self.max_tokens):
+                windows.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += item['tokens']
+
+        if current:
+            windows.append(current)
+        return windows
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Video Frames - próbkowanie klatek wideo jednym przebiegiem strumienia.
+
+Obsługuje:
+- Odczyt parametrów wideo (FPS, liczba klatek, długość)
+- Sekwencyjne przejście przez strumień: grab() dla każdej klatki (bez konwersji
+  obrazu), retrieve() tylko dla klatek próbkowanych - bez seeków, które przy
+  długim GOP H.264 dekodują od poprzedniej klatki kluczowej za każdym razem
+- Generator (sekunda, klatka BGR) - klatki nie są trzymane w pamięci
+- Filtr zmian sceny (dHash) z limitem klatek na wideo - statyczne ujęcia
+  nie są wielokrotnie wysyłane do modelu wizyjnego
+"""
+
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_INTERVAL = 1     # Jedna klatka na sekundę
+
+# Filtr zmian sceny (sekcja "video" konfiguracji)
+DEFAULT_SCENE_THRESHOLD = 10    # Różnych bitów dHash (z 64), od których klatka jest "nowa"
+DEFAULT_MAX_FRAMES = 600        # Maksymalna liczba klatek opisywanych w jednym wideo
+
+
+def probe_video(file_path: Union[str, Path]) -> Tuple[float, int, float]:
+    """
+    Odczytuje parametry wideo.
+
+    Args:
+        file_path: Ścieżka do pliku wideo
+
+    Returns:
+        (FPS, liczba klatek, długość w sekundach)
+    """
+    import cv2
+
+    video = cv2.VideoCapture(str(file_path))
+    try:
+        fps = video.get(cv2.CAP_PROP_FPS)
+        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        video.release()
+    duration = total_frames / fps if fps > 0 else 0
+    return fps, total_frames, duration
+
+
+def iter_frames(
+    file_path: Union[str, Path],
+    interval: int = DEFAULT_SAMPLE_INTERVAL
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Oddaje co interval-tą sekundę wideo jako klatkę BGR.
+
+    Sekunda s odpowiada klatce int(s * FPS) - te same klatki co przy
+    ustawianiu CAP_PROP_POS_FRAMES, ale strumień dekodowany jest raz,
+    po kolei. Gdy FPS jest nieznany, o wyborze klatki decyduje jej znacznik
+    czasu (CAP_PROP_POS_MSEC).
+
+    Args:
+        file_path: Ścieżka do pliku wideo
+        interval: Odstęp między próbkowanymi sekundami
+
+    Yields:
+        (sekunda, klatka BGR jako tablica numpy)
+    """
+    import cv2
+
+    interval = max(1, int(interval))
+    video = cv2.VideoCapture(str(file_path))
+    if not video.isOpened():
+        logger.warning(f"Nie można otworzyć wideo: {file_path}")
+        return
+
+    fps = video.get(cv2.CAP_PROP_FPS)
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    second = 0
+    frame_idx = 0
+
+    try:
+        while True:
+            target = int(second * fps) if fps > 0 else None
+            if target is not None and 0 < total_frames <= target:
+                break
+
+            # grab() dekoduje klatkę, ale nie konwertuje jej do BGR
+            if not video.grab():
+                break
+
+            if target is not None:
+                position = frame_idx
+                selected = position >= target
+            else:
+                position = video.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                selected = position >= second
+            frame_idx += 1
+
+            if not selected:
+                continue
+
+            ok, frame = video.retrieve()
+            if not ok:
+                logger.debug(f"Nie można odczytać klatki dla {second}s")
+
+            # Przy FPS < 1 (lub przerwie w znacznikach czasu) kilka sekund wypada na tę samą klatkę
+            while True:
+                if ok:
+                    yield second, frame
+                second += interval
+                next_position = int(second * fps) if target is not None else second
+                if next_position > position:
+                    break
+    finally:
+        video.release()
+
+
+def frame_hash(frame: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Zwraca percepcyjny hash różnicowy (dHash) klatki.
+
+    Klatka zmniejszana jest do (hash_size+1) x hash_size w skali szarości,
+    a każdy bit mówi, czy piksel jest jaśniejszy od prawego sąsiada - hash
+    nie zależy od rozdzielczości, kompresji ani drobnych zmian jasności.
+
+    Args:
+        frame: Klatka BGR
+        hash_size: Bok siatki (hash ma hash_size² bitów)
+
+    Returns:
+        Hash jako liczba całkowita
+    """
+    import cv2
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+
+class FrameChangeFilter:
+    """
+    Wybiera klatki wideo wyraźnie różne od ostatnio opisanej.
+
+    Klatka jest przekazywana do modelu wizyjnego, gdy odległość Hamminga
+    jej dHash od ostatnio wybranej klatki przekracza próg. Limit klatek na
+    wideo rozkładany jest równomiernie - długie nagrania dostają minimalny
+    odstęp między opisywanymi klatkami zamiast wyczerpać limit na początku.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_SCENE_THRESHOLD, max_frames: int = DEFAULT_MAX_FRAMES,
+                 hash_size: int = 8):
+        """
+        Inicjalizuje filtr.
+
+        Args:
+            threshold: Minimalna liczba różnych bitów dHash (0 = każda klatka)
+            max_frames: Maksymalna liczba opisywanych klatek na wideo (0 = bez limitu)
+            hash_size: Bok siatki dHash
+        """
+        self.threshold = max(0, threshold)
+        self.max_frames = max(0, max_frames)
+        self.hash_size = hash_size
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'FrameChangeFilter':
+        """Tworzy filtr na podstawie sekcji "video" konfiguracji"""
+        return cls(
+            threshold=config.get('scene_threshold', DEFAULT_SCENE_THRESHOLD),
+            max_frames=config.get('max_frames', DEFAULT_MAX_FRAMES)
+        )
+
+    def reset(self, duration: float = 0.0):
+        """
+        Przygotowuje filtr do nowego wideo.
+
+        Args:
+            duration: Długość wideo w sekundach (do rozłożenia limitu klatek)
+        """
+        self._last_hash: Optional[int] = None
+        self._last_second: Optional[int] = None
+        self.selected = 0
+        self.skipped = 0
+        self.min_gap = 0
+        if self.max_frames and duration > self.max_frames:
+            self.min_gap = math.ceil(duration / self.max_frames)
+
+    def accept(self, second: int, frame: np.ndarray) -> bool:
+        """
+        Decyduje, czy klatka ma zostać opisana.
+
+        Args:
+            second: Sekunda wideo
+            frame: Klatka BGR
+
+        Returns:
+            True - opisz klatkę, False - sekunda dziedziczy poprzedni opis
+        """
+        if self._last_hash is not None:
+            if self.max_frames and self.selected >= self.max_frames:
+                self.skipped += 1
+                return False
+            if self.min_gap and second - self._last_second < self.min_gap:
+                self.skipped += 1
+                return False
+
+        if self.threshold:
+            current = frame_hash(frame, self.hash_size)
+            if self._last_hash is not None and bin(current ^ self._last_hash).count("1") < self.threshold:
+                self.skipped += 1
+                return False
+            self._last_hash = current
+        else:
+            self._last_hash = 0
+
+        self._last_second = second
+        self.selected += 1
+        return True
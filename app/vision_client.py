@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vision Client - klient modelu wizyjnego (Ollama, Gemma 3) dla ingestii obrazów.
+
+Obsługuje:
+- Wspólną sesję HTTP z pulą połączeń (keep-alive)
+- Endpoint i model z tej samej konfiguracji co OllamaProvider
+- Ograniczoną liczbę równoległych żądań (model nie jest zasypywany)
+- Ponawianie z wykładniczym backoffem przy błędach przejściowych
+- Opcjonalnie kilka obrazów w jednym żądaniu
+- keep_alive i num_ctx jak w OllamaProvider - ten sam model nie jest
+  przeładowywany między opisem obrazów a odpowiadaniem na pytania
+"""
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from context_builder import context_window
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OLLAMA_URL = "http://127.0.0.1:11434"
+DEFAULT_VISION_MODEL = "gemma3:12b"
+DEFAULT_MAX_CONCURRENCY = 2     # Ollama domyślnie obsługuje kilka żądań równolegle (OLLAMA_NUM_PARALLEL)
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+DEFAULT_TIMEOUT = 300           # 5 minut dla dużych obrazów
+DEFAULT_KEEP_ALIVE = "30m"      # Czas utrzymania modelu w pamięci po ostatnim żądaniu
+DEFAULT_GENERATION_MODEL = "gemma3:12b"
+
+# Kody HTTP, przy których ponawiamy żądanie
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Nagłówek sekcji w odpowiedzi na żądanie wieloobrazowe
+_SECTION_PATTERN = re.compile(r'^\s*#{0,3}\s*Obraz\s+(\d+)\s*[:.)-]?\s*', re.IGNORECASE | re.MULTILINE)
+
+
+class VisionClient:
+    """
+    Klient modelu wizyjnego z pulą połączeń i ograniczoną współbieżnością.
+
+    Jedna instancja na (url, model) jest współdzielona przez cały proces
+    (get_vision_client) - wszystkie procesory formatów i profile, także po
+    przebudowie RAGSystem przez Streamlit - więc max_concurrency ogranicza
+    żądania całego procesu, a pula wątków i połączeń nie jest tworzona od nowa.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_OLLAMA_URL,
+        model: str = DEFAULT_VISION_MODEL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        timeout: int = DEFAULT_TIMEOUT,
+        images_per_request: int = 1,
+        keep_alive: Optional[Union[str, int]] = DEFAULT_KEEP_ALIVE,
+        num_ctx: Optional[int] = None
+    ):
+        """
+        Inicjalizuje klienta.
+
+        Args:
+            base_url: URL serwera Ollama
+            model: Nazwa modelu multimodalnego
+            max_concurrency: Maksymalna liczba żądań w locie
+            max_retries: Liczba ponowień przy błędach przejściowych
+            backoff_seconds: Bazowe opóźnienie ponowienia (podwajane co próbę)
+            timeout: Timeout pojedynczego żądania (sekundy)
+            images_per_request: Liczba obrazów w jednym żądaniu (1 = bez grupowania)
+            keep_alive: Czas utrzymania modelu w pamięci ("30m", sekundy, -1 = bez limitu)
+            num_ctx: Okno kontekstu modelu (None = domyślne Ollama)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.images_per_request = max(1, images_per_request)
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+
+        # Pula połączeń dopasowana do liczby równoległych żądań
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="vision")
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+        logger.info(f"VisionClient: model={model}, url={self.base_url}, "
+                    f"równolegle={self.max_concurrency}, obrazów/żądanie={self.images_per_request}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'VisionClient':
+        """
+        Tworzy klienta z konfiguracji aplikacji (auth_config.json).
+
+        Endpoint pochodzi z sekcji "ollama" (jak w OllamaProvider),
+        parametry klienta z sekcji "vision". Gdy model wizyjny jest modelem
+        generowania odpowiedzi, używa tego samego num_ctx.
+        """
+        return cls(**cls.settings(config))
+
+    @staticmethod
+    def settings(config: Dict[str, Any]) -> Dict[str, Any]:
+        """Parametry klienta z konfiguracji aplikacji (patrz from_config)"""
+        ollama_cfg = config.get('ollama', {})
+        vision_cfg = config.get('vision', {})
+        model = vision_cfg.get('model', ollama_cfg.get('vision_model', DEFAULT_VISION_MODEL))
+        num_ctx = vision_cfg.get('num_ctx')
+        if num_ctx is None and model == ollama_cfg.get('model', DEFAULT_GENERATION_MODEL):
+            num_ctx = context_window(config)
+        return dict(
+            base_url=vision_cfg.get('url', ollama_cfg.get('url', DEFAULT_OLLAMA_URL)),
+            model=model,
+            max_concurrency=vision_cfg.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+            max_retries=vision_cfg.get('max_retries', DEFAULT_MAX_RETRIES),
+            backoff_seconds=vision_cfg.get('backoff_seconds', DEFAULT_BACKOFF_SECONDS),
+            timeout=vision_cfg.get('timeout', DEFAULT_TIMEOUT),
+            images_per_request=vision_cfg.get('images_per_request', 1),
+            keep_alive=vision_cfg.get('keep_alive', ollama_cfg.get('keep_alive', DEFAULT_KEEP_ALIVE)),
+            num_ctx=num_ctx
+        )
+
+    def describe(self, encoded_image: str, prompt: str) -> str:
+        """
+        Opisuje pojedynczy obraz.
+
+        Args:
+            encoded_image: Obraz w base64
+            prompt: Polecenie dla modelu
+
+        Returns:
+            Opis obrazu lub pusty string przy błędzie
+        """
+        return self._generate(prompt, [encoded_image])
+
+    def describe_many(self, encoded_images: List[str], prompt: str) -> List[str]:
+        """
+        Opisuje wiele obrazów równolegle (maks. max_concurrency żądań w locie).
+
+        Args:
+            encoded_images: Obrazy w base64
+            prompt: Polecenie dla modelu (to samo dla każdego obrazu)
+
+        Returns:
+            Lista opisów w kolejności wejścia (pusty string dla błędów)
+        """
+        if not encoded_images:
+            return []
+
+        groups = [
+            list(range(start, min(start + self.images_per_request, len(encoded_images))))
+            for start in range(0, len(encoded_images), self.images_per_request)
+        ]
+
+        futures = [
+            self._executor.submit(self._describe_group, [encoded_images[i] for i in group], prompt)
+            for group in groups
+        ]
+
+        results = [""] * len(encoded_images)
+        for group, future in zip(groups, futures):
+            for idx, description in zip(group, future.result()):
+                results[idx] = description
+        return results
+
+    def _describe_group(self, encoded_images: List[str], prompt: str) -> List[str]:
+        """Opisuje grupę obrazów jednym żądaniem (z fallbackiem na pojedyncze)"""
+        if len(encoded_images) == 1:
+            return [self._generate(prompt, encoded_images)]
+
+        group_prompt = (
+            f"{prompt}\n\nOtrzymujesz {len(encoded_images)} obrazów. Opisz każdy osobno, "
+            f"zaczynając sekcję od nagłówka 'Obraz N:' (N od 1 do {len(encoded_images)})."
+        )
+        response = self._generate(group_prompt, encoded_images)
+        sections = self._split_sections(response, len(encoded_images))
+        if sections is not None:
+            return sections
+
+        # Model nie zachował formatu - opisujemy obrazy pojedynczo
+        logger.debug("Odpowiedź wieloobrazowa bez poprawnych sekcji - fallback na pojedyncze żądania")
+        return [self._generate(prompt, [image]) for image in encoded_images]
+
+    @staticmethod
+    def _split_sections(response: str, expected: int):
+        """Dzieli odpowiedź na sekcje 'Obraz N:' (None jeśli format się nie zgadza)"""
+        matches = list(_SECTION_PATTERN.finditer(response))
+        numbers = [int(m.group(1)) for m in matches]
+        if numbers != list(range(1, expected + 1)):
+            return None
+
+        sections = []
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+            sections.append(response[match.end():end].strip())
+        return sections
+
+    def _generate(self, prompt: str, encoded_images: List[str]) -> str:
+        """Wysyła żądanie do /api/generate z ponawianiem przy błędach przejściowych"""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "images": encoded_images
+        }
+        if self.keep_alive is not None:
+            payload['keep_alive'] = self.keep_alive
+        if self.num_ctx:
+            payload['options'] = {'num_ctx': self.num_ctx}
+
+        for attempt in range(self.max_retries + 1):
+            start_time = time.time()
+            try:
+                with self._semaphore:
+                    self._count('requests')
+                    response = self.session.post(
+                        f"{self.base_url}/api/generate",
+                        json=payload,
+                        timeout=self.timeout
+                    )
+
+                if response.status_code == 200:
+                    logger.debug(f"Odpowiedź modelu wizyjnego w {time.time() - start_time:.2f} sekund")
+                    description = response.json().get('response', '').strip()
+                    if not description:
+                        logger.warning("Model zwrócił pustą odpowiedź")
+                    return description
+
+                if response.status_code not in RETRY_STATUS_CODES:
+                    logger.error(f"Błąd HTTP podczas opisywania obrazu: {response.status_code}")
+                    break
+
+                logger.warning(f"Błąd HTTP {response.status_code} modelu wizyjnego (próba {attempt + 1})")
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                logger.warning(f"Błąd połączenia z modelem wizyjnym (próba {attempt + 1}): {e}")
+            except Exception as e:
+                logger.error(f"Błąd podczas opisywania obrazu: {e}", exc_info=True)
+                break
+
+            if attempt < self.max_retries:
+                self._count('retries')
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+
+        self._count('failures')
+        return ""
+
+    def _count(self, key: str):
+        # Statystyki zmieniane są z wątków puli
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def close(self):
+        """Zamyka pulę wątków i połączeń"""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+_clients: Dict[Tuple[str, str], VisionClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_vision_client(config: Dict[str, Any]) -> VisionClient:
+    """
+    Zwraca klienta modelu wizyjnego wspólnego dla procesu.
+
+    Klucz to (url, model) - pozostałe ustawienia sekcji "vision" brane są
+    z konfiguracji przy pierwszym utworzeniu klienta.
+
+    Args:
+        config: Konfiguracja aplikacji (sekcje "ollama" i "vision")
+
+    Returns:
+        Instancja VisionClient
+    """
+    settings = VisionClient.settings(config)
+    key = (settings['base_url'].rstrip('/'), settings['model'])
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = VisionClient(**settings)
+        return client
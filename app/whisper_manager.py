@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Whisper Manager - współdzielony model transkrypcji dla całego procesu.
+
+Obsługuje:
+- Leniwe ładowanie modelu przy pierwszej transkrypcji (z models/whisper)
+- Współdzielenie jednego modelu przez watcher, indeksowanie z UI i CLI
+- Zwalnianie modelu (RAM/VRAM) po okresie bezczynności
+- Zmianę rozmiaru modelu w trakcie działania (tiny/base/small/medium/large-v3)
+- Model wskazany per transkrypcja (profile indeksowania)
+"""
+
+import gc
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+WHISPER_MODELS_DIR = BASE_DIR / "models" / "whisper"
+DEFAULT_WHISPER_MODEL = "large-v3"
+DEFAULT_IDLE_TIMEOUT = 600      # Sekundy bez transkrypcji, po których model jest zwalniany
+DEFAULT_MAX_CONCURRENT = 1      # Replik modelu (równoległych okien); każda replika to pełna pamięć modelu
+
+WHISPER_MODEL_SIZES = {
+    'tiny': '75 MB', 'base': '145 MB', 'small': '470 MB', 'medium': '1.5 GB', 'large-v3': '3 GB'
+}
+
+
+class WhisperModelManager:
+    """
+    Trzyma załadowane repliki modelu Whisper i wydaje je kolejnym transkrypcjom.
+
+    Hooki kv-cache whisper nie są bezpieczne wątkowo, więc każda replika
+    dekoduje naraz jedno okno - równoległe transkrypcje (okna długich nagrań)
+    dostają osobne repliki, najwyżej max_concurrent (każda zajmuje pełną
+    pamięć modelu). Repliki ładowane są przy pierwszym użyciu i zwalniane
+    przez wątek porządkowy, gdy nikt ich nie używa dłużej niż idle_timeout.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_WHISPER_MODEL,
+        download_root: Path = WHISPER_MODELS_DIR,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        device: Optional[str] = None
+    ):
+        """
+        Inicjalizuje menedżera (bez ładowania modelu).
+
+        Args:
+            model_name: Rozmiar modelu Whisper
+            download_root: Katalog z plikami *.pt
+            idle_timeout: Czas bezczynności do zwolnienia modelu (0 = nigdy)
+            max_concurrent: Liczba replik modelu = równoległych transkrypcji
+                (pamięć RAM/VRAM rośnie z liczbą replik)
+            device: 'cuda' / 'cpu' (None = wybór whisper)
+        """
+        self.model_name = model_name
+        self.download_root = Path(download_root)
+        self.idle_timeout = idle_timeout
+        self.max_concurrent = max(1, max_concurrent)
+        self.device = device
+
+        self._loaded_name: Optional[str] = None   # Rozmiar modelu replik w pamięci
+        self._idle: List[Any] = []                # Repliki czekające na transkrypcję
+        self._replicas = 0                        # Repliki załadowane lub w trakcie ładowania
+        self._lock = threading.RLock()
+        self._released = threading.Condition(self._lock)
+        self._active = 0
+        self._last_used = time.time()
+        self._reaper: Optional[threading.Thread] = None
+        self.stats = {'loads': 0, 'unloads': 0, 'transcriptions': 0, 'load_seconds': 0.0}
+
+    def configure(self, config: Dict[str, Any]):
+        """
+        Aktualizuje ustawienia z sekcji "whisper" konfiguracji.
+
+        Zmiana rozmiaru modelu zwalnia aktualne repliki - nowe zostaną
+        załadowane przy najbliższej transkrypcji.
+        """
+        with self._lock:
+            self.idle_timeout = config.get('idle_timeout', self.idle_timeout)
+            self.device = config.get('device', self.device)
+            self.download_root = Path(config.get('download_root', self.download_root))
+            self.max_concurrent = max(1, config.get('max_concurrent', self.max_concurrent))
+            # Nadmiarowe wolne repliki zwalniane od razu, zajęte - po zakończeniu transkrypcji
+            while self._replicas > self.max_concurrent and self._idle:
+                self._idle.pop()
+                self._replicas -= 1
+            self._released.notify_all()
+            self.set_model_name(config.get('model', self.model_name))
+
+    def set_model_name(self, model_name: str):
+        """Ustawia rozmiar modelu używany przez kolejne transkrypcje"""
+        with self._lock:
+            if model_name == self.model_name:
+                return
+            logger.info(f"[WHISPER] Zmiana modelu: {self.model_name} -> {model_name}")
+            self.model_name = model_name
+            if self._active == 0:
+                self._unload()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._replicas > 0
+
+    @contextmanager
+    def model(self, model_name: Optional[str] = None):
+        """
+        Wypożycza replikę modelu na wyłączność na czas transkrypcji.
+
+        W pamięci są repliki jednego rozmiaru - transkrypcja innym rozmiarem
+        czeka, aż zakończą się transkrypcje aktualnie załadowanym. Gdy
+        wszystkie repliki są zajęte, a jest ich mniej niż max_concurrent,
+        ładowana jest kolejna (poza blokadą); w przeciwnym razie czeka na wolną.
+
+        Args:
+            model_name: Rozmiar modelu (None = model_name menedżera)
+
+        Yields:
+            Model whisper używany tylko przez wywołującego
+        """
+        with self._lock:
+            name = model_name or self.model_name
+            while True:
+                if self._active == 0 and self._loaded_name != name:
+                    self._unload()
+                    self._loaded_name = name
+                if self._loaded_name == name:
+                    if self._idle:
+                        model = self._idle.pop()
+                        break
+                    if self._replicas < self.max_concurrent:
+                        # Ładowanie trwa minuty - poza blokadą, żeby nie wieszać set_model_name/unload
+                        model = None
+                        self._replicas += 1
+                        break
+                self._released.wait()
+            self._active += 1
+
+        try:
+            if model is None:
+                model = self._load_replica(name)
+            yield model
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_used = time.time()
+                if model is not None:
+                    self.stats['transcriptions'] += 1
+                    if self._loaded_name == name and self._replicas <= self.max_concurrent:
+                        self._idle.append(model)
+                    else:
+                        self._replicas -= 1
+                self._released.notify_all()
+
+    def transcribe(self, audio, model_name: Optional[str] = None, **options) -> Dict[str, Any]:
+        """
+        Transkrybuje audio wolną repliką modelu.
+
+        Args:
+            audio: Ścieżka do pliku lub tablica numpy (16 kHz mono float32)
+            model_name: Rozmiar modelu (None = model_name menedżera)
+            **options: Opcje whisper.transcribe (language, task, ...)
+
+        Returns:
+            Wynik whisper.transcribe
+        """
+        if isinstance(audio, Path):
+            audio = str(audio)
+        with self.model(model_name) as model:
+            return model.transcribe(audio, verbose=False, **options)
+
+    def _load_replica(self, model_name: str):
+        """
+        Ładuje replikę modelu poza blokadą.
+
+        Wywołujący zarezerwował replikę (_replicas) i slot w _active, więc
+        w tym czasie nikt nie zwolni modeli ani nie zacznie ładować innego
+        rozmiaru. Błąd ładowania zwalnia rezerwację.
+        """
+        try:
+            import whisper
+
+            model_file = self.download_root / f"{model_name}.pt"
+            if not model_file.exists():
+                size = WHISPER_MODEL_SIZES.get(model_name, '?')
+                logger.info(f"[DOWNLOAD] Model Whisper {model_name} (~{size}) nie jest pobrany - pobieranie do {self.download_root}")
+                logger.info("[INFO] To może potrwać kilka minut przy pierwszym użyciu...")
+
+            logger.info(f"[LOADING] Ładowanie modelu Whisper {model_name} (replika {self._replicas}/{self.max_concurrent})...")
+            load_start = time.time()
+            model = whisper.load_model(model_name, device=self.device, download_root=str(self.download_root))
+            load_time = time.time() - load_start
+            logger.info(f"[OK] Model Whisper {model_name} załadowany w {load_time:.2f} sekund")
+        except BaseException:
+            with self._lock:
+                self._replicas -= 1
+                self._released.notify_all()
+            raise
+
+        with self._lock:
+            self.stats['loads'] += 1
+            self.stats['load_seconds'] += load_time
+            self._start_reaper()
+        return model
+
+    def _unload(self):
+        """Zwalnia repliki z pamięci (wywoływane pod blokadą, gdy nikt ich nie używa)"""
+        self._loaded_name = None
+        if not self._replicas:
+            return
+        logger.info(f"[WHISPER] Zwalnianie modelu ({self._replicas} replik)")
+        self._idle = []
+        self._replicas = 0
+        self.stats['unloads'] += 1
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def unload(self):
+        """Zwalnia model, jeśli nie trwa żadna transkrypcja"""
+        with self._lock:
+            if self._active == 0:
+                self._unload()
+
+    def _start_reaper(self):
+        """Uruchamia wątek zwalniający bezczynny model (jeden na proces)"""
+        if self.idle_timeout <= 0 or (self._reaper is not None and self._reaper.is_alive()):
+            return
+        self._reaper = threading.Thread(target=self._reap_idle, name="whisper-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_idle(self):
+        while True:
+            time.sleep(max(5.0, min(60.0, self.idle_timeout / 4)))
+            with self._lock:
+                if not self._replicas:
+                    return
+                if self._active == 0 and time.time() - self._last_used > self.idle_timeout:
+                    logger.info(f"[WHISPER] Model bezczynny ponad {self.idle_timeout:.0f}s")
+                    self._unload()
+                    return
+
+
+_whisper_manager = None
+_whisper_manager_lock = threading.Lock()
+
+
+def get_whisper_manager(config: Optional[Dict[str, Any]] = None) -> WhisperModelManager:
+    """
+    Zwraca singleton WhisperModelManager.
+
+    Args:
+        config: Sekcja "whisper" konfiguracji (stosowana tylko przy tworzeniu -
+            późniejsze zmiany modelu z UI nie są nadpisywane)
+
+    Returns:
+        Instancja WhisperModelManager
+    """
+    global _whisper_manager
+    with _whisper_manager_lock:
+        if _whisper_manager is None:
+            _whisper_manager = WhisperModelManager()
+            if config:
+                _whisper_manager.configure(config)
+    return _whisper_manager
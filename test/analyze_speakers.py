@@ -11,6 +11,25 @@ from sklearn.cluster import AgglomerativeClustering
 from sklearn.preprocessing import StandardScaler
 from pathlib import Path
 import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from speaker_diarization import compute_frame_features, segment_features as aggregate_segment_features
+
+
+def parse_segment_times(segments):
+    """Wyciąga (początek, koniec) w sekundach z contentu '[MM:SS - MM:SS] ...'"""
+    times = []
+    for seg in segments:
+        match = re.search(r'\[(\d+):(\d+) - (\d+):(\d+)\]', seg['content'])
+        if not match:
+            times.append(None)
+            continue
+        start_min, start_sec, end_min, end_sec = (int(g) for g in match.groups())
+        times.append((start_min * 60 + start_sec, end_min * 60 + end_sec))
+    return times
+
 
 def extract_audio_features(audio_path, segments):
     """Ekstraktuje cechy audio (MFCC + pitch + energy) dla każdego segmentu"""
@@ -19,71 +38,21 @@ def extract_audio_features(audio_path, segments):
     audio_data, sr = librosa.load(str(audio_path), sr=16000)
     print(f"[AUDIO] Wczytano: {len(audio_data)/sr:.1f}s, {sr}Hz")
     
-    segment_features = []
+    # Segmenty z timestampem, dłuższe niż 0.4s i mieszczące się w nagraniu
+    duration = len(audio_data) / sr
     valid_segments = []
+    bounds = []
+    for i, times in enumerate(parse_segment_times(segments)):
+        if times and times[1] - times[0] > 0.4 and times[1] <= duration:
+            valid_segments.append(i)
+            bounds.append(times)
     
     print(f"[FEATURES] Ekstrakcja cech dla {len(segments)} segmentów...")
     
-    for i, seg in enumerate(segments):
-        # Wyciągnij timestamp z contentu
-        match = re.search(r'\[(\d+):(\d+) - (\d+):(\d+)\]', seg['content'])
-        if not match:
-            continue
-            
-        start_min, start_sec = int(match.group(1)), int(match.group(2))
-        end_min, end_sec = int(match.group(3)), int(match.group(4))
-        
-        start_time = start_min * 60 + start_sec
-        end_time = end_min * 60 + end_sec
-        
-        # Wyciągnij fragment audio
-        start_sample = int(start_time * sr)
-        end_sample = int(end_time * sr)
-        
-        if end_sample > start_sample and end_sample <= len(audio_data):
-            segment_audio = audio_data[start_sample:end_sample]
-            
-            # Minimum 0.4s do analizy
-            if len(segment_audio) > sr * 0.4:
-                try:
-                    # MFCC (Mel-frequency cepstral coefficients) - barwa głosu
-                    mfcc = librosa.feature.mfcc(
-                        y=segment_audio, 
-                        sr=sr, 
-                        n_mfcc=13
-                    )
-                    mfcc_mean = np.mean(mfcc, axis=1)
-                    mfcc_std = np.std(mfcc, axis=1)
-                    
-                    # Pitch (F0) - wysokość głosu
-                    pitches, magnitudes = librosa.piptrack(
-                        y=segment_audio, 
-                        sr=sr
-                    )
-                    pitch_mean = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
-                    pitch_std = np.std(pitches[pitches > 0]) if np.any(pitches > 0) else 0
-                    
-                    # Energy - energia głosu
-                    energy = np.mean(librosa.feature.rms(y=segment_audio))
-                    
-                    # Spectral centroid - "jasność" dźwięku
-                    spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=segment_audio, sr=sr))
-                    
-                    # Połącz cechy (31 wymiarów total)
-                    features = np.concatenate([
-                        mfcc_mean,      # 13
-                        mfcc_std,       # 13
-                        [pitch_mean, pitch_std, energy, spectral_centroid]  # 4
-                    ])
-                    
-                    segment_features.append(features)
-                    valid_segments.append(i)
-                    
-                    if (i + 1) % 20 == 0:
-                        print(f"   Przeanalizowano {i+1}/{len(segments)} segmentów...")
-                        
-                except Exception as e:
-                    print(f"   Błąd segment {i}: {e}")
+    # Cechy ramek liczone raz dla całego pliku, agregowane per segment (30 wymiarów:
+    # MFCC mean/std, pitch mean/std, energy, spectral centroid)
+    frame_features = compute_frame_features(audio_data, sr)
+    segment_features = list(aggregate_segment_features(frame_features, bounds, sr, extended=True)) if bounds else []
     
     print(f"[FEATURES] ✅ Przeanalizowano {len(valid_segments)}/{len(segments)} segmentów")
     return segment_features, valid_segments
@@ -228,6 +197,3 @@ if __name__ == "__main__":
     print("   - test/rozmowa_1_SPEAKERS.json")
     print("   - test/rozmowa_2_SPEAKERS.json")
     print("="*80)
-
-PYEOF
-
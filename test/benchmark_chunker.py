@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark podziału tekstu na fragmenty: stary podział znakowy vs TextChunker.
+
+Mierzy czas, liczbę fragmentów i rozkład długości w tokenach e5
+(ile fragmentów przekracza limit modelu embeddingów - 512 tokenów).
+
+Użycie:
+    python test/benchmark_chunker.py [plik.pdf|plik.txt ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from text_chunker import TextChunker, get_token_counter
+
+SAMPLE_DIR = Path(__file__).parent / "sample_test_files"
+E5_MAX_TOKENS = 512
+
+
+def legacy_chunk_text(text: str, max_chunk_size: int = 500):
+    """Poprzednia implementacja DocumentProcessor._chunk_text (limit w znakach)"""
+    if not text.strip():
+        return []
+    sentences = text.split('. ')
+    chunks = []
+    current_chunk = ""
+    for sentence in sentences:
+        sentence = sentence.strip() + ". " if sentence.strip() else ""
+        if len(current_chunk) + len(sentence) <= max_chunk_size:
+            current_chunk += sentence
+        else:
+            if current_chunk.strip():
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def load_text(path: Path) -> str:
+    """Wczytuje tekst z PDF (pdfplumber) lub pliku tekstowego"""
+    if path.suffix.lower() == '.pdf':
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return "\n\n".join(page.extract_text() or "" for page in pdf.pages)
+    return path.read_text(encoding='utf-8', errors='ignore')
+
+
+def run(name: str, text: str, chunker: TextChunker):
+    counter = get_token_counter()
+    print(f"\n{name}: {len(text):,} znaków")
+
+    for label, func in [("stary (500 znaków)", legacy_chunk_text), (f"TextChunker ({chunker.max_tokens} tok.)", chunker.chunk)]:
+        start = time.perf_counter()
+        chunks = func(text)
+        elapsed = time.perf_counter() - start
+
+        tokens = counter.count_many(chunks) if chunks else [0]
+        over = sum(1 for t in tokens if t > E5_MAX_TOKENS)
+        print(f"  {label:<28} {elapsed * 1000:9.1f} ms | fragmentów: {len(chunks):6} | "
+              f"tokeny śr/maks: {sum(tokens) / len(tokens):6.1f}/{max(tokens):5} | >{E5_MAX_TOKENS}: {over}")
+
+
+def main():
+    chunker = TextChunker()
+    counter = get_token_counter()
+    print(f"Licznik tokenów: {'tokenizer ' + counter.model_name if counter.exact else 'estymator znakowy'}")
+
+    paths = [Path(p) for p in sys.argv[1:]] or sorted(SAMPLE_DIR.glob("*.pdf"))
+    texts = []
+    for path in paths:
+        try:
+            text = load_text(path)
+        except Exception as e:
+            print(f"Pominięto {path}: {e}")
+            continue
+        texts.append(text)
+        run(path.name, text, chunker)
+
+    # Długi dokument - tu widać koszt kwadratowego sklejania stringów
+    base = "\n\n".join(texts) or ("To jest przykładowe zdanie dokumentu testowego. " * 20 + "\n\n")
+    long_text = (base + "\n\n") * max(1, 2_000_000 // max(1, len(base)))
+    run("długi dokument (syntetyczny)", long_text, chunker)
+
+
+if __name__ == "__main__":
+    main()
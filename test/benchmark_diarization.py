@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark rozpoznawania mówców: cechy liczone per segment vs raz dla całego pliku.
+
+Porównuje czas ekstrakcji cech i zgodność przypisania mówców (Adjusted Rand Index)
+starej pętli (librosa na każdym segmencie) z SpeakerDiarizer.
+
+Użycie:
+    python test/benchmark_diarization.py <audio> <transkrypcja.json> [--repeat N]
+
+Transkrypcja w formacie test/rozmowa_*_transkrypcja.json (content "[MM:SS - MM:SS] ...").
+Bez argumentów generowane jest syntetyczne nagranie dwóch "głosów".
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import librosa
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from speaker_diarization import SpeakerDiarizer, cluster_speakers
+from analyze_speakers import parse_segment_times
+
+SR = 16000
+
+
+def legacy_features(audio, segments):
+    """Poprzednia ekstrakcja z _process_audio (MFCC + pitch + energia per segment)"""
+    features, valid = [], []
+    for i, seg in enumerate(segments):
+        start_sample, end_sample = int(seg['start'] * SR), int(seg['end'] * SR)
+        if end_sample > start_sample and end_sample <= len(audio) and end_sample - start_sample > SR * 0.4:
+            segment_audio = audio[start_sample:end_sample]
+            mfcc_mean = np.mean(librosa.feature.mfcc(y=segment_audio, sr=SR, n_mfcc=13), axis=1)
+            pitches, _ = librosa.piptrack(y=segment_audio, sr=SR)
+            pitch_mean = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
+            energy = np.mean(librosa.feature.rms(y=segment_audio))
+            features.append(np.concatenate([mfcc_mean, [pitch_mean, energy]]))
+            valid.append(i)
+    return np.array(features), valid
+
+
+def synthetic_call(duration: float, seed: int = 0):
+    """Syntetyczne nagranie: naprzemienne wypowiedzi dwóch tonów harmonicznych z szumem"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.005, int(duration * SR)).astype(np.float32)
+    segments, position, speaker = [], 0.5, 0
+    while position < duration - 3:
+        length = rng.uniform(1.0, 6.0)
+        t = np.arange(int(length * SR)) / SR
+        f0 = (120, 220)[speaker] * (1 + 0.03 * np.sin(2 * np.pi * 3 * t))
+        voice = sum(np.sin(2 * np.pi * k * np.cumsum(f0) / SR) / k for k in range(1, 6))
+        start = int(position * SR)
+        audio[start:start + len(voice)] += 0.1 * voice.astype(np.float32)
+        segments.append({'start': position, 'end': position + length, 'speaker': speaker})
+        position += length + rng.uniform(0.2, 1.0)
+        speaker = 1 - speaker
+    return audio, segments
+
+
+def load_case(audio_path: str, transcript_path: str):
+    audio, _ = librosa.load(audio_path, sr=SR)
+    with open(transcript_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    segments = [
+        {'start': times[0], 'end': times[1]} if times else {'start': 0, 'end': 0}
+        for times in parse_segment_times(data['transkrypcja'])
+    ]
+    return audio, segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('audio', nargs='?')
+    parser.add_argument('transcript', nargs='?')
+    parser.add_argument('--duration', type=float, default=600.0, help="Długość nagrania syntetycznego (s)")
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.audio and args.transcript:
+        audio, segments = load_case(args.audio, args.transcript)
+        name = Path(args.audio).name
+    else:
+        audio, segments = synthetic_call(args.duration)
+        name = f"syntetyczne ({args.duration:.0f}s)"
+
+    diarizer = SpeakerDiarizer()
+    print(f"{name}: {len(audio) / SR:.0f}s audio, {len(segments)} segmentów")
+
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        legacy, legacy_valid = legacy_features(audio, segments)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        speaker_map = diarizer.diarize(audio, segments) or {}
+        new_time = time.perf_counter() - start
+
+        print(f"  per segment (stary):  {legacy_time:8.2f} s (same cechy)")
+        print(f"  cały plik (nowy):     {new_time:8.2f} s (cechy + klastrowanie) | x{legacy_time / max(new_time, 1e-9):.1f}")
+
+    if len(legacy) >= 2:
+        legacy_labels = cluster_speakers(legacy, diarizer.distance_threshold)
+        common = [i for i in legacy_valid if i in speaker_map]
+        old = dict(zip(legacy_valid, legacy_labels))
+        ari = adjusted_rand_score([old[i] for i in common], [speaker_map[i] for i in common])
+        print(f"  zgodność mówców stary/nowy (ARI): {ari:.3f} na {len(common)} segmentach")
+
+    if 'speaker' in segments[0]:
+        truth = [segments[i]['speaker'] for i in sorted(speaker_map)]
+        ari = adjusted_rand_score(truth, [speaker_map[i] for i in sorted(speaker_map)])
+        print(f"  zgodność z prawdziwymi mówcami (ARI): {ari:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark próbkowania klatek wideo (1 klatka/sekundę).
+
+Porównuje:
+- seek: CAP_PROP_POS_FRAMES przed każdą klatką (poprzednia pętla _process_video)
+- grab: jeden przebieg strumienia, grab() + retrieve() (video_frames.iter_frames)
+- ffmpeg: filtr fps=1 i surowe klatki BGR z potoku (tylko dla porównania)
+
+Mierzy czas, liczbę klatek i zgodność klatek z metodą seek (średnia różnica pikseli).
+
+Użycie:
+    python test/benchmark_frame_sampling.py [wideo.mp4] [--repeat N]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from video_frames import iter_frames, probe_video
+
+DEFAULT_VIDEO = Path(__file__).parent / "sample_test_file" / "film.mp4"
+
+
+def seek_frames(video_path: Path):
+    """Poprzednia implementacja: seek do klatki int(sekunda * FPS) dla każdej sekundy"""
+    video = cv2.VideoCapture(str(video_path))
+    fps = video.get(cv2.CAP_PROP_FPS)
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = total_frames / fps if fps > 0 else 0
+    try:
+        for second in range(int(duration) + 1):
+            frame_num = int(second * fps)
+            if frame_num >= total_frames:
+                break
+            video.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+            ret, frame = video.read()
+            if ret:
+                yield second, frame
+    finally:
+        video.release()
+
+
+def ffmpeg_frames(video_path: Path):
+    """Filtr fps=1 w ffmpeg, klatki BGR z potoku stdout"""
+    video = cv2.VideoCapture(str(video_path))
+    width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    video.release()
+    frame_bytes = width * height * 3
+
+    process = subprocess.Popen(
+        ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', str(video_path),
+         '-vf', 'fps=1:round=down', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'],
+        stdout=subprocess.PIPE
+    )
+    try:
+        second = 0
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield second, np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+            second += 1
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def run(label: str, sampler, video_path: Path, repeat: int, reference=None):
+    times = []
+    frames = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = {second: frame for second, frame in sampler(video_path)}
+        times.append(time.perf_counter() - start)
+
+    line = f"  {label:<8} {min(times):8.2f} s | klatek: {len(frames):5}"
+    if reference is not None:
+        common = sorted(set(frames) & set(reference))
+        if common:
+            diffs = [np.mean(np.abs(frames[s].astype(np.int16) - reference[s].astype(np.int16))) for s in common]
+            line += f" | różnica vs seek: śr {np.mean(diffs):5.2f}, maks {np.max(diffs):6.2f}"
+    print(line)
+    return frames, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark próbkowania klatek wideo")
+    parser.add_argument("video", nargs="?", default=str(DEFAULT_VIDEO))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    video_path = Path(args.video)
+    if not video_path.exists():
+        print(f"Brak pliku wideo: {video_path}")
+        sys.exit(1)
+
+    fps, total_frames, duration = probe_video(video_path)
+    print(f"{video_path.name}: {duration:.1f}s, {fps:.2f} FPS, {total_frames} klatek (najlepszy z {args.repeat} przebiegów)")
+
+    reference, seek_time = run("seek", seek_frames, video_path, args.repeat)
+    _, grab_time = run("grab", iter_frames, video_path, args.repeat, reference)
+    print(f"  przyspieszenie grab vs seek: {seek_time / grab_time:.2f}x")
+
+    try:
+        run("ffmpeg", ffmpeg_frames, video_path, args.repeat, reference)
+    except FileNotFoundError:
+        print("  ffmpeg   niedostępny - pominięto")
+
+
+if __name__ == "__main__":
+    main()
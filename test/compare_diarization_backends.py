@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Porównanie backendów rozpoznawania mówców na nagraniach testowych.
+
+Dla każdej rozmowy uruchamia:
+- "features"   - cechy MFCC + pitch + energia, ward (domyślny backend)
+- "embeddings" - embeddingi ECAPA (speechbrain), cosinus + average linkage
+
+i raportuje czas, liczbę wykrytych mówców oraz zgodność (Adjusted Rand Index)
+między backendami. Nagrania bez transkrypcji (sample_test_files/test_audio.mp3)
+dzielone są na segmenty stałej długości. Drugie uruchomienie backendu
+"embeddings" pokazuje zysk z cache embeddingów.
+
+Ograniczenia:
+- Pliki *_SPEAKERS.json / *_FINAL.json to wyniki poprzedniej metody (MFCC),
+  nie ręczne oznaczenia - ARI względem nich mierzy zgodność z poprzednią
+  metodą, a nie trafność rozpoznania mówców.
+- Nagrania rozmów (test/sample_test_file/rozmowa (N).mp3) nie są
+  w repozytorium - bez nich porównanie obejmuje tylko test_audio.mp3, dla
+  którego nie ma żadnych etykiet referencyjnych. Wyniki nie zostały dotąd
+  zebrane - skrypt trzeba uruchomić lokalnie z nagraniami i speechbrain.
+
+Użycie:
+    python test/compare_diarization_backends.py
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import librosa
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from artifact_cache import ArtifactCache
+from speaker_diarization import EmbeddingDiarizer, SpeakerDiarizer
+from analyze_speakers import parse_segment_times
+
+TEST_DIR = Path(__file__).resolve().parent
+SR = 16000
+
+SEGMENT_SECONDS = 2.0  # Długość segmentu dla nagrań bez transkrypcji
+
+# (audio względem test/, transkrypcja z czasami segmentów lub None,
+#  etykiety mówców z poprzedniej metody MFCC - nie ground truth)
+CASES = [
+    ("sample_test_files/test_audio.mp3", None, []),
+    ("sample_test_file/rozmowa (1).mp3", "rozmowa_1_transkrypcja.json", ["rozmowa_1_SPEAKERS.json", "rozmowa_1_FINAL.json"]),
+    ("sample_test_file/rozmowa (2).mp3", "rozmowa_2_transkrypcja.json", ["rozmowa_2_SPEAKERS.json", "rozmowa_2_t18.json", "rozmowa_2_FINAL.json"]),
+]
+
+
+def load_segments(transcript_file: Path):
+    with open(transcript_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [
+        {'start': times[0], 'end': times[1]} if times else {'start': 0, 'end': 0}
+        for times in parse_segment_times(data['transkrypcja'])
+    ]
+
+
+def fixed_segments(duration: float):
+    count = max(1, math.ceil(duration / SEGMENT_SECONDS))
+    return [
+        {'start': i * SEGMENT_SECONDS, 'end': min(duration, (i + 1) * SEGMENT_SECONDS)}
+        for i in range(count)
+    ]
+
+
+def load_labels(labels_file: Path):
+    with open(labels_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [seg.get('speaker', 'SPEAKER_0') for seg in data['transkrypcja']]
+
+
+def run_backend(name, diarizer, audio, segments):
+    start = time.perf_counter()
+    speaker_map = diarizer.diarize(audio, segments) or {}
+    elapsed = time.perf_counter() - start
+    labels = [speaker_map.get(i, "SPEAKER_0") for i in range(len(segments))]
+    distribution = Counter(labels)
+    print(f"  {name:<22} {elapsed:7.2f} s | mówców: {len(distribution)} | "
+          f"{', '.join(f'{k}={v}' for k, v in sorted(distribution.items()))}")
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    cache = ArtifactCache(cache_dir=TEST_DIR / "cache_diarization")
+    features = SpeakerDiarizer()
+    embeddings = EmbeddingDiarizer(artifact_cache=cache)
+
+    compared = 0
+    for audio_name, transcript_name, label_files in CASES:
+        audio_path = TEST_DIR / audio_name
+        print("=" * 80)
+        print(f"{audio_name}")
+        print("=" * 80)
+        if not audio_path.exists():
+            print(f"  Brak pliku audio: {audio_path} - pomijam")
+            continue
+
+        audio, _ = librosa.load(str(audio_path), sr=SR)
+        if transcript_name:
+            segments = load_segments(TEST_DIR / transcript_name)
+        else:
+            segments = fixed_segments(len(audio) / SR)
+        print(f"  {len(audio) / SR:.0f}s audio, {len(segments)} segmentów")
+
+        results = {
+            'features': run_backend("features (MFCC)", features, audio, segments),
+            'embeddings': run_backend("embeddings (ECAPA)", embeddings, audio, segments),
+        }
+        run_backend("embeddings (z cache)", embeddings, audio, segments)
+        compared += 1
+
+        print(f"  ARI features vs embeddings: {adjusted_rand_score(results['features'], results['embeddings']):.3f}")
+        if label_files:
+            print("  Zgodność z poprzednią metodą (etykiety MFCC, nie ground truth):")
+        for label_file in label_files:
+            reference = load_labels(TEST_DIR / label_file)
+            for backend, labels in results.items():
+                print(f"  ARI {backend:<10} vs {label_file:<26} {adjusted_rand_score(reference, labels):.3f}")
+
+    if compared < len(CASES):
+        print(f"\nPorównano {compared}/{len(CASES)} nagrań - brakujące rozmowy nie są w repozytorium")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testy przejść stanów circuit breakera i ponawiania żądań ProviderSession.
+
+Nie wymagają działającego backendu - żądania HTTP są podmieniane.
+
+Użycie:
+    python test/test_circuit_breaker.py
+    python -m pytest test/test_circuit_breaker.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from model_provider import (CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker,
+                            CircuitOpenError, ProviderSession)
+
+RESET_SECONDS = 0.05
+
+
+def open_breaker(threshold: int = 2) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=threshold, reset_seconds=RESET_SECONDS)
+    for _ in range(threshold):
+        breaker.before_request()
+        breaker.record_failure()
+    return breaker
+
+
+def expect_rejected(breaker: CircuitBreaker):
+    try:
+        breaker.before_request()
+    except CircuitOpenError:
+        return
+    raise AssertionError(f"żądanie przepuszczone w stanie {breaker.state}")
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=RESET_SECONDS)
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN and breaker.opened == 1
+    expect_rejected(breaker)
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=RESET_SECONDS)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_half_open_allows_single_probe():
+    breaker = open_breaker()
+    time.sleep(RESET_SECONDS * 2)
+    breaker.before_request()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    expect_rejected(breaker)
+
+
+def test_probe_success_closes():
+    breaker = open_breaker()
+    time.sleep(RESET_SECONDS * 2)
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.before_request()
+
+
+def test_probe_failure_reopens():
+    breaker = open_breaker()
+    time.sleep(RESET_SECONDS * 2)
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN and breaker.opened == 2
+    expect_rejected(breaker)
+
+
+def test_unexpected_probe_error_releases_probe():
+    session = ProviderSession("test", max_retries=0, failure_threshold=1, reset_seconds=RESET_SECONDS)
+
+    def broken(*args, **kwargs):
+        raise ValueError("nieoczekiwany błąd")
+
+    session.session.request = broken
+    for _ in range(2):
+        time.sleep(RESET_SECONDS * 2)
+        try:
+            session.get("http://backend/api")
+        except ValueError:
+            pass
+        # Próba zakończona błędem otwiera obwód ponownie zamiast blokować go na zawsze
+        assert session.breaker.state == CIRCUIT_OPEN
+        assert not session.breaker._probing
+
+
+def test_throttled_probe_releases_probe():
+    session = ProviderSession("test", max_retries=0, failure_threshold=1, reset_seconds=RESET_SECONDS)
+    statuses = [503, 429, 200]
+
+    class FakeResponse:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.headers = {}
+
+        def close(self):
+            pass
+
+    session.session.request = lambda method, url, **kwargs: FakeResponse(statuses.pop(0))
+    assert session.get("http://backend/api").status_code == 503
+    assert session.breaker.state == CIRCUIT_OPEN
+
+    time.sleep(RESET_SECONDS * 2)
+    assert session.get("http://backend/api").status_code == 429
+    # HTTP 429 w próbie nie zamyka obwodu, ale też nie blokuje kolejnych prób
+    assert session.breaker.state == CIRCUIT_HALF_OPEN
+    assert not session.breaker._probing
+
+    assert session.get("http://backend/api").status_code == 200
+    assert session.breaker.state == CIRCUIT_CLOSED
+
+
+def test_post_read_timeout_not_retried():
+    session = ProviderSession("test", max_retries=2, backoff_seconds=0, failure_threshold=0)
+    calls = []
+
+    def timeout(method, url, **kwargs):
+        calls.append(method)
+        raise requests.exceptions.ReadTimeout("read timeout")
+
+    session.session.request = timeout
+    try:
+        session.post("http://backend/api/generate")
+    except requests.exceptions.ReadTimeout:
+        pass
+    assert len(calls) == 1
+
+    calls.clear()
+    try:
+        session.get("http://backend/api/tags")
+    except requests.exceptions.ReadTimeout:
+        pass
+    assert len(calls) == 3
+
+
+def test_post_connect_timeout_retried():
+    session = ProviderSession("test", max_retries=2, backoff_seconds=0, failure_threshold=0)
+    calls = []
+
+    def timeout(method, url, **kwargs):
+        calls.append(method)
+        raise requests.exceptions.ConnectTimeout("connect timeout")
+
+    session.session.request = timeout
+    try:
+        session.post("http://backend/api/generate")
+    except requests.exceptions.ConnectTimeout:
+        pass
+    assert len(calls) == 3
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} testów zakończonych powodzeniem")
+    sys.exit(1 if failed else 0)